@@ -0,0 +1,333 @@
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import click
+from frappe.commands import get_site, pass_context
+from frappe.exceptions import SiteNotSpecifiedError
+
+PROGRESS_FILE = "payment_integration_utils_sync.json"
+BASELINE_FILE = "payment_integration_utils_setup_baseline.json"
+# site config to mark the site as scratch (customizations can be deleted)
+SCRATCH_SITE_CONFIG = "payment_integration_scratch_site"
+MAX_WORKERS = 8
+
+
+@click.command("sync-payment-customizations")
+@click.option(
+    "--workers",
+    type=int,
+    default=min(MAX_WORKERS, os.cpu_count() or 1),
+    help="Number of sites to sync in parallel.",
+)
+@click.option(
+    "--progress-file",
+    default=PROGRESS_FILE,
+    help="JSON file (in sites folder) to record the progress for resuming.",
+)
+@click.option(
+    "--restart",
+    is_flag=True,
+    default=False,
+    help="Ignore the progress file and sync all the sites again.",
+)
+@pass_context
+def sync_customizations(context, workers, progress_file, restart):
+    """
+    Apply roles, custom fields, property setters and workflows of this app to the sites in parallel.
+
+    Use `bench --site all sync-payment-customizations` for all the sites.
+    Each site runs in a separate process with its own connection.
+    Sites synced successfully are recorded in the progress file (with app version and
+    hash of the customizations) and skipped on re-run until the customizations change.
+    """
+    from payment_integration_utils.setup import get_customizations_version
+
+    if not context.sites:
+        raise SiteNotSpecifiedError
+
+    sites_path = os.path.abspath(".")
+    progress_path = os.path.join(sites_path, progress_file)
+    progress = {} if restart else load_json(progress_path)
+    version = get_customizations_version()
+
+    sites = get_sites_to_sync(context.sites, progress, version)
+
+    if skipped := len(context.sites) - len(sites):
+        click.secho(f"Skipping {skipped} site(s) already synced.", fg="yellow")
+
+    if not sites:
+        return
+
+    workers = max(1, min(workers, len(sites)))
+    click.secho(f"Syncing {len(sites)} site(s) with {workers} worker(s)...", fg="blue")
+
+    started_at = time.monotonic()
+
+    # `spawn`: fresh process per worker, nothing (connections, locals) is shared
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = [
+            executor.submit(sync_site_customizations, site, sites_path)
+            for site in sites
+        ]
+
+        for future in as_completed(futures):
+            result = future.result()
+            progress[result["site"]] = {**result, "version": version}
+            save_json(progress_path, progress)
+
+            if result["status"] == "Completed":
+                click.secho(f"{result['site']}: {result['time']:.2f}s", fg="green")
+            elif result["status"] == "Skipped":
+                click.secho(f"{result['site']}: {result['error']}", fg="yellow")
+            else:
+                click.secho(f"{result['site']}: {result['error']}", fg="red")
+
+    print_summary([progress[site] for site in sites], time.monotonic() - started_at)
+
+    if any(progress[site]["status"] == "Failed" for site in sites):
+        click.secho(
+            f"Re-run the command to retry the failed sites (progress: {progress_path}).",
+            fg="yellow",
+        )
+        raise SystemExit(1)
+
+
+def get_sites_to_sync(sites: list[str], progress: dict, version: str) -> list[str]:
+    """
+    Sites to sync, excluding the ones completed with the same customizations version.
+
+    Failed and skipped sites (or completed with an older version) are synced again.
+    """
+    return [
+        site
+        for site in sites
+        if progress.get(site, {}).get("status") != "Completed"
+        or progress[site].get("version") != version
+    ]
+
+
+def sync_site_customizations(site: str, sites_path: str) -> dict:
+    """
+    Apply customizations to one site (runs in a worker process).
+
+    Sites without this app installed are skipped.
+
+    :return: `{"site", "status", "time", "error"}`
+    """
+    import frappe
+
+    from payment_integration_utils.setup import setup_customizations
+
+    started_at = time.monotonic()
+    result = {"site": site, "status": "Completed", "error": None}
+
+    try:
+        frappe.init(site=site, sites_path=sites_path)
+        frappe.connect()
+
+        if "payment_integration_utils" not in frappe.get_installed_apps():
+            result.update({"status": "Skipped", "error": "App is not installed"})
+
+        else:
+            # keep the command's output readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                setup_customizations()
+
+            frappe.db.commit()
+
+    except Exception as e:
+        result.update({"status": "Failed", "error": repr(e)})
+
+        if frappe.db:
+            frappe.db.rollback()
+
+    finally:
+        frappe.destroy()
+
+    result["time"] = time.monotonic() - started_at
+    return result
+
+
+def load_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_json(path: str, data: dict):
+    # write and rename, so an interrupted run never leaves a broken file
+    temp_path = f"{path}.tmp"
+
+    with open(temp_path, "w") as f:
+        json.dump(data, f, indent=2)
+
+    os.replace(temp_path, path)
+
+
+def print_summary(results: list[dict], total_time: float):
+    click.secho("\nSite-wise Summary:", fg="blue")
+
+    for result in sorted(results, key=lambda r: r["time"], reverse=True):
+        click.echo(
+            f"{result['site']:<40} {result['status']:<10} {result['time']:>8.2f}s"
+        )
+
+    completed = sum(result["status"] == "Completed" for result in results)
+    skipped = sum(result["status"] == "Skipped" for result in results)
+    click.secho(
+        f"\n{completed}/{len(results) - skipped} site(s) synced in {total_time:.2f}s"
+        + (f" ({skipped} skipped without the app)" if skipped else ""),
+        fg="green" if completed + skipped == len(results) else "red",
+    )
+
+
+@click.command("benchmark-payment-setup")
+@click.option(
+    "--baseline",
+    default=BASELINE_FILE,
+    help="JSON file (in sites folder) of the stored profile to compare with.",
+)
+@click.option(
+    "--save-baseline",
+    is_flag=True,
+    default=False,
+    help="Store the current profile as the baseline.",
+)
+@click.option("--yes", is_flag=True, default=False, help="Skip the confirmation.")
+@pass_context
+def benchmark_setup(context, baseline, save_baseline, yes):
+    """
+    Run the uninstall and install cycle of customizations on a scratch site and compare
+    the profile with the baseline.
+
+    Runs only on sites marked as scratch:
+    `bench --site {site} set-config payment_integration_scratch_site 1`
+    """
+    import frappe
+
+    from payment_integration_utils.payment_integration_utils.setup.profiler import (
+        SetupProfiler,
+        compare_with_baseline,
+    )
+    from payment_integration_utils.setup import (
+        delete_customizations,
+        setup_customizations,
+    )
+
+    site = get_site(context)
+
+    if not frappe.get_site_config(sites_path=".", site_path=site).get(
+        SCRATCH_SITE_CONFIG
+    ):
+        click.secho(
+            f"{site} is not a scratch site. Customizations (roles, permissions and custom fields) "
+            "are deleted by the benchmark, so it runs only on sites with site config "
+            f"`{SCRATCH_SITE_CONFIG}` set.",
+            fg="red",
+        )
+        raise SystemExit(1)
+
+    if not yes:
+        click.confirm(
+            f"Customizations of {site} will be deleted and created again. Use a scratch site only. Continue?",
+            abort=True,
+        )
+
+    baseline_path = os.path.abspath(baseline)
+
+    frappe.init(site=site)
+    frappe.connect()
+
+    try:
+        profiler = SetupProfiler()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            delete_customizations(profiler)
+            setup_customizations(profiler)
+
+        frappe.db.commit()
+        profile = profiler.as_dict()
+
+    finally:
+        frappe.destroy()
+
+    profiler.print_summary("Benchmark Profile")
+
+    if os.path.exists(baseline_path):
+        click.secho("\nCompared with baseline:", fg="blue")
+        click.echo(
+            f"{'Phase':<32} {'Time (s)':>10} {'Baseline':>10} {'Change':>8} {'Queries':>9} {'Baseline':>9}"
+        )
+
+        for row in compare_with_baseline(profile, load_json(baseline_path)):
+            change = (
+                f"{row['time_change']:+.1f}%" if row["time_change"] is not None else "-"
+            )
+            baseline_time = row["baseline_time"]
+            click.echo(
+                f"{row['phase']:<32} {row['time']:>10.3f} "
+                f"{baseline_time if baseline_time is not None else '-':>10} {change:>8} "
+                f"{row['queries']:>9} {row['baseline_queries'] if row['baseline_queries'] is not None else '-':>9}"
+            )
+
+    if save_baseline:
+        save_json(baseline_path, profile)
+        click.secho(f"Baseline saved to {baseline_path}", fg="green")
+
+
+@click.command("benchmark-paisa-conversion")
+@click.option("--count", type=int, default=10_000, help="Number of amounts to convert.")
+@click.option("--number", type=int, default=3, help="Number of runs to time.")
+@pass_context
+def benchmark_paisa_conversion(context, count, number):
+    """
+    Compare the time of batch (`rupees_to_paisa_many`) and scalar (`rupees_to_paisa`)
+    conversion of amounts.
+
+    Wall-clock timings depend on the machine, so this is not a part of the test suite.
+    """
+    import random
+    import timeit
+
+    import frappe
+
+    from payment_integration_utils.payment_integration_utils.utils import (
+        numpy,
+        rupees_to_paisa,
+        rupees_to_paisa_many,
+    )
+
+    rng = random.Random(42)
+    amounts = [round(rng.uniform(0, 1e6), 2) for _ in range(count)]
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+
+    try:
+        scalar_time = timeit.timeit(
+            lambda: [rupees_to_paisa(amount) for amount in amounts], number=number
+        )
+        batch_time = timeit.timeit(lambda: rupees_to_paisa_many(amounts), number=number)
+
+    finally:
+        frappe.destroy()
+
+    click.echo(f"NumPy: {'installed' if numpy is not None else 'not installed'}")
+    click.echo(f"{'Scalar (s)':<12} {scalar_time:>10.4f}")
+    click.echo(f"{'Batch (s)':<12} {batch_time:>10.4f}")
+    click.secho(
+        f"Speedup: {scalar_time / batch_time:.1f}x",
+        fg="green" if batch_time < scalar_time else "red",
+    )
+
+
+commands = [sync_customizations, benchmark_setup, benchmark_paisa_conversion]
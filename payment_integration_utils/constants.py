@@ -3,3 +3,4 @@ BUG_REPORT_URL = (
 )
 
 SECONDS_IN_A_DAY = 86400  # use for to get day's end epoch time
+SECONDS_IN_AN_HOUR = 3600
@@ -7,6 +7,7 @@ app_license = "GNU General Public License (v3)"
 required_apps = ["frappe/erpnext"]
 
 after_install = "payment_integration_utils.install.after_install"
+after_migrate = "payment_integration_utils.setup.after_migrate"
 before_uninstall = "payment_integration_utils.uninstall.before_uninstall"
 
 app_include_js = "payment_integration_utils.bundle.js"
@@ -17,6 +18,7 @@ doctype_js = {
     "Payment Entry": "payment_integration_utils/client_overrides/form/payment_entry.js",
     "Bank Account": "payment_integration_utils/client_overrides/form/bank_account.js",
     "User": "payment_integration_utils/client_overrides/form/user.js",
+    "Integration Request": "payment_integration_utils/client_overrides/form/integration_request.js",
 }
 
 doctype_list_js = {
@@ -28,10 +30,69 @@ doc_events = {
     "Payment Entry": {
         "onload": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.onload",
         "validate": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.validate",
+        "before_submit": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.before_submit",
+        "before_cancel": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.before_cancel",
     },
     "Bank Account": {
         "validate": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.bank_account.validate",
     },
+    "Integration Request": {
+        "onload": "payment_integration_utils.payment_integration_utils.utils.integration_request.expand_payloads",
+    },
+    "Custom Field": {
+        "on_update": "payment_integration_utils.payment_integration_utils.utils.payout_schema.clear_payout_schema",
+        "on_trash": "payment_integration_utils.payment_integration_utils.utils.payout_schema.clear_payout_schema",
+    },
+    "Property Setter": {
+        "on_update": "payment_integration_utils.payment_integration_utils.utils.payout_schema.clear_payout_schema",
+        "on_trash": "payment_integration_utils.payment_integration_utils.utils.payout_schema.clear_payout_schema",
+    },
+    "DocType": {
+        "on_update": "payment_integration_utils.payment_integration_utils.utils.payout_schema.clear_payout_schema",
+    },
+    "Contact": {
+        "on_update": "payment_integration_utils.payment_integration_utils.utils.contact.clear_party_contact_details",
+        "on_trash": "payment_integration_utils.payment_integration_utils.utils.contact.clear_party_contact_details",
+    },
+    "Employee": {
+        "on_update": "payment_integration_utils.payment_integration_utils.utils.contact.clear_party_contact_details",
+        "on_trash": "payment_integration_utils.payment_integration_utils.utils.contact.clear_party_contact_details",
+    },
+    "User": {
+        "on_update": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.clear_payment_permissions",
+        "on_trash": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.clear_payment_permissions",
+    },
+    "Role": {
+        "on_update": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.clear_payment_permissions",
+        "on_trash": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.clear_payment_permissions",
+    },
+    "Role Profile": {
+        "on_update": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.clear_payment_permissions",
+        "on_trash": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.clear_payment_permissions",
+    },
+    "Custom DocPerm": {
+        "on_update": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.clear_payment_permissions",
+        "on_trash": "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.clear_payment_permissions",
+    },
+    "System Settings": {
+        "on_update": "payment_integration_utils.payment_integration_utils.utils.auth.clear_payment_auth_settings",
+    },
+}
+
+clear_cache = [
+    "payment_integration_utils.payment_integration_utils.utils.payout_schema.clear_payout_schema",
+    "payment_integration_utils.payment_integration_utils.utils.transfer_method.clear_transfer_method_limits",
+    "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.clear_payment_permissions",
+    "payment_integration_utils.payment_integration_utils.utils.notification.clear_notification_templates",
+]
+
+scheduler_events = {
+    "all": [
+        "payment_integration_utils.payment_integration_utils.utils.integration_request.flush_integration_requests",
+    ],
+    "daily_long": [
+        "payment_integration_utils.payment_integration_utils.utils.integration_request.archive_integration_requests",
+    ],
 }
 
 before_payment_authentication = "payment_integration_utils.payment_integration_utils.utils.permission.has_payment_permissions"
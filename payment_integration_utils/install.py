@@ -3,6 +3,9 @@ import frappe
 
 from payment_integration_utils.constants import BUG_REPORT_URL
 from payment_integration_utils.hooks import app_title as APP_NAME
+from payment_integration_utils.payment_integration_utils.setup.profiler import (
+    report_setup_profile,
+)
 from payment_integration_utils.setup import setup_customizations
 
 POST_INSTALL_PATCHES = ["update_system_settings"]
@@ -10,8 +13,9 @@ POST_INSTALL_PATCHES = ["update_system_settings"]
 
 def after_install():
     try:
-        setup_customizations()
+        profiler = setup_customizations()
         run_post_install_patches()
+        report_setup_profile(profiler, "Install Profile")
 
     except Exception as e:
         click.secho(
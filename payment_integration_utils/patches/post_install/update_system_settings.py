@@ -1,7 +1,10 @@
 import frappe
 from frappe import get_system_settings
 
-from payment_integration_utils.payment_integration_utils.utils.auth import AUTH_METHOD
+from payment_integration_utils.payment_integration_utils.utils.auth import (
+    AUTH_METHOD,
+    clear_payment_auth_settings,
+)
 
 
 def execute():
@@ -19,3 +22,5 @@ def execute():
     # set default values
     frappe.db.set_default("payment_authentication_method", AUTH_METHOD.OTP_APP.value)
     frappe.db.set_default("payment_otp_issuer_name", otp_issuer)
+
+    clear_payment_auth_settings()
@@ -0,0 +1,16 @@
+// Copyright (c) 2025, Resilient Tech and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on("Integration Request", {
+	refresh: function (frm) {
+		// stored payloads are compact (maybe compressed), show the expanded ones
+		const payloads = frm.doc.__onload?.payloads || {};
+
+		Object.entries(payloads).forEach(([fieldname, payload]) => {
+			const field = frm.get_field(fieldname);
+			if (!field?.disp_area) return;
+
+			$(field.disp_area).html(`<pre>${frappe.utils.escape_html(payload)}</pre>`);
+		});
+	},
+});
@@ -41,6 +41,60 @@ frappe.listview_settings["Payment Entry"] = {
 
 			show_confirm_dialog(list_view, marked_docs, unmarked_docs, ineligible_docs);
 		});
+
+		// Selection is resolved on the server (for large lists)
+		list_view.page.add_actions_menu_item(__("Pay and Submit All Matching Filters"), () => {
+			const selection = {
+				filters: list_view.get_filters_for_args(),
+				exclude: [],
+			};
+
+			frappe.confirm(
+				__(
+					"Pay and Submit all eligible Payment Entries marked for online payment matching the current filters?"
+				),
+				() => {
+					selection.filters.push(["Payment Entry", "make_bank_online_payment", "=", 1]);
+
+					list_view.disable_list_update = true;
+
+					payment_integration_utils.authenticate_payment_entries(selection, (auth_id) => {
+						pay_and_submit(auth_id, null);
+
+						list_view.disable_list_update = false;
+						list_view.clear_checked_items();
+						list_view.refresh();
+					});
+				}
+			);
+		});
+
+		list_view.page.add_actions_menu_item(__("Cancel Online Payments"), () => {
+			const docnames = list_view
+				.get_checked_items()
+				.filter((doc) => doc.docstatus === 1 && doc.make_bank_online_payment)
+				.map((doc) => doc.name);
+
+			if (!docnames.length) {
+				frappe.msgprint(
+					__("Please select submitted payment entries marked for online payment."),
+					__("Invalid Selection")
+				);
+				return;
+			}
+
+			frappe.confirm(__("Cancel {0} Payment Entries?", [docnames.length]), () => {
+				list_view.disable_list_update = true;
+
+				payment_integration_utils.authenticate_payment_entries(docnames, (auth_id) => {
+					bulk_cancel(auth_id, docnames);
+
+					list_view.disable_list_update = false;
+					list_view.clear_checked_items();
+					list_view.refresh();
+				});
+			});
+		});
 	},
 };
 
@@ -92,6 +146,15 @@ function show_confirm_dialog(list_view, marked_docs, unmarked_docs, ineligible_d
 								${__("If unchecked, above docs will be skipped!")}
 							</p>`,
 			},
+			{
+				fieldname: "assign_transfer_method",
+				label: __("Assign optimal transfer method"),
+				fieldtype: "Check",
+				default: 0,
+				description: __(
+					"Change the transfer method of entries which will fail due to amount limits or missing bank details."
+				),
+			},
 			{
 				fieldname: "ineligible_doc_html",
 				fieldtype: "HTML",
@@ -120,7 +183,12 @@ function show_confirm_dialog(list_view, marked_docs, unmarked_docs, ineligible_d
 
 			payment_integration_utils.authenticate_payment_entries(docnames, (auth_id) => {
 				// Reference: https://github.com/frappe/frappe/blob/3eda272bd61b1e73b74d30b1704d885a39c75d0c/frappe/public/js/frappe/list/list_view.js#L1983
-				pay_and_submit(auth_id, docnames, values.mark_online_payment);
+				pay_and_submit(
+					auth_id,
+					docnames,
+					values.mark_online_payment,
+					values.assign_transfer_method
+				);
 
 				list_view.disable_list_update = false;
 				list_view.clear_checked_items();
@@ -154,15 +222,24 @@ function get_ineligible_docs_html(docs, summary, open = true) {
 }
 
 // #### API Call #### //
-function pay_and_submit(auth_id, docnames, mark_online_payment = false, callback = null) {
+function pay_and_submit(
+	auth_id,
+	docnames,
+	mark_online_payment = false,
+	assign_transfer_method = false,
+	callback = null
+) {
 	// Reference: https://github.com/frappe/frappe/blob/3eda272bd61b1e73b74d30b1704d885a39c75d0c/frappe/public/js/frappe/list/bulk_operations.js#L275
-	if (!docnames.length) return;
+	// no docnames: Payment Entries frozen with the auth session
+	if (docnames && !docnames.length) return;
 
 	const task_id = Math.random().toString(36).slice(-5);
 	frappe.realtime.task_subscribe(task_id);
 
 	frappe.show_alert({
-		message: __("Pay and Submitting {0} Payment Entry...", [docnames.length]),
+		message: docnames
+			? __("Pay and Submitting {0} Payment Entry...", [docnames.length])
+			: __("Pay and Submitting selected Payment Entries..."),
 		indicator: "blue",
 	});
 
@@ -174,9 +251,34 @@ function pay_and_submit(auth_id, docnames, mark_online_payment = false, callback
 				docnames: docnames,
 				mark_online_payment: mark_online_payment,
 				task_id: task_id,
+				assign_transfer_method: assign_transfer_method,
+				return_details: 1,
 			}
 		)
-		.then((failed_docnames) => {
+		.then((result) => {
+			// no result if enqueued in background
+			const { failed: failed_docnames, locked, reassigned } = result || {};
+
+			if (reassigned && Object.keys(reassigned).length) {
+				frappe.show_alert({
+					message: __("Transfer method changed for {0}", [
+						Object.entries(reassigned)
+							.map(([docname, method]) => `${docname} (${method})`)
+							.join(", "),
+					]),
+					indicator: "orange",
+				});
+			}
+
+			if (locked?.length) {
+				frappe.show_alert({
+					message: __("Skipped {0} as being paid in another process", [
+						frappe.utils.comma_and(locked),
+					]),
+					indicator: "orange",
+				});
+			}
+
 			if (failed_docnames?.length) {
 				const comma_separated_records = frappe.utils.comma_and(failed_docnames);
 				frappe.throw(__("Cannot pay and submit {0}.", [comma_separated_records]));
@@ -189,3 +291,48 @@ function pay_and_submit(auth_id, docnames, mark_online_payment = false, callback
 			frappe.realtime.task_unsubscribe(task_id);
 		});
 }
+
+function bulk_cancel(auth_id, docnames, callback) {
+	const task_id = Math.random().toString(36).slice(-5);
+	frappe.realtime.task_subscribe(task_id);
+
+	frappe.show_alert({
+		message: __("Cancelling {0} Payment Entry...", [docnames.length]),
+		indicator: "blue",
+	});
+
+	return frappe
+		.xcall(
+			"payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry.bulk_cancel",
+			{
+				auth_id: auth_id,
+				docnames: docnames,
+				task_id: task_id,
+			}
+		)
+		.then((result) => {
+			// no result if enqueued in background
+			const { failed: failed_docnames, locked } = result || {};
+
+			if (locked?.length) {
+				frappe.show_alert({
+					message: __(
+						"Skipped cancelling {0} as being processed in another process",
+						[frappe.utils.comma_and(locked)]
+					),
+					indicator: "orange",
+				});
+			}
+
+			if (failed_docnames?.length) {
+				const comma_separated_records = frappe.utils.comma_and(failed_docnames);
+				frappe.throw(__("Cannot cancel {0}.", [comma_separated_records]));
+			}
+
+			frappe.utils.play_sound("cancel");
+			callback && callback();
+		})
+		.finally(() => {
+			frappe.realtime.task_unsubscribe(task_id);
+		});
+}
@@ -175,6 +175,19 @@ CUSTOM_FIELDS = {
             "no_copy": 1,
             "permlevel": PERMISSION_LEVEL.SEVEN.value,
         },
+        {
+            "fieldname": "payout_fingerprint",
+            "label": "Payout Fingerprint",
+            "fieldtype": "Data",
+            "insert_after": "integration_docname",
+            "description": "Hash of the payout details at the time of payment",
+            "print_hide": 1,
+            "read_only": 1,
+            "hidden": 1,
+            "no_copy": 1,
+            "search_index": 1,
+            "permlevel": PERMISSION_LEVEL.SEVEN.value,
+        },
     ],
     "System Settings": [
         {
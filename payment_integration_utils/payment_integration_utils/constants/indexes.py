@@ -0,0 +1,16 @@
+"""
+Composite indexes on the custom fields, used by list views, permission checks and payouts.
+
+Note:
+    - Index name is generated from the columns (see `setup.get_index_name`).
+    - Columns must exist (create after custom fields).
+"""
+
+INDEXES = {
+    "Payment Entry": [
+        # permission checks and Payment Entries of an integration
+        ("integration_doctype", "integration_docname", "docstatus"),
+        # list view filters and bulk payouts
+        ("make_bank_online_payment", "payment_transfer_method", "docstatus"),
+    ],
+}
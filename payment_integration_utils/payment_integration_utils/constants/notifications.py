@@ -0,0 +1,57 @@
+"""
+Notification templates (Jinja) for payment authentication and payouts.
+
+Templates are compiled once per site in a process. Integration apps can add or override templates
+with `payment_notification_templates` hook.
+
+Note:
+    - Template can be a source string or per-locale variants: `{"default": source, "hi": source}`
+    - `_` is available in templates for translation. Keep the full message (with HTML) in one `_()`,
+      so the existing translations match.
+"""
+
+from payment_integration_utils.payment_integration_utils.constants.enums import BaseEnum
+
+
+class NOTIFICATION_TEMPLATE(BaseEnum):
+    OTP_CODE = "otp_code"
+    OTP_REGISTRATION = "otp_registration"
+    OTP_SECRET_RESET = "otp_secret_reset"
+    PAYOUT_SUMMARY = "payout_summary"
+
+
+DEFAULT_LOCALE = "default"
+
+NOTIFICATION_TEMPLATES = {
+    NOTIFICATION_TEMPLATE.OTP_CODE.value: """
+        <p>{{ _("Enter the verification code below to authenticate the payment of <strong>{0}</strong>").format(paid_amount) }}</p>
+        <br>
+        <p style="text-align: center;">
+        <strong style="font-size: 20px;">{{ otp }}</strong></p>
+        <br>
+        <p>{{ _("<strong>Payment Entries to Authenticate: </strong>{0}").format(payment_entries) }}</p>
+        <br>
+        <p>{{ _("<strong>Note:</strong> This code expires in {0} minutes.").format(expires_in) }}</p>
+    """,
+    NOTIFICATION_TEMPLATE.OTP_REGISTRATION.value: """
+        {{ _("Please click on the link below and follow the instructions on the page.<br><br><a href='{0}'>{0}</a>").format(qrcode_link) }}
+    """,
+    NOTIFICATION_TEMPLATE.OTP_SECRET_RESET.value: """
+        {{ _("<p>Your payment OTP secret on <strong>{0}</strong> used for authorizing <strong>Bank Payments</strong> has been reset! <br><br> If you did not perform this reset and did not request it, please contact your <strong>System Administrator</strong> immediately!!</p>").format(otp_issuer) }}
+    """,
+    NOTIFICATION_TEMPLATE.PAYOUT_SUMMARY.value: """
+        <p>{{ _("Payout summary of {0} Payment Entries").format(total) }}</p>
+        <br>
+        <table class="table table-bordered">
+            <tr><td>{{ _("Paid") }}</td><td>{{ paid | length }}</td><td>{{ paid_amount }}</td></tr>
+            <tr><td>{{ _("Failed") }}</td><td>{{ failed | length }}</td><td></td></tr>
+        </table>
+        {% if failed %}
+        <br>
+        <p>{{ _("<strong>Failed Payment Entries:</strong>") }}</p>
+        <ul>
+            {% for docname in failed %}<li>{{ docname }}</li>{% endfor %}
+        </ul>
+        {% endif %}
+    """,
+}
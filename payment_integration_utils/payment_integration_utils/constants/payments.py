@@ -16,3 +16,43 @@ BANK_METHODS = [
 ]
 
 BANK_ACCOUNT_REQD_METHODS = [*BANK_METHODS, TRANSFER_METHOD.UPI.value]
+
+# Order of preference of bank methods for automatic assignment (fastest first)
+PREFERRED_BANK_METHODS = [
+    TRANSFER_METHOD.IMPS.value,
+    TRANSFER_METHOD.RTGS.value,
+    TRANSFER_METHOD.NEFT.value,
+]
+
+# Amount limits (in INR) and optional availability hours `[from_hour, to_hour)` of the transfer methods
+# Note: Integration apps can override with `payment_transfer_method_rules` hook
+TRANSFER_METHOD_RULES = [
+    {"method": TRANSFER_METHOD.IMPS.value, "max_amount": 5_00_000},
+    {"method": TRANSFER_METHOD.RTGS.value, "min_amount": 2_00_000},
+]
+
+# Payment Entry fields which can't be changed once payout is made
+PAYOUT_FIELDS = [
+    # Common
+    "payment_type",
+    "bank_account",
+    # Party
+    "party",
+    "party_type",
+    "party_name",
+    "party_bank_account",
+    "party_bank_account_no",
+    "party_bank_ifsc",
+    "party_upi_id",
+    "contact_person",
+    "contact_mobile",
+    "contact_email",
+    # Integration
+    "integration_doctype",
+    "integration_docname",
+    # Payment
+    "paid_amount",
+    "make_bank_online_payment",
+    "payment_transfer_method",
+    "reference_no",
+]
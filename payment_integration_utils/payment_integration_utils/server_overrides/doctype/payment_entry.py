@@ -1,8 +1,10 @@
+import time
+from abc import ABC, abstractmethod
+
 import frappe
 from erpnext.accounts.doctype.payment_entry.payment_entry import PaymentEntry
 from frappe import _
-from frappe.core.doctype.submission_queue.submission_queue import queue_submission
-from frappe.utils import fmt_money, get_link_to_form
+from frappe.utils import get_link_to_form
 from frappe.utils.scheduler import is_scheduler_inactive
 
 from payment_integration_utils.payment_integration_utils.constants.payments import (
@@ -11,27 +13,125 @@ from payment_integration_utils.payment_integration_utils.constants.payments impo
 from payment_integration_utils.payment_integration_utils.constants.payments import (
     TRANSFER_METHOD as PAYMENT_METHOD,
 )
-from payment_integration_utils.payment_integration_utils.utils import is_already_paid
+from payment_integration_utils.payment_integration_utils.utils import (
+    is_already_paid,
+    is_already_paid_many,
+)
+from payment_integration_utils.payment_integration_utils.utils.auth import (
+    Authenticate2FA,
+)
 from payment_integration_utils.payment_integration_utils.utils.auth import (
     run_before_payment_authentication as has_payment_permissions,
 )
+from payment_integration_utils.payment_integration_utils.utils.cache import (
+    bump_cache_version,
+    get_cache_version,
+)
+from payment_integration_utils.payment_integration_utils.utils.contact import (
+    get_party_contact_details,
+    normalize_mobile_no,
+    prefetch_party_contact_details,
+)
+from payment_integration_utils.payment_integration_utils.utils.payout_lock import (
+    LOCK_RENEW_INTERVAL,
+    acquire_payout_locks,
+    lock_payment_entry,
+    release_payout_locks,
+    release_payout_locks_on_completion,
+    renew_payout_locks,
+)
+from payment_integration_utils.payment_integration_utils.utils.payout_schema import (
+    get_payout_schema,
+)
+from payment_integration_utils.payment_integration_utils.utils.payout_selection import (
+    get_chunks,
+)
+from payment_integration_utils.payment_integration_utils.utils.submission_queue import (
+    queue_submissions,
+)
+from payment_integration_utils.payment_integration_utils.utils.transfer_method import (
+    assign_transfer_methods,
+    validate_transfer_method_limit,
+)
 from payment_integration_utils.payment_integration_utils.utils.validation import (
     validate_ifsc_code,
 )
 
+PAYMENT_PERMISSION_CACHE_TTL = 300  # seconds
+PAYMENT_PERMISSION_VERSION = "payment_permission"
+BULK_JOB_TIMEOUT = 1000  # seconds
+
 
 #### DOC EVENTS ####
 def onload(doc: PaymentEntry, method=None):
-    doc.set_onload("is_already_paid", is_already_paid(doc.amended_from))
+    for key, value in get_onload_payload(doc).items():
+        doc.set_onload(key, value)
 
-    doc.set_onload(
-        "payment_integration_fields", frappe.get_hooks("payment_integration_fields")
-    )
 
-    doc.set_onload(
-        "has_payment_permission", has_payment_permissions(doc.name, throw=False)
+### ONLOAD HELPERS ###
+def get_onload_payload(doc: PaymentEntry) -> dict:
+    """
+    Get all the payment integration data to be set in Payment Entry's onload.
+
+    - `is_already_paid`: memoized per request.
+    - `payment_integration_fields`: from compiled payout schema (no query).
+    - `has_payment_permission`: cached per user and document's modified timestamp.
+    """
+    return {
+        "is_already_paid": is_already_paid(doc.amended_from),
+        "payment_integration_fields": list(get_payout_schema().hooked_fields),
+        "has_payment_permission": get_payment_permission(doc),
+    }
+
+
+def get_payment_permission(doc: PaymentEntry) -> bool:
+    """
+    Run `before_payment_authentication` hooks for the Payment Entry.
+
+    Result is cached per (user, Payment Entry, modified) for `PAYMENT_PERMISSION_CACHE_TTL`.
+
+    Cache is invalidated on roles and permissions changes (version key) and
+    Integration Setting changes (its `modified` is part of the key).
+    """
+    key = frappe.cache.make_key(
+        f"payment_permission:{get_cache_version(PAYMENT_PERMISSION_VERSION)}:"
+        f"{frappe.session.user}:{doc.name}:{doc.modified}:{get_integration_modified(doc)}"
     )
 
+    if (permission := frappe.cache.get(key)) is not None:
+        return permission == b"1"
+
+    permission = bool(has_payment_permissions(doc.name, throw=False))
+    frappe.cache.set(key, int(permission), PAYMENT_PERMISSION_CACHE_TTL)
+
+    return permission
+
+
+def get_integration_modified(doc: PaymentEntry) -> str | None:
+    """
+    Get last modified timestamp of the Integration Setting (from document cache).
+    """
+    if not doc.integration_doctype or not doc.integration_docname:
+        return
+
+    try:
+        return str(
+            frappe.get_cached_value(
+                doc.integration_doctype, doc.integration_docname, "modified"
+            )
+        )
+    except frappe.DoesNotExistError:
+        return
+
+
+def clear_payment_permissions(doc=None, method=None):
+    """
+    Invalidate cached payment permissions of all the users.
+
+    Note: Called on roles and permissions changes and `clear_cache`.
+    """
+    bump_cache_version(PAYMENT_PERMISSION_VERSION)
+
 
 def validate(doc: PaymentEntry, method=None):
     validate_if_already_paid(doc)
@@ -60,60 +160,56 @@ def validate(doc: PaymentEntry, method=None):
     validate_transfer_methods(doc, method)
 
 
+def before_submit(doc: PaymentEntry, method=None):
+    if doc.make_bank_online_payment:
+        # no concurrent payouts of the same Payment Entry
+        lock_payment_entry(doc)
+        doc.payout_fingerprint = get_payout_schema().fingerprint(doc)
+
+
+def before_cancel(doc: PaymentEntry, method=None):
+    if doc.make_bank_online_payment:
+        # not while the payout is in progress
+        lock_payment_entry(doc)
+
+
 ### VALIDATION HELPERS ###
 def validate_if_already_paid(doc: PaymentEntry):
-    if not doc.amended_from:
+    if not is_already_paid(doc.amended_from):
         return
 
-    payout_fields = [
-        # Common
-        "payment_type",
-        "bank_account",
-        # Party
-        "party",
-        "party_type",
-        "party_name",
-        "party_bank_account",
-        "party_bank_account_no",
-        "party_bank_ifsc",
-        "party_upi_id",
-        "contact_person",
-        "contact_mobile",
-        "contact_email",
-        # Integration
-        "integration_doctype",
-        "integration_docname",
-        # Payment
-        "paid_amount",
-        "make_bank_online_payment",
-        "payment_transfer_method",
-        "reference_no",
-        *frappe.get_hooks("payment_integration_fields"),
-    ]
+    schema = get_payout_schema()
+
+    # fingerprint is set on submit with online payment; diff only to know which field is changed
+    if frappe.db.exists(
+        "Payment Entry",
+        {"name": doc.amended_from, "payout_fingerprint": schema.fingerprint(doc)},
+    ):
+        doc.flags._is_already_paid = True
+        return
 
     original_doc = frappe.db.get_value(
         "Payment Entry",
         doc.amended_from,
-        payout_fields,
+        list(schema.fields),
         as_dict=True,
     )
 
     if not original_doc or not original_doc.make_bank_online_payment:
         return
 
-    for field in payout_fields:
-        if doc.get(field) != original_doc.get(field):
-            msg = _("Field <strong>{0}</strong> cannot be changed.<br><br>").format(
-                doc.meta.get_label(field)
-            )
-            msg += _(
-                "The source Payment Entry <strong>{0}</strong> is already processed via online payment integration.<br>"
-            ).format(get_link_to_form("Payment Entry", doc.amended_from))
+    if changed_fields := schema.get_changed_fields(doc, original_doc):
+        msg = _("Field <strong>{0}</strong> cannot be changed.<br><br>").format(
+            schema.labels[changed_fields[0]]
+        )
+        msg += _(
+            "The source Payment Entry <strong>{0}</strong> is already processed via online payment integration.<br>"
+        ).format(get_link_to_form("Payment Entry", doc.amended_from))
 
-            frappe.throw(
-                title=_("Payment Details Cannot Be Changed"),
-                msg=msg,
-            )
+        frappe.throw(
+            title=_("Payment Details Cannot Be Changed"),
+            msg=msg,
+        )
 
     # used in next actions and validations
     doc.flags._is_already_paid = True
@@ -142,29 +238,9 @@ def validate_bank_payment_method(doc: PaymentEntry):
 
     validate_ifsc_code(doc.party_bank_ifsc, throw=True)
 
-    if (
-        doc.payment_transfer_method == PAYMENT_METHOD.IMPS.value
-        and doc.paid_amount > 5_00_000
-    ):
-        frappe.throw(
-            msg=_(
-                "<strong>IMPS</strong> transfer limit is {0}. Please use <strong>RTGS/NEFT</strong> for higher amount."
-            ).format(fmt_money(5_00_000, currency="INR")),
-            title=_("Payment Limit Exceeded"),
-            exc=frappe.ValidationError,
-        )
-
-    if (
-        doc.payment_transfer_method == PAYMENT_METHOD.RTGS.value
-        and doc.paid_amount < 2_00_000
-    ):
-        frappe.throw(
-            msg=_(
-                "<strong>RTGS</strong> transfer minimum amount is {0}. Please use <strong>NEFT/IMPS</strong> for lower amount."
-            ).format(fmt_money(2_00_000, currency="INR")),
-            title=_("Insufficient Payment Amount"),
-            exc=frappe.ValidationError,
-        )
+    validate_transfer_method_limit(
+        doc.payment_transfer_method, doc.paid_amount, doc.integration_doctype
+    )
 
 
 def validate_upi_payment_method(doc: PaymentEntry):
@@ -192,10 +268,25 @@ def validate_link_payment_method(doc: PaymentEntry):
             exc=frappe.MandatoryError,
         )
 
-    # get contact details of party
-    contact_details = get_party_contact_details(doc)
-    party_mobile = contact_details["contact_mobile"]
-    party_email = contact_details["contact_email"]
+    # get contact details of party (cached)
+    contact_details = (
+        get_party_contact_details(doc.party_type, doc.party, doc.contact_person) or {}
+    )
+
+    # cache misses updates without doc hooks, so details are read fresh before
+    # persisting them or failing on mismatch
+    if (not doc.contact_email and not doc.contact_mobile) or not match_contact_details(
+        doc, contact_details
+    ):
+        contact_details = (
+            get_party_contact_details(
+                doc.party_type, doc.party, doc.contact_person, cached=False
+            )
+            or {}
+        )
+
+    party_mobile = contact_details.get("contact_mobile")
+    party_email = contact_details.get("contact_email")
 
     if (
         not doc.contact_email
@@ -219,7 +310,9 @@ def validate_link_payment_method(doc: PaymentEntry):
             exc=frappe.MandatoryError,
         )
 
-    if doc.contact_mobile and doc.contact_mobile != party_mobile:
+    if doc.contact_mobile and normalize_mobile_no(
+        doc.contact_mobile
+    ) != normalize_mobile_no(party_mobile):
         frappe.throw(
             msg=_("Mobile Number does not match with Party's Mobile Number"),
             title=_("Invalid Mobile Number"),
@@ -232,26 +325,17 @@ def validate_link_payment_method(doc: PaymentEntry):
         )
 
 
-def get_party_contact_details(doc: PaymentEntry) -> dict | None:
+def match_contact_details(doc: PaymentEntry, contact_details: dict) -> bool:
     """
-    Get Party's contact details as Payment Entry's contact fields.
-
-    - Mobile Number
-    - Email ID
+    Check Payment Entry's contact details match with the party's contact details.
     """
-    if doc.party_type == "Employee":
-        return frappe.get_value(
-            "Employee",
-            doc.party,
-            ["cell_number as contact_mobile", "prefered_email as contact_email"],
-            as_dict=True,
-        )
+    if doc.contact_mobile and normalize_mobile_no(
+        doc.contact_mobile
+    ) != normalize_mobile_no(contact_details.get("contact_mobile")):
+        return False
 
-    return frappe.get_value(
-        "Contact",
-        doc.contact_person,
-        ["mobile_no as contact_mobile", "email_id as contact_email"],
-        as_dict=True,
+    return not doc.contact_email or doc.contact_email == contact_details.get(
+        "contact_email"
     )
 
 
@@ -259,17 +343,22 @@ def get_party_contact_details(doc: PaymentEntry) -> dict | None:
 @frappe.whitelist()
 def bulk_pay_and_submit(
     auth_id: str,
-    docnames: list[str] | str,
+    docnames: list[str] | str | None = None,
     mark_online_payment: bool | None = False,
     task_id: str | None = None,
+    assign_transfer_method: bool | None = False,
+    return_details: bool | None = False,
 ):
     """
     Bulk pay and submit Payment Entries.
 
     :param auth_id: Authentication ID (after otp or password verification)
-    :param docnames: List of Payment Entry to pay and submit
+    :param docnames: List of Payment Entry to pay and submit. If not given, Payment Entries frozen with the auth session are used.
     :param mark_online_payment: Check `make_bank_online_payment` field
     :param task_id: Task ID (realtime or background)
+    :param assign_transfer_method: Change the transfer methods which will fail in validation
+    :param return_details: Return `{"failed", "locked", "reassigned", "run_id"}` instead of failed Payment Entries
+        (only `{"run_id"}` if enqueued in background)
 
     ---
     Reference: [Frappe Bulk Submit/Cancel](https://github.com/frappe/frappe/blob/3eda272bd61b1e73b74d30b1704d885a39c75d0c/frappe/desk/doctype/bulk_update/bulk_update.py#L51)
@@ -278,83 +367,518 @@ def bulk_pay_and_submit(
     if isinstance(docnames, str):
         docnames = frappe.parse_json(docnames)
 
+    if not docnames:
+        result = bulk_pay_and_submit_selection(
+            auth_id, mark_online_payment, task_id, assign_transfer_method
+        )
+
+    else:
+        has_payment_permissions(docnames, throw=True)
+
+        result = run_bulk_action(
+            _bulk_pay_and_submit,
+            auth_id=auth_id,
+            docnames=docnames,
+            mark_online_payment=mark_online_payment,
+            task_id=task_id,
+            assign_transfer_method=assign_transfer_method,
+        )
+
+    if return_details:
+        return result
+
+    # failed Payment Entries (if not enqueued) for backward compatibility
+    return result and result.get("failed")
+
+
+@frappe.whitelist()
+def bulk_cancel(
+    auth_id: str,
+    docnames: list[str] | str,
+    task_id: str | None = None,
+):
+    """
+    Bulk cancel Payment Entries (Eg. after rejection by the bank).
+
+    Payment Entries must be authenticated with the auth session of the current user,
+    so integrations can act on the payouts (Eg. cancel queued payouts) as in payment.
+
+    :param auth_id: Authentication ID (after otp or password verification)
+    :param docnames: List of Payment Entry to cancel
+    :param task_id: Task ID (realtime or background)
+    :return: Failed and locked Payment Entries `{"failed": [], "locked": []}` or `{"run_id"}` if enqueued in background
+
+    ---
+    Note: Like bulk pay and submit, 20 or more Payment Entries are cancelled in background (see `run_bulk_action`).
+    Only Payment Entries paid online (`make_bank_online_payment`) can be cancelled.
+    """
+    if isinstance(docnames, str):
+        docnames = frappe.parse_json(docnames)
+
+    if not docnames:
+        frappe.throw(_("Please select Payment Entries to cancel."))
+
+    frappe.has_permission("Payment Entry", "cancel", throw=True)
+    Authenticate2FA.validate_session(auth_id, docnames)
     has_payment_permissions(docnames, throw=True)
 
+    return run_bulk_action(
+        _bulk_cancel,
+        auth_id=auth_id,
+        docnames=docnames,
+        task_id=task_id,
+    )
+
+
+def run_bulk_action(method, docnames: list[str], **kwargs) -> dict:
+    """
+    Run the bulk action now (for a few documents) or in background.
+
+    In background, actions queued in Submission Queue are tracked under a run ID
+    (see `get_submission_run_status`).
+
+    :param method: Bulk action function (called with `docnames` and `kwargs`).
+    :return: Result of the bulk action or `{"run_id"}` if enqueued.
+    """
     if len(docnames) < 20:
+        return method(docnames=docnames, **kwargs)
+
+    if len(docnames) > 500:
+        frappe.throw(
+            _("Bulk operations only support up to 500 documents."),
+            title=_("Too Many Documents"),
+        )
+
+    frappe.msgprint(_("Bulk operation is enqueued in background."), alert=True)
+
+    run_id = frappe.generate_hash(length=10)
+    frappe.enqueue(
+        method,
+        docnames=docnames,
+        **kwargs,
+        run_id=run_id,
+        queue="short",
+        timeout=BULK_JOB_TIMEOUT,
+    )
+
+    return {"run_id": run_id}
+
+
+def bulk_pay_and_submit_selection(
+    auth_id: str,
+    mark_online_payment: bool | None = False,
+    task_id: str | None = None,
+    assign_transfer_method: bool | None = False,
+):
+    """
+    Pay and submit the Payment Entries frozen with the auth session.
+
+    Large selections are processed in background, one job per chunk of `SELECTION_CHUNK_SIZE`.
+    Jobs read their chunk from the auth session, so the names are never passed around.
+    """
+    total = Authenticate2FA.get_payment_entries_count(auth_id)
+
+    if not total:
+        frappe.throw(
+            msg=_("Authentication session expired. Please authenticate again."),
+            title=_("Session Expired"),
+        )
+
+    docnames = Authenticate2FA.get_payment_entries(auth_id)
+    has_payment_permissions(docnames, throw=True)
+
+    if total < 20:
         return _bulk_pay_and_submit(
             auth_id,
             docnames,
             mark_online_payment,
             task_id,
+            assign_transfer_method,
         )
-    elif len(docnames) <= 500:
-        frappe.msgprint(_("Bulk operation is enqueued in background."), alert=True)
+
+    frappe.msgprint(_("Bulk operation is enqueued in background."), alert=True)
+
+    # submissions queued by all the chunks are tracked as one run
+    run_id = frappe.generate_hash(length=10)
+    chunks = get_chunks(total)
+
+    # session must outlive the chunk jobs (worst case: run one after another)
+    Authenticate2FA.extend_session(auth_id, len(chunks) * BULK_JOB_TIMEOUT)
+
+    for start, end in chunks:
         frappe.enqueue(
             _bulk_pay_and_submit,
             auth_id=auth_id,
-            docnames=docnames,
             mark_online_payment=mark_online_payment,
             task_id=task_id,
+            assign_transfer_method=assign_transfer_method,
+            start=start,
+            end=end,
+            total=total,
+            run_id=run_id,
             queue="short",
-            timeout=1000,
-        )
-    else:
-        frappe.throw(
-            _("Bulk operations only support up to 500 documents."),
-            title=_("Too Many Documents"),
+            timeout=BULK_JOB_TIMEOUT,
         )
 
+    return {"run_id": run_id}
+
 
 def _bulk_pay_and_submit(
     auth_id: str,
-    docnames: list[str],
+    docnames: list[str] | None = None,
     mark_online_payment: bool | None = False,
     task_id: str | None = None,
+    assign_transfer_method: bool | None = False,
+    start: int = 0,
+    end: int = -1,
+    total: int | None = None,
+    run_id: str | None = None,
 ):
     """
     Bulk pay and submit Payment Entries.
 
     :param auth_id: Authentication ID (after otp or password verification)
-    :param docnames: List of Payment Entry to pay and submit
+    :param docnames: List of Payment Entry to pay and submit. If not given, chunk of the auth session is used.
     :param mark_online_payment: Check `make_bank_online_payment` field
     :param task_id: Task ID (realtime or background)
+    :param assign_transfer_method: Change the transfer methods which will fail in validation
+    :param start: Index of the first Payment Entry of the chunk (in auth session)
+    :param end: Index of the last Payment Entry of the chunk (inclusive)
+    :param total: Total Payment Entries in all the chunks (for progress)
+    :param run_id: ID to track submissions queued in background (see `get_submission_run_status`)
+
+    :return: Failed, locked (being paid by another process) Payment Entries, changed transfer methods
+        and run ID of queued submissions `{"failed": [], "locked": [], "reassigned": {}, "run_id": None}`
+    """
+    if docnames is None:
+        docnames = Authenticate2FA.get_payment_entries(auth_id, start, end)
+
+        if not docnames:
+            # never report an expired session as a successful payout
+            frappe.throw(
+                msg=_("Authentication session expired. Please authenticate again."),
+                title=_("Session Expired"),
+                exc=frappe.AuthenticationError,
+            )
+
+    return BulkPayAndSubmit(
+        auth_id,
+        docnames,
+        task_id=task_id,
+        start=start,
+        total=total,
+        run_id=run_id,
+        mark_online_payment=mark_online_payment,
+        assign_transfer_method=assign_transfer_method,
+    ).run()
+
+
+def _bulk_cancel(
+    auth_id: str,
+    docnames: list[str],
+    task_id: str | None = None,
+    run_id: str | None = None,
+):
+    """
+    Bulk cancel Payment Entries.
+
+    :param run_id: ID to queue the cancellations in background (see `get_submission_run_status`)
+    :return: Failed and locked (being processed by another process) Payment Entries
+        and run ID of queued cancellations `{"failed": [], "locked": [], "run_id": None}`
+    """
+    return BulkCancel(auth_id, docnames, task_id=task_id, run_id=run_id).run()
+
+
+### BULK ACTIONS ###
+class BulkAction(ABC):
+    """
+    Base for bulk actions on Payment Entries.
+
+    - Payment Entries are locked (see `payout_lock`) in one call, locked by others are skipped.
+    - Locks of the pending Payment Entries are renewed periodically (lost locks are skipped).
+    - Data for validations is loaded in bulk.
+    - Each Payment Entry is committed (or rolled back) separately, and its lock is released with it.
+    - If `queue_in_background`, Payment Entries are queued in Submission Queue in one batch
+      under the run ID (shared by all the chunks of a run).
 
     ---
     Reference: [Frappe Bulk Action](https://github.com/frappe/frappe/blob/3eda272bd61b1e73b74d30b1704d885a39c75d0c/frappe/desk/doctype/bulk_update/bulk_update.py#L73)
     """
-    failed = []
 
-    num_documents = len(docnames)
+    # action of Submission Queue (`submit` or `cancel`)
+    action = None
+
+    def __init__(
+        self,
+        auth_id: str,
+        docnames: list[str],
+        task_id: str | None = None,
+        start: int = 0,
+        total: int | None = None,
+        run_id: str | None = None,
+    ):
+        """
+        :param auth_id: Authentication ID (after otp or password verification)
+        :param docnames: List of Payment Entry to process
+        :param task_id: Task ID (realtime or background)
+        :param start: Index of the first Payment Entry of the chunk (for progress)
+        :param total: Total Payment Entries in all the chunks (for progress)
+        :param run_id: ID to track submissions queued in background
+        """
+        self.auth_id = auth_id
+        self.docnames = docnames
+        self.task_id = task_id
+        self.start = start
+        self.num_documents = total or len(docnames)
+        self.run_id = run_id
+        self.queue_in_background = False
+
+        self.failed = []
+        self.locked = []
+        self.queued = []
+
+    def run(self) -> dict:
+        # lock the chunk before reading, so status checks do not race
+        lock_owner = frappe.generate_hash(length=12)
+        fencing_tokens = acquire_payout_locks(self.docnames, lock_owner)
+
+        self.locked = [name for name in self.docnames if name not in fencing_tokens]
+        docnames = [name for name in self.docnames if name in fencing_tokens]
 
-    for idx, docname in enumerate(docnames, 1):
-        doc = frappe.get_doc("Payment Entry", docname)
-        doc.set_onload("auth_id", auth_id)
+        try:
+            self.process(docnames, fencing_tokens, lock_owner)
 
-        if mark_online_payment:
-            doc.make_bank_online_payment = 1
+        finally:
+            # locks of the entries not processed (eg. on error)
+            release_payout_locks(list(fencing_tokens), lock_owner)
 
-        try:
-            message = ""
-            if doc.docstatus.is_draft():
-                if doc.meta.queue_in_background and not is_scheduler_inactive():
-                    queue_submission(doc, "submit")
-                    message = _("Queuing {0} for Submission").format("Payment Entry")
+        return self.get_result()
+
+    def process(
+        self, docnames: list[str], fencing_tokens: dict[str, int], lock_owner: str
+    ):
+        self.prefetch(docnames)
+        start = self.start + len(self.locked)
+        renewed_at = time.monotonic()
+        lost = set()
+
+        for idx, docname in enumerate(docnames, 1):
+            if time.monotonic() - renewed_at >= LOCK_RENEW_INTERVAL:
+                # locks of the pending entries
+                lost.update(renew_payout_locks(docnames[idx - 1 :], lock_owner))
+                renewed_at = time.monotonic()
+
+            if docname in lost:
+                self.locked.append(docname)
+                continue
+
+            doc = frappe.get_doc("Payment Entry", docname)
+            doc.set_onload("auth_id", self.auth_id)
+            doc.flags.payout_fencing_token = fencing_tokens[docname]
+            release_payout_locks_on_completion([docname], lock_owner)
+
+            self.update_doc(doc)
+
+            try:
+                message = ""
+                if self.is_eligible(doc):
+                    message = self.execute(doc)
                 else:
-                    doc.submit()
-                    message = _("Submitting {0}").format("Payment Entry")
-            else:
-                failed.append(docname)
+                    self.failed.append(docname)
+
+                frappe.db.commit()
+                frappe.publish_progress(
+                    percent=(start + idx) / self.num_documents * 100,
+                    title=message,
+                    description=docname,
+                    task_id=self.task_id,
+                )
+
+            except Exception:
+                self.failed.append(docname)
+                frappe.db.rollback()
+
+    def get_result(self) -> dict:
+        return {
+            "failed": self.failed,
+            "locked": self.locked,
+            "run_id": self.queue_submissions() if self.queued else None,
+        }
+
+    def queue_submissions(self) -> str | None:
+        """
+        Queue the Payment Entries in Submission Queue in one batch.
+
+        :return: Run ID of the batch.
+        """
+        for doc in self.queued:
+            # lock is acquired again when processed in background
+            doc.flags.payout_fencing_token = None
 
+        try:
+            run_id = queue_submissions(self.queued, self.action, self.run_id)
             frappe.db.commit()
-            frappe.publish_progress(
-                percent=idx / num_documents * 100,
-                title=message,
-                description=docname,
-                task_id=task_id,
-            )
 
         except Exception:
-            failed.append(docname)
+            self.failed.extend(doc.name for doc in self.queued)
             frappe.db.rollback()
+            return
+
+        return run_id
+
+    #### Overridable Methods ####
+    def prefetch(self, docnames: list[str]):
+        """
+        Load the data used in validations in bulk.
+        """
+        prefetch_payout_data(docnames)
+
+    def update_doc(self, doc: PaymentEntry):
+        """
+        Update the Payment Entry before the action (no changes by default).
+        """
+        return
+
+    @abstractmethod
+    def is_eligible(self, doc: PaymentEntry) -> bool:
+        """
+        Check the action can be run on the Payment Entry (others are failed).
+        """
+
+    @abstractmethod
+    def execute(self, doc: PaymentEntry) -> str:
+        """
+        Run the action on the Payment Entry.
+
+        :return: Progress message.
+        """
+
+
+class BulkPayAndSubmit(BulkAction):
+    """
+    Pay and submit Payment Entries.
+
+    If Payment Entry is queued in background, Payment Entries are queued for submission in one batch.
+    """
+
+    action = "submit"
+
+    def __init__(
+        self,
+        *args,
+        mark_online_payment: bool | None = False,
+        assign_transfer_method: bool | None = False,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+
+        self.mark_online_payment = mark_online_payment
+        self.assign_transfer_method = assign_transfer_method
+        self.queue_in_background = (
+            frappe.get_meta("Payment Entry").queue_in_background
+            and not is_scheduler_inactive()
+        )
+
+        self.reassigned = {}
+
+    def prefetch(self, docnames: list[str]):
+        payment_entries = prefetch_payout_data(docnames)
+
+        if self.assign_transfer_method:
+            self.reassigned = assign_transfer_methods(
+                [pe for pe in payment_entries if pe.docstatus == 0]
+            )
+
+    def update_doc(self, doc: PaymentEntry):
+        if self.mark_online_payment:
+            doc.make_bank_online_payment = 1
+
+        if doc.name in self.reassigned:
+            doc.payment_transfer_method = self.reassigned[doc.name]
+
+    def is_eligible(self, doc: PaymentEntry) -> bool:
+        return doc.docstatus.is_draft()
+
+    def execute(self, doc: PaymentEntry) -> str:
+        if self.queue_in_background:
+            self.queued.append(doc)
+            return _("Queuing {0} for Submission").format("Payment Entry")
+
+        doc.submit()
+        return _("Submitting {0}").format("Payment Entry")
+
+    def get_result(self) -> dict:
+        return {**super().get_result(), "reassigned": self.reassigned}
+
+
+class BulkCancel(BulkAction):
+    """
+    Cancel submitted Payment Entries paid online.
+
+    If run in background (with run ID), Payment Entries are queued for cancellation in one batch,
+    so they are tracked the same as submissions of pay and submit.
+    """
+
+    action = "cancel"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.queue_in_background = bool(self.run_id) and not is_scheduler_inactive()
+
+    def prefetch(self, docnames: list[str]):
+        # payout validations are not run on cancel
+        pass
+
+    def is_eligible(self, doc: PaymentEntry) -> bool:
+        return doc.docstatus.is_submitted() and bool(doc.make_bank_online_payment)
+
+    def execute(self, doc: PaymentEntry) -> str:
+        if self.queue_in_background:
+            self.queued.append(doc)
+            return _("Queuing {0} for Cancellation").format("Payment Entry")
+
+        doc.cancel()
+        return _("Cancelling {0}").format("Payment Entry")
+
+
+def prefetch_payout_data(docnames: list[str]) -> list[dict]:
+    """
+    Load the data used in validations of the Payment Entries in bulk.
+
+    - Already paid status of amended entries' originals.
+    - Contact details of parties for Link payouts.
+
+    :return: Payout details of the Payment Entries (for transfer method assignment).
+    """
+    payment_entries = frappe.get_all(
+        "Payment Entry",
+        filters={"name": ("in", docnames)},
+        fields=[
+            "name",
+            "docstatus",
+            "amended_from",
+            "party_type",
+            "party",
+            "contact_person",
+            "paid_amount",
+            "payment_transfer_method",
+            "party_bank_account",
+            "party_bank_account_no",
+            "party_bank_ifsc",
+            "party_upi_id",
+            "integration_doctype",
+        ],
+    )
+
+    is_already_paid_many(pe.amended_from for pe in payment_entries)
+
+    prefetch_party_contact_details(
+        [
+            pe
+            for pe in payment_entries
+            if pe.payment_transfer_method == PAYMENT_METHOD.LINK.value
+        ]
+    )
 
-    return failed
+    return payment_entries
@@ -1,20 +1,31 @@
 import frappe
 from frappe import _
+from frappe.core.doctype.doctype.doctype import validate_permissions_for_doctype
 from frappe.core.page.permission_manager.permission_manager import (
     remove as remove_role_permissions,
 )
-from frappe.permissions import add_permission, update_permission_property
-from frappe.utils import get_datetime
+from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
+from frappe.model import numeric_fieldtypes
+from frappe.permissions import setup_custom_perms
+from frappe.utils import cstr, flt, get_datetime, get_table_name
+
+from payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry import (
+    clear_payment_permissions,
+)
+from payment_integration_utils.payment_integration_utils.utils.payout_schema import (
+    clear_payout_schema,
+)
 
 
 ### After Install Setup ###
-def make_roles_and_permissions(roles: list[dict]):
+def make_roles_and_permissions(roles: list[dict]) -> dict:
     """
     Make roles and permissions for the given roles.
 
     Apply roles to the doctypes with the given permissions.
 
     :param roles: List of roles with permissions.
+    :return: Changes made in permissions (see `apply_roles_to_doctype`).
 
     Structure of the `roles` list:
     ```py
@@ -30,7 +41,7 @@ def make_roles_and_permissions(roles: list[dict]):
     ```
     """
     create_roles(list({role["role_name"] for role in roles}))
-    apply_roles_to_doctype(roles)
+    return apply_roles_to_doctype(roles)
 
 
 def create_roles(role_names: list[str]):
@@ -57,11 +68,17 @@ def create_roles(role_names: list[str]):
             pass
 
 
-def apply_roles_to_doctype(roles: list[dict]):
+def apply_roles_to_doctype(roles: list[dict]) -> dict:
     """
     Apply roles to the doctypes with the given permissions.
 
+    Existing Custom DocPerms are read once and only the missing rules and permissions
+    are written (in bulk). Permissions are never unset, so changes made by users are kept.
+    Each changed doctype is validated and its cache is cleared once.
+    Cached payment permissions are cleared if anything is changed (bulk writes skip the hooks).
+
     :param roles: List of roles with permissions.
+    :return: Changes made `{"created": [(doctype, role, permlevel), ...], "updated": [(doctype, role, permlevel, [permissions]), ...]}`
 
     Structure of the `roles` list:
     ```py
@@ -76,37 +93,514 @@ def apply_roles_to_doctype(roles: list[dict]):
     ]
     ```
     """
+    # {(doctype, role, permlevel): {permission, ...}}
+    required = {}
+
     for role in roles:
         doctype, role_name, permlevels, permissions = role.values()
 
         if isinstance(permlevels, int):
             permlevels = [permlevels]
 
-        # Adding role to the doctype
         for permlevel in permlevels:
-            add_permission(doctype, role_name, permlevel)
+            # `read` is set by default on adding a role
+            required.setdefault((doctype, role_name, permlevel), {"read"}).update(
+                permissions
+            )
 
-        # Updating permissions (types) for the roles in the doctype
-        for permission in permissions:
-            for permlevel in permlevels:
-                update_permission_property(doctype, role_name, permlevel, permission, 1)
+    if not required:
+        return {"created": [], "updated": []}
+
+    doctypes = {key[0] for key in required}
+    permission_types = sorted(set().union(*required.values()))
+    existing_perms = get_custom_docperms(doctypes, permission_types)
+
+    # copy standard permissions as custom, if not customized yet
+    if uncustomized := [dt for dt in doctypes if dt not in existing_perms]:
+        for doctype in uncustomized:
+            setup_custom_perms(doctype)
+
+        existing_perms.update(get_custom_docperms(uncustomized, permission_types))
+
+    to_create = []
+    to_update = {}  # {(permission, ...): [name, ...]}
+    changes = {"created": [], "updated": []}
+
+    for (doctype, role_name, permlevel), permissions in required.items():
+        perms = existing_perms.get(doctype, {})
+        key = (role_name, permlevel)
+
+        if key not in perms:
+            to_create.append((doctype, role_name, permlevel, permissions))
+            changes["created"].append((doctype, role_name, permlevel))
+            continue
+
+        perm = perms[key]
+        missing = tuple(sorted(p for p in permissions if not perm[p]))
+
+        if missing:
+            to_update.setdefault(missing, []).append(perm.name)
+            changes["updated"].append((doctype, role_name, permlevel, list(missing)))
+
+    if to_create:
+        insert_custom_docperms(to_create, existing_perms, permission_types)
+
+    for permissions, names in to_update.items():
+        frappe.db.set_value(
+            "Custom DocPerm",
+            {"name": ("in", names)},
+            dict.fromkeys(permissions, 1),
+        )
+
+    changed_doctypes = {
+        change[0] for change in (*changes["created"], *changes["updated"])
+    }
+
+    # validates and clears cache once per doctype
+    for doctype in changed_doctypes:
+        validate_permissions_for_doctype(doctype)
+
+    # bulk writes skip Custom DocPerm hooks
+    if changed_doctypes:
+        clear_payment_permissions()
+
+    return changes
 
 
-def make_workflows(workflows: list[dict]):
+def get_custom_docperms(doctypes, permission_types: list[str]) -> dict:
     """
-    Create workflows.
+    Get the Custom DocPerms (not owner specific) of the doctypes.
 
-    :param workflows: List of workflows
+    :return: `{doctype: {(role, permlevel): perm}}`
+    """
+    perms = {}
+
+    for perm in frappe.get_all(
+        "Custom DocPerm",
+        filters={"parent": ("in", list(doctypes)), "if_owner": 0},
+        fields=["name", "parent", "role", "permlevel", "idx", *permission_types],
+    ):
+        perms.setdefault(perm.parent, {})[(perm.role, perm.permlevel)] = perm
+
+    return perms
+
+
+def insert_custom_docperms(
+    perms: list[tuple], existing_perms: dict, permission_types: list[str]
+):
+    """
+    Bulk insert the Custom DocPerms.
+
+    :param perms: List of `(doctype, role, permlevel, permissions)`.
+    :param existing_perms: Existing Custom DocPerms (for `idx`).
+    :param permission_types: Permission columns to be set.
+    """
+    user = frappe.session.user or "Administrator"
+    now = get_datetime()
+
+    fields = [
+        "name",
+        "creation",
+        "modified",
+        "owner",
+        "modified_by",
+        "parent",
+        "parenttype",
+        "parentfield",
+        "idx",
+        "role",
+        "permlevel",
+        "if_owner",
+        *permission_types,
+    ]
+
+    # {doctype: last idx}
+    last_idx = {
+        doctype: max((perm.idx for perm in perms.values()), default=0)
+        for doctype, perms in existing_perms.items()
+    }
+
+    documents = []
+
+    for doctype, role_name, permlevel, permissions in perms:
+        last_idx[doctype] = last_idx.get(doctype, 0) + 1
+
+        documents.append(
+            [
+                frappe.generate_hash(length=10),
+                now,
+                now,
+                user,
+                user,
+                doctype,
+                "DocType",
+                "permissions",
+                last_idx[doctype],
+                role_name,
+                permlevel,
+                0,
+                *(int(ptype in permissions) for ptype in permission_types),
+            ]
+        )
+
+    frappe.db.bulk_insert("Custom DocPerm", fields, documents)
+
+
+def make_custom_fields(custom_fields: dict) -> dict:
+    """
+    Create or update custom fields of the given doctypes.
+
+    Existing Custom Fields are read once and only new or changed fields are saved,
+    so a re-run (eg. on migrate) with no changes writes nothing and clears no cache.
+
+    :param custom_fields: Same as `frappe.custom.doctype.custom_field.custom_field.create_custom_fields`.
+    :return: Fields saved `{doctype: [fieldname, ...]}`
+    """
+    # {doctype: [df, ...]}
+    fields_by_doctype = {}
+
+    for doctypes, fields in custom_fields.items():
+        if isinstance(doctypes, str):
+            doctypes = (doctypes,)
+
+        if isinstance(fields, dict):
+            fields = [fields]
+
+        for doctype in doctypes:
+            fields_by_doctype.setdefault(doctype, []).extend(fields)
+
+    if not fields_by_doctype:
+        return {}
+
+    all_fields = [df for fields in fields_by_doctype.values() for df in fields]
+    meta = frappe.get_meta("Custom Field")
+    columns = {key for df in all_fields for key in df if meta.has_field(key)}
+    fieldtypes = {column: _get_fieldtype(meta, column) for column in columns}
+
+    existing_fields = {
+        (field.dt, field.fieldname): field
+        for field in frappe.get_all(
+            "Custom Field",
+            filters={
+                "dt": ("in", list(fields_by_doctype)),
+                "fieldname": ("in", list({df["fieldname"] for df in all_fields})),
+            },
+            fields=["dt", *columns],
+        )
+    }
+
+    to_save = {}
+
+    for doctype, fields in fields_by_doctype.items():
+        for df in fields:
+            existing = existing_fields.get((doctype, df["fieldname"]))
+
+            if existing and all(
+                _normalize_value(existing.get(key), fieldtypes[key])
+                == _normalize_value(value, fieldtypes[key])
+                for key, value in df.items()
+                if key in columns
+            ):
+                continue
+
+            to_save.setdefault(doctype, []).append(df)
+
+    if to_save:
+        # clears cache and updates schema once per doctype
+        create_custom_fields(to_save)
+
+        if "Payment Entry" in to_save:
+            clear_payout_schema()
+
+    return {
+        doctype: [df["fieldname"] for df in fields]
+        for doctype, fields in to_save.items()
+    }
+
+
+def make_property_setters(property_setters: list[dict]) -> dict:
+    """
+    Create or update property setters in bulk.
+
+    Existing Property Setters are read once, new ones are bulk inserted and only
+    changed values are updated. Cache is cleared once per changed doctype.
+
+    :param property_setters: List of property setters (same as `frappe.make_property_setter`).
+    :return: Changes made `{"created": [name, ...], "updated": [name, ...]}`
+
+    ---
+    Example:
+    ```py
+    [
+        {
+            "doctype": "Payment Entry",
+            "fieldname": "reference_no",
+            "property": "no_copy",
+            "property_type": "Check",
+            "value": 1,
+        },
+        ...,
+    ]
+    ```
+    """
+    changes = {"created": [], "updated": []}
+
+    if not property_setters:
+        return changes
+
+    existing_setters = {
+        (ps.doc_type, ps.field_name or ps.row_name or None, ps.property): ps
+        for ps in frappe.get_all(
+            "Property Setter",
+            filters={
+                "doc_type": ("in", list({ps["doctype"] for ps in property_setters})),
+                "property": ("in", list({ps["property"] for ps in property_setters})),
+            },
+            fields=["name", "doc_type", "field_name", "row_name", "property", "value"],
+        )
+    }
+
+    user = frappe.session.user or "Administrator"
+    now = get_datetime()
+    changed_doctypes = set()
+    documents = []
 
-    Note: Duplicate workflows will be skipped.
+    for property_setter in property_setters:
+        doctype = property_setter["doctype"]
+        fieldname = property_setter.get("fieldname")
+        row_name = property_setter.get("row_name")
+        property_type = property_setter.get("property_type") or "Data"
+        value = _normalize_value(property_setter.get("value"))  # as stored
+
+        existing = existing_setters.get(
+            (doctype, fieldname or row_name or None, property_setter["property"])
+        )
+
+        if existing:
+            if _normalize_value(existing.value, property_type) == _normalize_value(
+                value, property_type
+            ):
+                continue
+
+            frappe.db.set_value("Property Setter", existing.name, "value", value)
+            changes["updated"].append(existing.name)
+
+        else:
+            # same as `PropertySetter.autoname`
+            name = f"{doctype}-{fieldname or row_name or 'main'}-{property_setter['property']}"
+
+            documents.append(
+                [
+                    name,
+                    now,
+                    now,
+                    user,
+                    user,
+                    1,
+                    property_setter.get("doctype_or_field") or "DocField",
+                    doctype,
+                    fieldname,
+                    row_name,
+                    property_setter["property"],
+                    property_type,
+                    value,
+                ]
+            )
+            changes["created"].append(name)
+
+        changed_doctypes.add(doctype)
+
+    if documents:
+        frappe.db.bulk_insert(
+            "Property Setter",
+            [
+                "name",
+                "creation",
+                "modified",
+                "owner",
+                "modified_by",
+                "is_system_generated",
+                "doctype_or_field",
+                "doc_type",
+                "field_name",
+                "row_name",
+                "property",
+                "property_type",
+                "value",
+            ],
+            documents,
+        )
+
+    clear_doctype_caches(changed_doctypes)
+
+    return changes
+
+
+def make_indexes(indexes: dict) -> list[str]:
+    """
+    Create composite indexes if not exist.
+
+    On MariaDB, indexes are added in-place without locking the table (reads and writes
+    continue while the index is built).
+
+    :param indexes: `{doctype: [(column, ...), ...]}`
+    :return: Names of the created indexes.
     """
+    created = []
+
+    for doctype, columns_list in indexes.items():
+        table = get_table_name(doctype)
+
+        for columns in columns_list:
+            index_name = get_index_name(columns)
+
+            if frappe.db.has_index(table, index_name):
+                continue
+
+            if frappe.db.db_type == "mariadb":
+                frappe.db.sql_ddl(
+                    f"ALTER TABLE `{table}` ADD INDEX `{index_name}` "
+                    f"({', '.join(f'`{column}`' for column in columns)}), "
+                    "ALGORITHM=INPLACE, LOCK=NONE"
+                )
+            else:
+                frappe.db.add_index(doctype, list(columns), index_name)
+
+            created.append(index_name)
+
+    return created
+
+
+def get_index_name(columns: tuple[str, ...]) -> str:
+    """
+    Eg. `("integration_doctype", "docstatus")` ==> `integration_doctype_docstatus_index`
+    """
+    return f"{'_'.join(columns)}_index"[:64]
+
+
+def make_workflows(workflows: list[dict]) -> dict:
+    """
+    Create or update workflows as declared.
+
+    Existing workflows are loaded with their states and transitions in bulk (3 queries)
+    and only new or changed workflows are saved (which also clears their caches).
+    `is_active` is managed by users, so it is set only on creation.
+
+    :param workflows: List of workflows
+    :return: Changes made `{"created": [name, ...], "updated": [name, ...]}`
+    """
+    changes = {"created": [], "updated": []}
+    existing_workflows = get_workflows([wf["workflow_name"] for wf in workflows])
+
     for workflow in workflows:
-        try:
+        name = workflow["workflow_name"]
+
+        if name not in existing_workflows:
             doc = frappe.new_doc("Workflow")
             doc.update(workflow)
-            doc.save()
-        except frappe.DuplicateEntryError:
-            pass
+            doc.insert()
+
+            changes["created"].append(name)
+            continue
+
+        if not has_workflow_changed(workflow, existing_workflows[name]):
+            continue
+
+        doc = frappe.get_doc("Workflow", name)
+        doc.update(
+            {key: value for key, value in workflow.items() if key != "is_active"}
+        )
+        doc.save()
+
+        changes["updated"].append(name)
+
+    return changes
+
+
+def get_workflows(names: list[str]) -> dict:
+    """
+    Get workflows with their states and transitions (ordered by `idx`).
+
+    :return: `{name: {**workflow, "states": [...], "transitions": [...]}}`
+    """
+    if not names:
+        return {}
+
+    workflows = {
+        workflow.name: workflow
+        for workflow in frappe.get_all(
+            "Workflow", filters={"name": ("in", names)}, fields="*"
+        )
+    }
+
+    if not workflows:
+        return workflows
+
+    for table_field in frappe.get_meta("Workflow").get_table_fields():
+        for workflow in workflows.values():
+            workflow[table_field.fieldname] = []
+
+        for row in frappe.get_all(
+            table_field.options,
+            filters={
+                "parent": ("in", list(workflows)),
+                "parenttype": "Workflow",
+                "parentfield": table_field.fieldname,
+            },
+            fields="*",
+            order_by="idx asc",
+        ):
+            workflows[row.parent][table_field.fieldname].append(row)
+
+    return workflows
+
+
+def has_workflow_changed(workflow: dict, existing_workflow: dict) -> bool:
+    """
+    Compare the declared workflow with the existing one (ignoring `is_active`).
+    """
+    meta = frappe.get_meta("Workflow")
+
+    for key, value in workflow.items():
+        if key == "is_active" or not meta.has_field(key):
+            continue
+
+        if not isinstance(value, list):
+            fieldtype = _get_fieldtype(meta, key)
+
+            if _normalize_value(
+                value, fieldtype, empty_as_unset=True
+            ) != _normalize_value(
+                existing_workflow.get(key), fieldtype, empty_as_unset=True
+            ):
+                return True
+
+            continue
+
+        existing_rows = existing_workflow.get(key) or []
+
+        if len(value) != len(existing_rows):
+            return True
+
+        child_meta = frappe.get_meta(meta.get_field(key).options)
+        columns = {
+            column for row in value for column in row if child_meta.has_field(column)
+        }
+        fieldtypes = {column: _get_fieldtype(child_meta, column) for column in columns}
+
+        for row, existing_row in zip(value, existing_rows, strict=True):
+            if any(
+                _normalize_value(
+                    row.get(column), fieldtypes[column], empty_as_unset=True
+                )
+                != _normalize_value(
+                    existing_row.get(column), fieldtypes[column], empty_as_unset=True
+                )
+                for column in columns
+            ):
+                return True
+
+    return False
 
 
 def make_workflow_states(states: dict):
@@ -205,6 +699,8 @@ def delete_custom_fields(custom_fields: dict):
     ```
 
     """
+    doctypes_to_clear = set()
+
     for doctype, fields in custom_fields.items():
         fieldnames = []
 
@@ -225,7 +721,9 @@ def delete_custom_fields(custom_fields: dict):
             },
         )
 
-        frappe.clear_cache(doctype=doctype)
+        doctypes_to_clear.add(doctype)
+
+    clear_doctype_caches(doctypes_to_clear)
 
 
 def delete_property_setters(property_setters: list[dict]):
@@ -239,14 +737,18 @@ def delete_property_setters(property_setters: list[dict]):
         "fieldname": "field_name",
     }
 
+    doctypes_to_clear = set()
+
     for property_setter in property_setters:
-        for key, fieldname in field_map.items():
-            if key in property_setter:
-                property_setter[fieldname] = property_setter.pop(key)
+        # copy to keep the given property setters unchanged
+        filters = {
+            field_map.get(key, key): value for key, value in property_setter.items()
+        }
 
-        frappe.db.delete("Property Setter", property_setter)
+        frappe.db.delete("Property Setter", filters)
+        doctypes_to_clear.add(filters["doc_type"])
 
-        frappe.clear_cache(doctype=property_setter["doc_type"])
+    clear_doctype_caches(doctypes_to_clear)
 
 
 def delete_roles_and_permissions(roles: list[dict]):
@@ -302,6 +804,8 @@ def remove_permissions(roles: list[dict]):
         except Exception:
             pass
 
+    clear_payment_permissions()
+
 
 def delete_roles(roles: list[str]):
     """
@@ -310,3 +814,43 @@ def delete_roles(roles: list[str]):
     :param roles: List of role names to be deleted.
     """
     frappe.db.delete("Role", {"role_name": ("in", roles)})
+
+
+### Utils ###
+def clear_doctype_caches(doctypes: set[str]):
+    """
+    Clear cache once per doctype (after bulk changes in customizations).
+    """
+    for doctype in doctypes:
+        frappe.clear_cache(doctype=doctype)
+
+    if "Payment Entry" in doctypes:
+        clear_payout_schema()
+
+
+def _normalize_value(
+    value, fieldtype: str | None = None, empty_as_unset: bool = False
+) -> str | float:
+    """
+    Normalize the value by the field's type to compare declared and existing values.
+
+    :param fieldtype: Type of the field. Numbers of other types are compared as text (`1` same as `"1"`).
+    :param empty_as_unset: Treat `0` and `False` same as not set (`None` or `""`).
+        Used for workflows, as unset numbers and checks are loaded as `0` from DB.
+    """
+    if value is None or (empty_as_unset and not value):
+        return ""
+
+    if fieldtype in numeric_fieldtypes:
+        value = flt(value)
+        return "" if empty_as_unset and not value else value
+
+    if isinstance(value, bool):
+        return cstr(int(value))
+
+    return cstr(value)
+
+
+def _get_fieldtype(meta, fieldname: str) -> str | None:
+    if field := meta.get_field(fieldname):
+        return field.fieldtype
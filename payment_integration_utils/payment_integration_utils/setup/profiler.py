@@ -0,0 +1,174 @@
+"""
+Profiler for the setup phases (install, migrate and uninstall) of the app.
+
+Records wall time, queries and cache clears per phase and per doctype.
+Queries are attributed to the doctype of the first table in the query.
+
+Site config `payment_integration_setup_profile`: path of the JSON file to write the profile
+(relative to the site folder).
+
+```py
+profiler = SetupProfiler()
+
+with profiler.phase("create_custom_fields"):
+    create_custom_fields()
+
+profiler.print_summary()
+```
+"""
+
+import json
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import click
+import frappe
+
+TABLE_PATTERN = re.compile(r"`tab([^`]+)`")
+
+
+class SetupProfiler:
+    def __init__(self):
+        # {phase: {"time", "queries", "cache_clears", "queries_by_doctype", "cache_clears_by_doctype"}}
+        self.phases: dict[str, dict] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Profile the code in the context as the given phase.
+
+        Note: Phases should not be nested.
+        """
+        queries = Counter()
+        cache_clears = Counter()
+
+        db = frappe.db
+        sql = db.sql
+        is_sql_patched = "sql" in vars(db)
+        clear_cache = frappe.clear_cache
+
+        def profiled_sql(query, *args, **kwargs):
+            match = TABLE_PATTERN.search(str(query))
+            queries[match.group(1) if match else ""] += 1
+
+            return sql(query, *args, **kwargs)
+
+        def profiled_clear_cache(*args, **kwargs):
+            cache_clears[kwargs.get("doctype") or ""] += 1
+
+            return clear_cache(*args, **kwargs)
+
+        db.sql = profiled_sql
+        frappe.clear_cache = profiled_clear_cache
+        started_at = time.perf_counter()
+
+        try:
+            yield
+
+        finally:
+            elapsed = time.perf_counter() - started_at
+
+            if is_sql_patched:
+                db.sql = sql
+            else:
+                # remove instance attribute to restore the method
+                del db.sql
+
+            frappe.clear_cache = clear_cache
+
+            self.phases[name] = {
+                "time": round(elapsed, 4),
+                "queries": sum(queries.values()),
+                "cache_clears": sum(cache_clears.values()),
+                "queries_by_doctype": dict(queries.most_common()),
+                "cache_clears_by_doctype": dict(cache_clears.most_common()),
+            }
+
+    def as_dict(self) -> dict:
+        return {
+            "site": frappe.local.site,
+            "time": round(sum(phase["time"] for phase in self.phases.values()), 4),
+            "queries": sum(phase["queries"] for phase in self.phases.values()),
+            "cache_clears": sum(
+                phase["cache_clears"] for phase in self.phases.values()
+            ),
+            "phases": self.phases,
+        }
+
+    def print_summary(self, title: str = "Setup Profile"):
+        click.secho(f"\n{title}:", fg="blue")
+        click.echo(f"{'Phase':<32} {'Time (s)':>10} {'Queries':>9} {'Clears':>7}")
+
+        for name, phase in self.phases.items():
+            click.echo(
+                f"{name:<32} {phase['time']:>10.3f} {phase['queries']:>9} {phase['cache_clears']:>7}"
+            )
+
+            # top doctypes to spot the slow ones
+            for doctype, count in list(phase["queries_by_doctype"].items())[:3]:
+                clears = phase["cache_clears_by_doctype"].get(doctype, 0)
+                click.echo(f"  {doctype or '-':<30} {'':>10} {count:>9} {clears:>7}")
+
+    def write_json(self, path: str | None = None) -> str | None:
+        """
+        Write the profile as JSON.
+
+        :param path: File path. Defaults to site config `payment_integration_setup_profile`.
+        :return: Path of the written file (if any).
+        """
+        if not (path := path or frappe.conf.get("payment_integration_setup_profile")):
+            return
+
+        if not os.path.isabs(path):
+            path = frappe.get_site_path(path)
+
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+        return path
+
+
+def report_setup_profile(profiler: SetupProfiler, title: str = "Setup Profile"):
+    """
+    Print the summary and write JSON (if configured) of the profile.
+    """
+    profiler.print_summary(title)
+
+    if path := profiler.write_json():
+        click.secho(f"Setup profile written to {path}", fg="green")
+
+
+def compare_with_baseline(profile: dict, baseline: dict) -> list[dict]:
+    """
+    Compare the phases of the profile with the baseline.
+
+    :param profile: Current profile (`SetupProfiler.as_dict()`).
+    :param baseline: Stored profile to compare with.
+    :return: Rows with `phase`, `time`, `baseline_time`, `time_change` (%), `queries` and `baseline_queries`.
+    """
+    baseline_phases = baseline.get("phases", {})
+    rows = []
+
+    for name, phase in profile["phases"].items():
+        base = baseline_phases.get(name, {})
+        baseline_time = base.get("time")
+
+        rows.append(
+            {
+                "phase": name,
+                "time": phase["time"],
+                "baseline_time": baseline_time,
+                "time_change": (
+                    round((phase["time"] - baseline_time) / baseline_time * 100, 1)
+                    if baseline_time
+                    else None
+                ),
+                "queries": phase["queries"],
+                "baseline_queries": base.get("queries"),
+            }
+        )
+
+    return rows
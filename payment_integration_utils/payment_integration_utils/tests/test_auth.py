@@ -1 +1,133 @@
 # TODO: test : payment_integration_utils/payment_integration_utils/utils/auth.py
+import json
+import time
+from unittest.mock import patch
+
+import frappe
+import pyotp
+from cryptography.fernet import Fernet
+from frappe.tests.utils import FrappeTestCase
+
+from payment_integration_utils.payment_integration_utils.utils.otp_secret import (
+    TOTP_INTERVAL,
+    decrypt_secret,
+    encrypt_secret,
+    make_hotp_verifier,
+    make_totp_verifier,
+    verify_hotp,
+    verify_totp,
+)
+
+OTP_SECRET_MODULE = (
+    "payment_integration_utils.payment_integration_utils.utils.otp_secret"
+)
+
+
+def at_time(for_time: float):
+    """
+    Freeze the clock of OTP verifiers at `for_time`.
+    """
+    return patch(f"{OTP_SECRET_MODULE}.time", **{"time.return_value": for_time})
+
+
+class TestOTPSecret(FrappeTestCase):
+    def setUp(self):
+        self.otp_secret = pyotp.random_base32()
+        self.auth_id = frappe.generate_hash(length=8)
+
+    def test_totp_window(self):
+        totp = pyotp.TOTP(self.otp_secret, interval=TOTP_INTERVAL)
+        now = time.time()
+
+        with at_time(now):
+            verifier = make_totp_verifier(self.otp_secret, self.auth_id, 60)
+
+        # accepted from now till `valid_for`
+        for at in (now, now + 60):
+            with at_time(at):
+                self.assertTrue(verify_totp(totp.at(at), self.auth_id, verifier))
+
+        # expired
+        at = now + 60 + TOTP_INTERVAL * 2
+        with at_time(at):
+            self.assertFalse(verify_totp(totp.at(at), self.auth_id, verifier))
+
+        # OTP of another time step
+        with at_time(now):
+            otp = totp.at(now - TOTP_INTERVAL)
+            if otp != totp.at(now):
+                self.assertFalse(verify_totp(otp, self.auth_id, verifier))
+
+    def test_wrong_otp(self):
+        now = time.time()
+        otp = pyotp.TOTP(self.otp_secret, interval=TOTP_INTERVAL).at(now)
+        wrong_otp = str((int(otp) + 1) % 10**6).zfill(6)
+
+        with at_time(now):
+            verifier = make_totp_verifier(self.otp_secret, self.auth_id, 60)
+
+            self.assertTrue(verify_totp(f" {otp} ", self.auth_id, verifier))
+            self.assertFalse(verify_totp(wrong_otp, self.auth_id, verifier))
+            self.assertFalse(verify_totp("", self.auth_id, verifier))
+
+            # verifier is bound to the auth session
+            self.assertFalse(verify_totp(otp, "other-auth-id", verifier))
+
+    def test_tampered_verifier(self):
+        now = time.time()
+        otp = pyotp.TOTP(self.otp_secret, interval=TOTP_INTERVAL).at(now)
+
+        with at_time(now):
+            verifier = make_totp_verifier(self.otp_secret, self.auth_id, 60)
+
+            tampered = {counter: "0" * 64 for counter in json.loads(verifier)}
+            self.assertFalse(verify_totp(otp, self.auth_id, json.dumps(tampered)))
+
+            # digests made without the site's encryption key
+            with patch(
+                f"{OTP_SECRET_MODULE}.get_encryption_key", return_value="other-key"
+            ):
+                forged = make_totp_verifier(self.otp_secret, self.auth_id, 60)
+
+            self.assertFalse(verify_totp(otp, self.auth_id, forged))
+            self.assertFalse(verify_hotp(otp, self.auth_id, "0" * 64))
+
+    def test_hotp_counter(self):
+        hotp = pyotp.HOTP(self.otp_secret)
+        verifier = make_hotp_verifier(self.otp_secret, self.auth_id, 5)
+
+        self.assertTrue(verify_hotp(hotp.at(5), self.auth_id, verifier))
+        self.assertTrue(
+            verify_hotp(hotp.at(5).encode(), self.auth_id, verifier.encode())
+        )
+
+        # drifted counters are not accepted
+        for counter in (4, 6):
+            if hotp.at(counter) != hotp.at(5):
+                self.assertFalse(verify_hotp(hotp.at(counter), self.auth_id, verifier))
+
+    def test_secret_rotation(self):
+        encrypted = encrypt_secret(self.otp_secret)
+        self.assertNotIn(self.otp_secret, encrypted)
+        self.assertEqual(decrypt_secret(encrypted), self.otp_secret)
+
+        # rotated OTP secret: OTPs of the old secret are rejected
+        new_secret = pyotp.random_base32()
+        self.assertEqual(decrypt_secret(encrypt_secret(new_secret)), new_secret)
+
+        now = time.time()
+        old_otp = pyotp.TOTP(self.otp_secret, interval=TOTP_INTERVAL).at(now)
+
+        with at_time(now):
+            verifier = make_totp_verifier(new_secret, self.auth_id, 60)
+
+            if old_otp != pyotp.TOTP(new_secret, interval=TOTP_INTERVAL).at(now):
+                self.assertFalse(verify_totp(old_otp, self.auth_id, verifier))
+
+        # rotated encryption key: old secrets must be reset, new ones round trip
+        with patch(
+            f"{OTP_SECRET_MODULE}.get_encryption_key",
+            return_value=Fernet.generate_key().decode(),
+        ):
+            self.assertRaises(frappe.ValidationError, decrypt_secret, encrypted)
+            self.assertEqual(decrypt_secret(encrypt_secret(new_secret)), new_secret)
@@ -1 +1,308 @@
-# TODO: test: payment_integration_utils/payment_integration_utils/server_overrides/doctype/payment_entry.py
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import now
+
+from payment_integration_utils.payment_integration_utils.constants.roles import (
+    ROLE_PROFILE,
+)
+from payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry import (
+    BulkCancel,
+    bulk_cancel,
+    clear_payment_permissions,
+    onload,
+)
+from payment_integration_utils.payment_integration_utils.setup import get_index_name
+from payment_integration_utils.payment_integration_utils.utils.auth import (
+    Authenticate2FA,
+    Trigger2FA,
+    Utils2FA,
+    get_payment_auth_settings,
+)
+from payment_integration_utils.payment_integration_utils.utils.payout_lock import (
+    acquire_payout_locks,
+    release_payout_locks,
+)
+from payment_integration_utils.payment_integration_utils.utils.submission_queue import (
+    get_submission_run_status,
+)
+from payment_integration_utils.setup import create_indexes
+
+# Queries allowed to open a Payment Entry form when payment permission is not cached
+# (Payment Entries, Integration Setting and Payment Entry with children for permissions)
+MAX_ONLOAD_QUERIES = 10
+PAYMENT_AUTHORIZER = "_test_payment_authorizer@example.com"
+
+PAYMENT_ENTRY_MODULE = "payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry"
+SUBMISSION_QUEUE_MODULE = (
+    "payment_integration_utils.payment_integration_utils.utils.submission_queue"
+)
+
+
+class TestPaymentEntry(FrappeTestCase):
+    def test_onload_query_count(self):
+        if not (company := frappe.db.get_value("Company", {}, "name")):
+            self.skipTest("Company is required as Integration Setting")
+
+        name = "_Test Payment Entry Onload"
+        frappe.db.bulk_insert(
+            "Payment Entry",
+            (
+                "name",
+                "creation",
+                "modified",
+                "owner",
+                "modified_by",
+                "docstatus",
+                "integration_doctype",
+                "integration_docname",
+            ),
+            [
+                (
+                    name,
+                    now(),
+                    now(),
+                    "Administrator",
+                    "Administrator",
+                    0,
+                    "Company",
+                    company,
+                )
+            ],
+        )
+
+        with self.set_user(self.get_payment_authorizer()):
+            doc = frappe.get_doc("Payment Entry", name)
+
+            # framework caches (meta, roles) are warm, payment permission is not
+            onload(doc)
+            self.assertTrue(doc.get_onload().has_payment_permission)
+            clear_payment_permissions()
+
+            with self.assertQueryCount(MAX_ONLOAD_QUERIES):
+                onload(doc)
+
+            for key in (
+                "is_already_paid",
+                "payment_integration_fields",
+                "has_payment_permission",
+            ):
+                self.assertIn(key, doc.get_onload())
+
+            self.assertTrue(doc.get_onload().has_payment_permission)
+
+            # re-opening the unchanged form is served from caches
+            with self.assertQueryCount(0):
+                onload(doc)
+
+    def get_payment_authorizer(self) -> str:
+        """
+        User who can authorize payments (roles are rolled back with the test).
+        """
+        if not frappe.db.exists("User", PAYMENT_AUTHORIZER):
+            frappe.get_doc(
+                {
+                    "doctype": "User",
+                    "email": PAYMENT_AUTHORIZER,
+                    "first_name": "_Test Payment Authorizer",
+                    "send_welcome_email": 0,
+                }
+            ).insert(ignore_permissions=True)
+
+        frappe.get_doc("User", PAYMENT_AUTHORIZER).add_roles(
+            ROLE_PROFILE.PAYMENT_AUTHORIZER.value, "Accounts User", "Accounts Manager"
+        )
+
+        return PAYMENT_AUTHORIZER
+
+    def test_indexes_used(self):
+        if frappe.db.db_type != "mariadb":
+            self.skipTest("EXPLAIN output is checked for MariaDB only")
+
+        # DDL commits implicitly, so create indexes before seeding the rows
+        create_indexes()
+        self.seed_payment_entries()
+
+        # (hot query, index expected to be used)
+        queries = [
+            (
+                """SELECT name FROM `tabPayment Entry`
+                WHERE integration_doctype = 'Integration Setting' AND integration_docname = 'Test' AND docstatus = 1""",
+                ("integration_doctype", "integration_docname", "docstatus"),
+            ),
+            (
+                """SELECT name FROM `tabPayment Entry`
+                WHERE make_bank_online_payment = 1 AND payment_transfer_method = 'NEFT' AND docstatus = 0""",
+                ("make_bank_online_payment", "payment_transfer_method", "docstatus"),
+            ),
+        ]
+
+        for query, columns in queries:
+            plan = frappe.db.sql(f"EXPLAIN {query}", as_dict=True)[0]
+            self.assertEqual(plan.key, get_index_name(columns))
+
+    def test_validate_session(self):
+        names = ["_Test PE Auth 1", "_Test PE Auth 2"]
+        auth_id = self.create_auth_session(names)
+
+        Authenticate2FA.validate_session(auth_id, names)
+        Authenticate2FA.validate_session(auth_id, names[:1])
+
+        # not frozen with the session
+        self.assertRaises(
+            frappe.AuthenticationError,
+            Authenticate2FA.validate_session,
+            auth_id,
+            [*names, "_Test PE Auth 3"],
+        )
+
+        # session of another user
+        with self.set_user("Guest"):
+            self.assertRaises(
+                frappe.AuthenticationError,
+                Authenticate2FA.validate_session,
+                auth_id,
+                names,
+            )
+
+        # OTP not verified
+        auth_id = self.create_auth_session(names, authenticated=False)
+        self.assertRaises(
+            frappe.AuthenticationError, Authenticate2FA.validate_session, auth_id, names
+        )
+
+    def test_bulk_cancel(self):
+        names = [f"_Test PE Cancel {idx}" for idx in range(1, 5)]
+        auth_id = self.create_auth_session(names)
+
+        # cancel permission
+        with self.set_user("Guest"):
+            self.assertRaises(frappe.PermissionError, bulk_cancel, auth_id, names)
+
+        # auth session
+        self.assertRaises(
+            frappe.AuthenticationError,
+            bulk_cancel,
+            auth_id,
+            [*names, "_Test PE Cancel 3"],
+        )
+
+        # payment permissions (Administrator can't authorize the payment)
+        self.assertRaises(frappe.PermissionError, bulk_cancel, auth_id, names)
+
+        # drafts and entries not paid online are not eligible, locked entries are skipped
+        self.insert_draft_payment_entries(names)
+        frappe.db.set_value("Payment Entry", names[1], "docstatus", 1)
+        frappe.db.set_value(
+            "Payment Entry", names[2], {"docstatus": 1, "make_bank_online_payment": 1}
+        )
+
+        self.assertTrue(acquire_payout_locks(names[3:], "_test-owner"))
+        self.addCleanup(release_payout_locks, names[3:], "_test-owner")
+
+        # in background: queued for cancellation under the run ID
+        run_id = frappe.generate_hash(length=10)
+        self.addCleanup(self.delete_submission_queue, names)
+
+        with (
+            patch(f"{PAYMENT_ENTRY_MODULE}.is_scheduler_inactive", return_value=False),
+            patch(f"{SUBMISSION_QUEUE_MODULE}.get_queue") as get_queue,
+        ):
+            result = BulkCancel(auth_id, names, run_id=run_id).run()
+
+        self.assertEqual(
+            result, {"failed": names[:2], "locked": names[3:], "run_id": run_id}
+        )
+        self.assertEqual(get_submission_run_status(run_id), {"Queued": 1})
+        get_queue.return_value.enqueue_many.assert_called_once()
+
+    def delete_submission_queue(self, payment_entries: list[str]):
+        filters = {
+            "ref_doctype": "Payment Entry",
+            "ref_docname": ("in", payment_entries),
+        }
+
+        for name in frappe.get_all("Submission Queue", filters=filters, pluck="name"):
+            frappe.get_doc({"doctype": "Submission Queue", "name": name}).unlock()
+
+        frappe.db.delete("Submission Queue", filters)
+        frappe.db.commit()
+
+    def create_auth_session(
+        self, payment_entries: list[str], authenticated: bool = True
+    ) -> str:
+        """
+        Freeze the Payment Entries with a new auth session of the current user (as `send_otp`).
+        """
+        trigger = Trigger2FA(payment_entries)
+        trigger.auth_id = frappe.generate_hash(length=8)
+        trigger.settings = get_payment_auth_settings()
+
+        trigger.cache_2fa_data(user=trigger.user)
+        trigger.cache_payment_entries()
+
+        if authenticated:
+            trigger.pipeline.set(
+                f"{trigger.auth_id}{Utils2FA._AUTHENTICATED}",
+                "True",
+                trigger.settings.session_expiry,
+            )
+
+        trigger.pipeline.execute()
+        return trigger.auth_id
+
+    def insert_draft_payment_entries(self, names: list[str]):
+        timestamp = now()
+
+        frappe.db.bulk_insert(
+            "Payment Entry",
+            ("name", "creation", "modified", "owner", "modified_by", "docstatus"),
+            [
+                (name, timestamp, timestamp, "Administrator", "Administrator", 0)
+                for name in names
+            ],
+        )
+
+        # bulk actions commit each entry
+        self.addCleanup(frappe.db.commit)
+        self.addCleanup(frappe.db.delete, "Payment Entry", {"name": ("in", names)})
+
+    def seed_payment_entries(self, count: int = 2000):
+        """
+        Insert rows with spread values, so the planner prefers the selective index
+        over a table scan (estimates are from index dives, no `ANALYZE` needed).
+        """
+        timestamp = now()
+        methods = ("NEFT", "RTGS", "IMPS", "UPI", "Link")
+
+        frappe.db.bulk_insert(
+            "Payment Entry",
+            (
+                "name",
+                "creation",
+                "modified",
+                "owner",
+                "modified_by",
+                "docstatus",
+                "integration_doctype",
+                "integration_docname",
+                "make_bank_online_payment",
+                "payment_transfer_method",
+            ),
+            [
+                (
+                    f"_Test PE Index {idx}",
+                    timestamp,
+                    timestamp,
+                    "Administrator",
+                    "Administrator",
+                    idx % 3,
+                    "Integration Setting",
+                    f"Setting {idx % 50}",
+                    idx % 2,
+                    methods[idx % len(methods)],
+                )
+                for idx in range(count)
+            ],
+        )
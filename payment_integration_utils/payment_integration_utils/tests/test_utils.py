@@ -1,10 +1,105 @@
+import gzip
+import json
+import os
+import random
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, now_datetime
+from frappe.utils.background_jobs import create_job_id
 
+from payment_integration_utils.commands import get_sites_to_sync
+from payment_integration_utils.payment_integration_utils.constants.notifications import (
+    NOTIFICATION_TEMPLATE,
+)
+from payment_integration_utils.payment_integration_utils.server_overrides.doctype.payment_entry import (
+    PAYMENT_PERMISSION_VERSION,
+)
+from payment_integration_utils.payment_integration_utils.setup import (
+    _normalize_value,
+    apply_roles_to_doctype,
+)
 from payment_integration_utils.payment_integration_utils.utils import (
+    get_epoch_windows,
+    get_timezone_offset,
+    numpy,
     paisa_to_rupees,
+    paisa_to_rupees_many,
+    pretty_json,
     rupees_to_paisa,
+    rupees_to_paisa_many,
     to_hyphenated,
 )
+from payment_integration_utils.payment_integration_utils.utils.cache import (
+    get_cache_version,
+)
+from payment_integration_utils.payment_integration_utils.utils.contact import (
+    CONTACT_DETAILS_CACHE_TTL,
+    clear_party_contact_details,
+    get_cache_key,
+    get_party_contact_details,
+    normalize_mobile_no,
+)
+from payment_integration_utils.payment_integration_utils.utils.integration_request import (
+    BUFFER_KEY,
+    BUFFER_SINCE_KEY,
+    COMPRESSED_PREFIX,
+    DEAD_LETTER_KEY,
+    FLUSH_INTERVAL,
+    FLUSH_LOCK_KEY,
+    FLUSH_SIZE,
+    MAX_PAYLOAD_SIZE,
+    append_to_archive,
+    archive_integration_requests,
+    enqueue_integration_request,
+    flush_integration_requests,
+    get_integration_request_payload,
+    get_integration_request_values,
+    pack_payload,
+    redact_payload,
+    unpack_payload,
+)
+from payment_integration_utils.payment_integration_utils.utils.notification import (
+    clear_notification_templates,
+    register_notification_template,
+    render_notification_template,
+)
+from payment_integration_utils.payment_integration_utils.utils.payout_lock import (
+    acquire_payout_locks,
+    is_valid_fencing_token,
+    release_payout_locks,
+    renew_payout_locks,
+)
+from payment_integration_utils.payment_integration_utils.utils.payout_selection import (
+    get_chunks,
+    get_filters_list,
+)
+from payment_integration_utils.payment_integration_utils.utils.submission_queue import (
+    get_submission_run_status,
+    queue_submissions,
+)
+from payment_integration_utils.payment_integration_utils.utils.transfer_method import (
+    assign_transfer_methods,
+    check_transfer_method_limits,
+    get_transfer_method_limits,
+    validate_transfer_method_limit,
+)
+
+SUBMISSION_QUEUE_MODULE = (
+    "payment_integration_utils.payment_integration_utils.utils.submission_queue"
+)
+INTEGRATION_REQUEST_MODULE = (
+    "payment_integration_utils.payment_integration_utils.utils.integration_request"
+)
+
+# overrides of an integration app (`payment_notification_templates` hook)
+TEST_NOTIFICATION_TEMPLATES = {
+    "_test_notification": {"default": "Hook {{ name }}"},
+}
 
 
 class TestUtils(FrappeTestCase):
@@ -22,6 +117,748 @@ class TestUtils(FrappeTestCase):
             self.assertEqual(rupees_to_paisa(rupees), paisa)
             self.assertEqual(paisa_to_rupees(paisa), rupees)
 
+    def test_batch_conversion(self):
+        self.assertEqual(rupees_to_paisa_many([100, 79.899, 0.29]), [10000, 7990, 29])
+        self.assertEqual(rupees_to_paisa_many([615577.455]), [61557746])
+        self.assertEqual(paisa_to_rupees_many([10000, 7990]), [100, 79.9])
+
+        rng = random.Random(42)
+
+        for _ in range(50):
+            amounts = [
+                round(rng.uniform(-1e7, 1e7), rng.choice([0, 1, 2, 3, 4]))
+                for _ in range(rng.randint(0, 200))
+            ]
+
+            # same as scalar
+            paisa = rupees_to_paisa_many(amounts)
+            self.assertEqual(paisa, [rupees_to_paisa(amount) for amount in amounts])
+            self.assertTrue(all(isinstance(value, int) for value in paisa))
+
+            self.assertEqual(
+                paisa_to_rupees_many(paisa), [paisa_to_rupees(value) for value in paisa]
+            )
+
+            # round trip for amounts with 2 decimals
+            rupees = [round(amount, 2) for amount in amounts]
+            self.assertEqual(paisa_to_rupees_many(rupees_to_paisa_many(rupees)), rupees)
+
+            # vectorized same as exact
+            if numpy is not None:
+                self.assertEqual(
+                    rupees_to_paisa_many(numpy.array(amounts)).tolist(), paisa
+                )
+
+    def test_batch_conversion_with_none(self):
+        # large lists are vectorized (if NumPy is installed)
+        rng = random.Random(42)
+        amounts = [round(rng.uniform(-1e6, 1e6), 2) for _ in range(1500)]
+        amounts[::100] = [None] * len(amounts[::100])
+
+        paisa = rupees_to_paisa_many(amounts)
+        self.assertEqual(paisa, [rupees_to_paisa(amount) for amount in amounts])
+        self.assertEqual(paisa[0], 0)
+        self.assertTrue(all(isinstance(value, int) for value in paisa))
+
+    def test_epoch_windows(self):
+        self.assertEqual(
+            list(get_epoch_windows("2024-05-30", timezone="Asia/Kolkata")),
+            [(1717007400, 1717093799)],
+        )
+
+        # hour windows over 2 days
+        windows = list(
+            get_epoch_windows(
+                "2024-05-30", "2024-05-31", interval="hour", timezone="Asia/Kolkata"
+            )
+        )
+        self.assertEqual(len(windows), 48)
+        self.assertEqual(windows[0], (1717007400, 1717010999))
+        self.assertEqual(windows[-1][1], 1717180199)
+
+        # DST: 2024-03-10 has 23 hours in New York
+        windows = list(
+            get_epoch_windows(
+                "2024-03-10", interval="hour", timezone="America/New_York"
+            )
+        )
+        self.assertEqual(len(windows), 23)
+
+        ((start, end),) = get_epoch_windows("2024-03-10", timezone="America/New_York")
+        self.assertEqual(end - start + 1, 23 * 3600)
+
+        # offset of the range's years (Asia/Kolkata was UTC+06:30 in 1943)
+        self.assertEqual(get_timezone_offset("Asia/Kolkata", 2024), 19800)
+        self.assertIsNone(get_timezone_offset("Asia/Kolkata", 1943))
+        self.assertEqual(
+            list(get_epoch_windows("1943-05-30", timezone="Asia/Kolkata")),
+            [(-839226600, -839140201)],
+        )
+
+        # offset changed within the range (Moscow moved from UTC+4 to UTC+3 on 2014-10-26)
+        self.assertEqual(get_timezone_offset("Europe/Moscow", 2013), 14400)
+        self.assertEqual(get_timezone_offset("Europe/Moscow", 2016), 10800)
+
+        windows = list(
+            get_epoch_windows("2014-10-25", "2014-10-27", timezone="Europe/Moscow")
+        )
+        self.assertEqual(windows[1], (1414267200, 1414357199))
+        self.assertEqual(windows[2][0], 1414357200)
+
+    def test_transfer_method_limits(self):
+        # (method, amount, is_valid)
+        data = [
+            ("IMPS", 5_00_000, True),
+            ("IMPS", 5_00_000.01, False),
+            ("RTGS", 2_00_000, True),
+            ("RTGS", 1_99_999.99, False),
+            ("NEFT", 10_00_00_000, True),
+            ("UPI", 100, True),
+        ]
+        methods, amounts, expected = (
+            list(values) for values in zip(*data, strict=True)
+        )
+        limits = get_transfer_method_limits()
+
+        for method, amount, is_valid in data:
+            self.assertEqual(limits.is_valid(method, amount), is_valid)
+
+        self.assertEqual(check_transfer_method_limits(methods, amounts), expected)
+
+        if numpy is not None:
+            self.assertEqual(
+                check_transfer_method_limits(methods, numpy.array(amounts)).tolist(),
+                expected,
+            )
+
+        # site config rules are picked up without clearing cache
+        rules = [
+            {"method": method, "max_amount": 1_000}
+            for method in ("NEFT", "RTGS", "IMPS")
+        ]
+        with patch.dict(frappe.local.conf, {"payment_transfer_method_rules": rules}):
+            limits = get_transfer_method_limits()
+            self.assertFalse(limits.is_valid("NEFT", 2_000))
+
+            # no other method allows the amount
+            with self.assertRaisesRegex(
+                frappe.ValidationError, "No other transfer method allows this amount"
+            ):
+                validate_transfer_method_limit("NEFT", 2_000)
+
+        self.assertTrue(get_transfer_method_limits().is_valid("NEFT", 2_000))
+
+        with self.assertRaisesRegex(frappe.ValidationError, "Please use"):
+            validate_transfer_method_limit("IMPS", 6_00_000)
+
+    def test_assign_transfer_methods(self):
+        bank_details = {
+            "party_bank_account": "_Test Bank Account",
+            "party_bank_account_no": "1234567890",
+            "party_bank_ifsc": "SBIN0000001",
+        }
+        upi_details = {
+            "party_bank_account": "_Test Bank Account",
+            "party_upi_id": "test@upi",
+        }
+        payment_entries = [
+            # (name, paid_amount, payment_transfer_method, extra fields)
+            ("PE-1", 6_00_000, "IMPS", bank_details),
+            ("PE-2", 1_00_000, "RTGS", bank_details),
+            ("PE-3", 1_00_000, "NEFT", bank_details),
+            ("PE-4", 1_00_000, "", bank_details),
+            ("PE-5", 1_000, "NEFT", upi_details),
+            ("PE-6", 1_000, "Link", {}),
+            # no Party Bank Account
+            ("PE-7", 1_000, "NEFT", {"party_upi_id": "test@upi"}),
+            # bank details are preferred over UPI
+            ("PE-8", 1_000, "UPI", {**bank_details, **upi_details}),
+        ]
+        payment_entries = [
+            {
+                "name": name,
+                "paid_amount": amount,
+                "payment_transfer_method": method,
+                **extra,
+            }
+            for name, amount, method, extra in payment_entries
+        ]
+
+        self.assertEqual(
+            assign_transfer_methods(payment_entries),
+            {"PE-1": "RTGS", "PE-2": "IMPS", "PE-4": "IMPS", "PE-5": "UPI"},
+        )
+
+        self.assertEqual(
+            assign_transfer_methods(payment_entries, only_invalid=False),
+            {
+                "PE-1": "RTGS",
+                "PE-2": "IMPS",
+                "PE-3": "IMPS",
+                "PE-4": "IMPS",
+                "PE-5": "UPI",
+                "PE-8": "IMPS",
+            },
+        )
+
+    def test_payout_selection(self):
+        self.assertEqual(
+            get_filters_list({"party_type": "Employee", "paid_amount": [">", 100]}),
+            [["party_type", "=", "Employee"], ["paid_amount", ">", 100]],
+        )
+
+        self.assertEqual(get_chunks(1200), [(0, 499), (500, 999), (1000, 1199)])
+        self.assertEqual(get_chunks(500), [(0, 499)])
+        self.assertEqual(get_chunks(0), [])
+
+    def test_payout_locks(self):
+        names = ["_Test PE Lock 1", "_Test PE Lock 2"]
+        self.addCleanup(release_payout_locks, [*names, "_Test PE Lock 3"], "owner-1")
+        self.addCleanup(release_payout_locks, ["_Test PE Lock 3"], "owner-2")
+
+        tokens = acquire_payout_locks(names, "owner-1")
+        self.assertEqual(set(tokens), set(names))
+
+        # held by other owner
+        self.assertEqual(
+            list(acquire_payout_locks([*names, "_Test PE Lock 3"], "owner-2")),
+            ["_Test PE Lock 3"],
+        )
+
+        # failed contending acquire keeps the holder's token valid
+        self.assertFalse(acquire_payout_locks(names, "owner-3"))
+
+        for name in names:
+            self.assertTrue(is_valid_fencing_token(name, tokens[name]))
+
+        # release and renewal by other owner are ignored
+        release_payout_locks(names, "owner-2")
+        self.assertEqual(renew_payout_locks(names, "owner-2"), names)
+        self.assertEqual(renew_payout_locks(names, "owner-1"), [])
+        self.assertFalse(acquire_payout_locks(names, "owner-3"))
+
+        release_payout_locks(names, "owner-1")
+        new_tokens = acquire_payout_locks(names, "owner-1")
+
+        # stale token after re-acquiring
+        self.assertGreater(new_tokens[names[0]], tokens[names[0]])
+        self.assertFalse(is_valid_fencing_token(names[0], tokens[names[0]]))
+        self.assertTrue(is_valid_fencing_token(names[0], new_tokens[names[0]]))
+
+    def test_queue_submissions(self):
+        docs = []
+        for idx in range(3):
+            doc = frappe.new_doc("Payment Entry")
+            doc.name = f"_Test PE Queue {idx}"
+            docs.append(doc)
+
+        run_id = queue_submissions(docs)
+        submissions = frappe.get_all(
+            "Submission Queue",
+            filters={"job_id": ("like", f"%::{run_id}:%")},
+            fields=["name", "ref_doctype", "ref_docname"],
+        )
+
+        self.assertEqual(
+            sorted(row.ref_docname for row in submissions), [doc.name for doc in docs]
+        )
+        self.assertEqual({row.ref_doctype for row in submissions}, {"Payment Entry"})
+        self.assertEqual(get_submission_run_status(run_id), {"Queued": 3})
+
+        # locked till the job runs, like `queue_submission`
+        for row in submissions:
+            submission = frappe.get_doc(
+                {"doctype": "Submission Queue", "name": row.name}
+            )
+            self.addCleanup(submission.unlock)
+            self.assertTrue(submission.is_locked)
+
+        # all the jobs are enqueued at once, after commit
+        with patch(f"{SUBMISSION_QUEUE_MODULE}.get_queue") as get_queue:
+            get_queue.assert_not_called()
+            frappe.db.after_commit.run()
+
+        get_queue.assert_called_once_with("default", is_async=True)
+        jobs = get_queue.return_value.enqueue_many.call_args.args[0]
+
+        self.assertEqual(
+            sorted(job.job_id for job in jobs),
+            sorted(create_job_id(f"{run_id}:{row.name}") for row in submissions),
+        )
+        self.assertEqual(
+            {job.kwargs["kwargs"]["__name"] for job in jobs},
+            {row.name for row in submissions},
+        )
+
+    def test_apply_roles_clears_payment_permissions(self):
+        roles = [
+            {
+                "doctype": "ToDo",
+                "role_name": "Accounts User",
+                "permlevels": 0,
+                "permissions": ["read", "write"],
+            }
+        ]
+
+        version = get_cache_version(PAYMENT_PERMISSION_VERSION)
+        changes = apply_roles_to_doctype(roles)
+
+        self.assertTrue(changes["created"] or changes["updated"])
+        self.assertGreater(get_cache_version(PAYMENT_PERMISSION_VERSION), version)
+
+        # nothing changed
+        version = get_cache_version(PAYMENT_PERMISSION_VERSION)
+        self.assertEqual(apply_roles_to_doctype(roles), {"created": [], "updated": []})
+        self.assertEqual(get_cache_version(PAYMENT_PERMISSION_VERSION), version)
+
+    def test_sites_to_sync(self):
+        progress = {
+            "completed.site": {"status": "Completed", "version": "v2"},
+            "outdated.site": {"status": "Completed", "version": "v1"},
+            "failed.site": {"status": "Failed", "version": "v2"},
+            "skipped.site": {"status": "Skipped", "version": "v2"},
+        }
+        sites = [*progress, "new.site"]
+
+        # skipped only if completed with the same version
+        self.assertEqual(
+            get_sites_to_sync(sites, progress, "v2"),
+            ["outdated.site", "failed.site", "skipped.site", "new.site"],
+        )
+        self.assertEqual(
+            get_sites_to_sync(sites, progress, "v3"),
+            sites,
+        )
+        self.assertEqual(get_sites_to_sync(sites, {}, "v2"), sites)
+
+    def test_normalize_setup_value(self):
+        # custom fields and property setters: `0` is a value
+        self.assertEqual(_normalize_value(None), _normalize_value(""))
+        self.assertNotEqual(_normalize_value(0, "Check"), _normalize_value(None))
+        self.assertEqual(_normalize_value(True, "Check"), _normalize_value(1, "Check"))
+
+        # values differing only by type
+        for fieldtype in ("Check", "Int", "Float", "Data", "Small Text", None):
+            for value, existing in ((1, "1"), (0, "0"), (True, "1"), (False, "0")):
+                self.assertEqual(
+                    _normalize_value(value, fieldtype),
+                    _normalize_value(existing, fieldtype),
+                )
+
+        self.assertEqual(
+            _normalize_value(1.5, "Float"), _normalize_value("1.50", "Float")
+        )
+        self.assertNotEqual(_normalize_value(1, "Check"), _normalize_value(0, "Check"))
+        self.assertNotEqual(_normalize_value(1, "Data"), _normalize_value("01", "Data"))
+
+        # workflows: unset numbers and checks are loaded as `0`
+        self.assertEqual(
+            _normalize_value(0, "Check", empty_as_unset=True),
+            _normalize_value(None, "Check", empty_as_unset=True),
+        )
+        self.assertEqual(
+            _normalize_value("0", "Int", empty_as_unset=True),
+            _normalize_value("", "Int", empty_as_unset=True),
+        )
+        self.assertEqual(
+            _normalize_value(False, "Data", empty_as_unset=True),
+            _normalize_value("", "Data", empty_as_unset=True),
+        )
+        self.assertNotEqual(
+            _normalize_value(1, "Check", empty_as_unset=True),
+            _normalize_value(None, "Check", empty_as_unset=True),
+        )
+
+    def test_party_contact_details(self):
+        contact = frappe.get_doc(
+            {
+                "doctype": "Contact",
+                "first_name": "_Test Payout Contact",
+                "email_ids": [{"email_id": "payout@example.com", "is_primary": 1}],
+                "phone_nos": [{"phone": "9876543210", "is_primary_mobile_no": 1}],
+            }
+        ).insert(ignore_permissions=True)
+        self.addCleanup(clear_party_contact_details, contact)
+
+        details = get_party_contact_details("Customer", None, contact.name)
+        self.assertEqual(
+            details,
+            {"contact_mobile": "9876543210", "contact_email": "payout@example.com"},
+        )
+
+        # each party expires on its own
+        ttl = frappe.cache.ttl(get_cache_key(f"Contact:{contact.name}"))
+        self.assertTrue(0 < ttl <= CONTACT_DETAILS_CACHE_TTL)
+
+        # update without hooks is served stale from cache till read fresh
+        frappe.db.set_value("Contact", contact.name, "mobile_no", "9999999999")
+        del frappe.local.party_contact_details
+
+        self.assertEqual(
+            get_party_contact_details("Customer", None, contact.name)["contact_mobile"],
+            "9876543210",
+        )
+        self.assertEqual(
+            get_party_contact_details("Customer", None, contact.name, cached=False)[
+                "contact_mobile"
+            ],
+            "9999999999",
+        )
+
+        del frappe.local.party_contact_details
+        self.assertEqual(
+            get_party_contact_details("Customer", None, contact.name)["contact_mobile"],
+            "9999999999",
+        )
+
+    def test_normalize_mobile_no(self):
+        for mobile_no in ("9876543210", "+91 98765-43210", "098765 43210"):
+            self.assertEqual(normalize_mobile_no(mobile_no), "9876543210")
+
+        self.assertEqual(normalize_mobile_no(None), "")
+
+    def test_integration_request_buffer(self):
+        self.clear_integration_request_buffer()
+        self.addCleanup(self.clear_integration_request_buffer)
+
+        with patch(
+            f"{INTEGRATION_REQUEST_MODULE}.enqueue_flush_integration_requests"
+        ) as enqueue_flush:
+            for idx in range(FLUSH_SIZE - 1):
+                enqueue_integration_request(request_id=f"_Test IR {idx}", data={})
+
+            enqueue_flush.assert_not_called()
+            self.assertEqual(frappe.cache.llen(BUFFER_KEY), FLUSH_SIZE - 1)
+
+            # flush size
+            enqueue_integration_request(request_id="_Test IR", data={})
+            self.assertEqual(enqueue_flush.call_count, 1)
+
+            # flush interval (age of the oldest buffered log)
+            self.clear_integration_request_buffer()
+            enqueue_integration_request(request_id="_Test IR", data={})
+            self.assertEqual(enqueue_flush.call_count, 1)
+
+            frappe.cache.set(
+                frappe.cache.make_key(BUFFER_SINCE_KEY), time.time() - FLUSH_INTERVAL
+            )
+            enqueue_integration_request(request_id="_Test IR", data={})
+            self.assertEqual(enqueue_flush.call_count, 2)
+
+    def test_flush_integration_requests(self):
+        self.clear_integration_request_buffer()
+        self.addCleanup(self.clear_integration_request_buffer)
+
+        # flush commits the inserted logs
+        self.addCleanup(frappe.db.commit)
+        self.addCleanup(
+            frappe.db.delete,
+            "Integration Request",
+            {"request_id": ("like", "_Test IR Flush%")},
+        )
+
+        def buffer_logs(*indexes):
+            with patch(
+                f"{INTEGRATION_REQUEST_MODULE}.enqueue_flush_integration_requests"
+            ):
+                for idx in indexes:
+                    enqueue_integration_request(
+                        request_id=f"_Test IR Flush {idx}", data={"idx": idx}
+                    )
+
+        def get_flushed_logs():
+            return frappe.get_all(
+                "Integration Request",
+                filters={"request_id": ("like", "_Test IR Flush%")},
+                order_by="request_id asc",
+                pluck="request_id",
+            )
+
+        # scheduler flushes the leftover logs (below flush size)
+        self.assertIn(
+            f"{INTEGRATION_REQUEST_MODULE}.flush_integration_requests",
+            frappe.get_hooks("scheduler_events")["all"],
+        )
+
+        buffer_logs(0, 1, 2)
+        flush_integration_requests()
+
+        self.assertEqual(
+            get_flushed_logs(), [f"_Test IR Flush {idx}" for idx in range(3)]
+        )
+        self.assertEqual(frappe.cache.llen(BUFFER_KEY), 0)
+
+        # bad log is moved to the dead-letter list, others are inserted
+        buffer_logs(3)
+        frappe.cache.rpush(BUFFER_KEY, "{invalid")
+        buffer_logs(4)
+        flush_integration_requests()
+
+        self.assertEqual(
+            get_flushed_logs(), [f"_Test IR Flush {idx}" for idx in range(5)]
+        )
+        self.assertEqual(frappe.cache.lrange(DEAD_LETTER_KEY, 0, -1), [b"{invalid"])
+        self.assertEqual(frappe.cache.llen(BUFFER_KEY), 0)
+
+        # flush in progress (logs are kept in the buffer)
+        frappe.cache.set(frappe.cache.make_key(FLUSH_LOCK_KEY), 1)
+        buffer_logs(5)
+        flush_integration_requests()
+
+        self.assertEqual(len(get_flushed_logs()), 5)
+        self.assertEqual(frappe.cache.llen(BUFFER_KEY), 1)
+
+    def test_archive_integration_requests(self):
+        # (name, status, referenced, age in days)
+        records = [
+            ("_Test IR Archive 1", "Completed", False, 100),  # archived
+            ("_Test IR Archive 2", "Completed", True, 100),
+            ("_Test IR Archive 3", "Failed", False, 100),
+            ("_Test IR Archive 4", "Failed", True, 400),  # archived
+            ("_Test IR Archive 5", "Completed", False, 10),
+        ]
+        names = [record[0] for record in records]
+
+        # archive job commits each chunk
+        self.addCleanup(frappe.db.commit)
+        self.addCleanup(
+            frappe.db.delete, "Integration Request", {"name": ("in", names)}
+        )
+
+        frappe.db.bulk_insert(
+            "Integration Request",
+            (
+                "name",
+                "creation",
+                "modified",
+                "owner",
+                "modified_by",
+                "status",
+                "reference_doctype",
+                "reference_docname",
+            ),
+            [
+                (
+                    name,
+                    add_days(now_datetime(), -age),
+                    add_days(now_datetime(), -age),
+                    "Administrator",
+                    "Administrator",
+                    status,
+                    "Payment Entry" if referenced else None,
+                    "_Test Payment Entry" if referenced else None,
+                )
+                for name, status, referenced, age in records
+            ],
+        )
+
+        archive_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_folder.cleanup)
+
+        archive_path = os.path.join(archive_folder.name, "archive.jsonl.gz")
+        append_to_archive(archive_path, [{"name": "_Test IR Archived Earlier"}])
+
+        with (
+            patch(
+                f"{INTEGRATION_REQUEST_MODULE}.get_archive_path",
+                return_value=archive_path,
+            ),
+            patch(f"{INTEGRATION_REQUEST_MODULE}.ARCHIVE_CHUNK_SIZE", 1),
+        ):
+            # nothing is deleted if archiving fails
+            with patch(
+                f"{INTEGRATION_REQUEST_MODULE}.append_to_archive", side_effect=OSError
+            ):
+                self.assertRaises(OSError, archive_integration_requests)
+
+            self.assertEqual(
+                frappe.db.count("Integration Request", {"name": ("in", names)}), 5
+            )
+
+            with patch.object(
+                frappe.local.db, "commit", wraps=frappe.local.db.commit
+            ) as commit:
+                archive_integration_requests()
+
+        # a commit per chunk (of 1 record)
+        self.assertGreaterEqual(commit.call_count, 2)
+
+        self.assertEqual(
+            frappe.get_all(
+                "Integration Request",
+                filters={"name": ("in", names)},
+                order_by="name asc",
+                pluck="name",
+            ),
+            [names[1], names[2], names[4]],
+        )
+
+        # appended to the existing monthly file
+        with gzip.open(archive_path, "rt", encoding="utf-8") as archive:
+            archived = [json.loads(line)["name"] for line in archive]
+
+        self.assertEqual(archived[0], "_Test IR Archived Earlier")
+        self.assertIn(names[0], archived)
+        self.assertIn(names[3], archived)
+
+    def clear_integration_request_buffer(self):
+        frappe.cache.delete(
+            *(
+                frappe.cache.make_key(key)
+                for key in (
+                    BUFFER_KEY,
+                    BUFFER_SINCE_KEY,
+                    DEAD_LETTER_KEY,
+                    FLUSH_LOCK_KEY,
+                )
+            )
+        )
+
+    def test_notification_templates(self):
+        message = render_notification_template(
+            NOTIFICATION_TEMPLATE.OTP_CODE.value,
+            {
+                "otp": "123456",
+                "paid_amount": "₹ 1,000.00",
+                "payment_entries": "PE-1",
+                "expires_in": 3,
+            },
+        )
+        for text in ("123456", "<strong>₹ 1,000.00</strong>", "PE-1", "3 minutes"):
+            self.assertIn(text, message)
+
+        message = render_notification_template(
+            NOTIFICATION_TEMPLATE.PAYOUT_SUMMARY.value,
+            {
+                "total": 3,
+                "paid": ["PE-1", "PE-2"],
+                "paid_amount": 200,
+                "failed": ["PE-3"],
+            },
+        )
+        self.assertIn("Payout summary of 3 Payment Entries", message)
+        self.assertIn("<li>PE-3</li>", message)
+
+        # per-locale variants
+        register_notification_template(
+            "_test_notification",
+            {"default": "Hello {{ name }}", "hi": "Namaste {{ name }}"},
+        )
+        self.assertEqual(
+            render_notification_template("_test_notification", {"name": "A"}, "hi-IN"),
+            "Namaste A",
+        )
+        self.assertEqual(
+            render_notification_template("_test_notification", {"name": "A"}, "fr"),
+            "Hello A",
+        )
+
+        # re-registered template is recompiled
+        register_notification_template("_test_notification", "Hi {{ name }}")
+        self.assertEqual(
+            render_notification_template("_test_notification", {"name": "A"}, "fr"),
+            "Hi A",
+        )
+
+        # hook templates of the site override the registered ones (till cache is cleared)
+        self.addCleanup(clear_notification_templates)
+        clear_notification_templates()
+
+        with patch(
+            "payment_integration_utils.payment_integration_utils.utils.notification.frappe.get_hooks",
+            return_value=[f"{__name__}.TEST_NOTIFICATION_TEMPLATES"],
+        ):
+            self.assertEqual(
+                render_notification_template("_test_notification", {"name": "A"}),
+                "Hook A",
+            )
+
+        self.assertEqual(
+            render_notification_template("_test_notification", {"name": "A"}), "Hook A"
+        )
+
+        clear_notification_templates()
+        self.assertEqual(
+            render_notification_template("_test_notification", {"name": "A"}), "Hi A"
+        )
+
+        self.assertRaises(
+            frappe.ValidationError, render_notification_template, "_test_missing"
+        )
+
     def test_to_hyphenated(self):
         self.assertEqual(to_hyphenated("Hello World"), "Hello-World")
         self.assertEqual(to_hyphenated("Hello World!"), "Hello-World-")
+
+    def test_payload_packing(self):
+        payload = {"status": "processed", "amount": 10000}
+        self.assertEqual(pack_payload(payload), '{"amount":10000,"status":"processed"}')
+        self.assertEqual(unpack_payload(pack_payload(payload)), pretty_json(payload))
+        self.assertEqual(pack_payload(None), "")
+
+        # compressed above threshold
+        payload = {"items": [{"id": idx, "status": "processed"} for idx in range(2000)]}
+        packed = pack_payload(payload)
+        self.assertTrue(packed.startswith(COMPRESSED_PREFIX))
+        self.assertEqual(unpack_payload(packed), pretty_json(payload))
+
+        # capped, keeping head and tail
+        packed = unpack_payload(pack_payload("a" * MAX_PAYLOAD_SIZE + "b" * 10))
+        self.assertTrue(packed.startswith("a"))
+        self.assertTrue(packed.endswith("b" * 10))
+        self.assertIn("<10 characters truncated>", packed)
+
+    def test_payload_redaction(self):
+        payload = {
+            "amount": 10000,
+            "fund_account": {"bank_account": {"account_number": "1234567890"}},
+            "notes": [{"api_key": "abc"}],
+        }
+
+        # credentials only (at any depth), payout details are kept
+        self.assertEqual(
+            redact_payload(payload),
+            {
+                "amount": 10000,
+                "fund_account": {"bank_account": {"account_number": "1234567890"}},
+                "notes": [{"api_key": "*****"}],
+            },
+        )
+
+        # headers (case insensitive) and JSON text
+        self.assertEqual(
+            redact_payload({"Authorization": "Basic abc", "Content-Type": "json"}),
+            {"Authorization": "*****", "Content-Type": "json"},
+        )
+        self.assertEqual(
+            redact_payload('{"X-Api-Key": "secret"}'), {"X-Api-Key": "*****"}
+        )
+        self.assertEqual(redact_payload('{"amount": 100}'), '{"amount": 100}')
+        self.assertEqual(redact_payload("plain text"), "plain text")
+
+        # more keys with site config
+        with patch.dict(
+            frappe.local.conf,
+            {"integration_request_sensitive_keys": ["Account-Number"]},
+        ):
+            self.assertEqual(
+                redact_payload(payload)["fund_account"]["bank_account"],
+                {"account_number": "*****"},
+            )
+
+        # packing does not change the payload
+        packed = pack_payload({"Authorization": "Basic abc"})
+        self.assertEqual(packed, '{"Authorization":"Basic abc"}')
+        self.assertEqual(
+            get_integration_request_payload(
+                {"request_headers": packed}, "request_headers"
+            ),
+            {"Authorization": "Basic abc"},
+        )
+
+        # stored values are redacted
+        values = get_integration_request_values(
+            request_headers={"Authorization": "Basic abc"}, data=payload
+        )
+        self.assertEqual(values["request_headers"], '{"Authorization":"*****"}')
+        self.assertIn("1234567890", values["data"])
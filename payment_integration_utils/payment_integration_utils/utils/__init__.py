@@ -1,15 +1,40 @@
 import re
-from datetime import datetime
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, time, timedelta
+from decimal import ROUND_HALF_DOWN, ROUND_HALF_EVEN, ROUND_HALF_UP, Decimal
+from zoneinfo import ZoneInfo
 
 import frappe
 from frappe import _
-from frappe.utils import DateTimeLikeObject, add_to_date, flt, get_timestamp, getdate
+from frappe.utils import (
+    DateTimeLikeObject,
+    add_to_date,
+    flt,
+    get_system_timezone,
+    get_timestamp,
+    getdate,
+)
 
-from payment_integration_utils.constants import SECONDS_IN_A_DAY
+from payment_integration_utils.constants import SECONDS_IN_A_DAY, SECONDS_IN_AN_HOUR
+from payment_integration_utils.payment_integration_utils.utils.integration_request import (
+    enqueue_integration_request,
+    log_integration_request,
+    pretty_json,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# {(timezone, year): UTC offset in seconds | None (if offset varies in the year, eg. DST)}
+_TIMEZONE_OFFSETS: dict[tuple[str, int], int | None] = {}
 
 
 ################# PAYMENT UTILS #################
-def is_already_paid(amended_from: str | None = None) -> bool | int:
+def is_already_paid(amended_from: str | None = None) -> bool:
     """
     Check if the Payment Entry is already paid via Bank Online Payment.
 
@@ -18,9 +43,47 @@ def is_already_paid(amended_from: str | None = None) -> bool | int:
     if not amended_from:
         return False
 
-    return frappe.db.get_value(
-        "Payment Entry", amended_from, "make_bank_online_payment"
-    )
+    return is_already_paid_many([amended_from])[amended_from]
+
+
+def is_already_paid_many(names: Iterable[str | None]) -> dict[str, bool]:
+    """
+    Check if the Payment Entries are already paid via Bank Online Payment.
+
+    Entries not checked yet in the request are checked with a single query,
+    and results are memoized for the rest of the request.
+
+    :param names: Payment Entry names (Eg. `amended_from` of amended entries).
+
+    ---
+    Example:
+    ```py
+    is_already_paid_many(["PE-0001", "PE-0002"]) ==> {"PE-0001": True, "PE-0002": False}
+    ```
+    """
+    memo = _get_already_paid_memo()
+    names = {name for name in names if name}
+
+    if to_check := [name for name in names if name not in memo]:
+        paid = set(
+            frappe.get_all(
+                "Payment Entry",
+                filters={"name": ("in", to_check), "make_bank_online_payment": 1},
+                pluck="name",
+            )
+        )
+
+        for name in to_check:
+            memo[name] = name in paid
+
+    return {name: memo[name] for name in names}
+
+
+def _get_already_paid_memo() -> dict[str, bool]:
+    if not hasattr(frappe.local, "payment_entry_already_paid"):
+        frappe.local.payment_entry_already_paid = {}
+
+    return frappe.local.payment_entry_already_paid
 
 
 ################# APIs RELATED #################
@@ -64,6 +127,100 @@ def get_end_of_day_epoch(date: DateTimeLikeObject = None) -> int:
     return int(get_timestamp(date)) + (SECONDS_IN_A_DAY - 1)
 
 
+def get_epoch_windows(
+    from_date: DateTimeLikeObject,
+    to_date: DateTimeLikeObject = None,
+    interval: str = "day",
+    timezone: str | None = None,
+) -> Iterator[tuple[int, int]]:
+    """
+    Yield `(start_epoch, end_epoch)` windows of a day or an hour over the date range.
+
+    Timezone is resolved once per call, and its UTC offset is cached per year per process.
+    If the offset is the same over all the years of the range (Eg. `Asia/Kolkata`),
+    windows are computed with integer arithmetic, else each day is converted.
+
+    :param from_date: Start date of the range.
+    :param to_date: End date of the range (inclusive). Defaults to `from_date`.
+    :param interval: `day` or `hour`.
+    :param timezone: Timezone of the dates. Defaults to System Settings' timezone.
+    ---
+    Example:
+    ```
+    list(get_epoch_windows("2024-05-30", "2024-05-31", timezone="Asia/Kolkata")) ==> [
+        (1717007400, 1717093799),
+        (1717093800, 1717180199),
+    ]
+    ```
+    """
+    if interval not in ("day", "hour"):
+        frappe.throw(_("Invalid interval: {0}. Must be day or hour.").format(interval))
+
+    timezone = timezone or get_system_timezone()
+    step = SECONDS_IN_A_DAY if interval == "day" else SECONDS_IN_AN_HOUR
+    from_date = getdate(from_date)
+    to_date = getdate(to_date or from_date)
+
+    offsets = {
+        get_timezone_offset(timezone, year)
+        for year in range(from_date.year, to_date.year + 1)
+    }
+    offset = offsets.pop() if len(offsets) == 1 else None
+
+    if offset is not None:
+        start = (from_date.toordinal() - UNIX_EPOCH_ORDINAL) * SECONDS_IN_A_DAY - offset
+        end = (to_date.toordinal() - UNIX_EPOCH_ORDINAL + 1) * SECONDS_IN_A_DAY - offset
+
+        for window_start in range(start, end, step):
+            yield (window_start, window_start + step - 1)
+
+        return
+
+    # offset varies (DST or changed over the years), so day can be of 23 or 25 hours
+    zone = ZoneInfo(timezone)
+    day_start = int(datetime.combine(from_date, time.min, zone).timestamp())
+
+    for day in range(to_date.toordinal() - from_date.toordinal() + 1):
+        next_day = from_date + timedelta(days=day + 1)
+        next_day_start = int(datetime.combine(next_day, time.min, zone).timestamp())
+
+        if interval == "day":
+            yield (day_start, next_day_start - 1)
+        else:
+            for window_start in range(day_start, next_day_start, step):
+                yield (window_start, min(window_start + step, next_day_start) - 1)
+
+        day_start = next_day_start
+
+
+def get_timezone_offset(timezone: str, year: int | None = None) -> int | None:
+    """
+    Get the fixed UTC offset (in seconds) of the timezone in the year.
+
+    Returns `None` if the offset varies within the year (Eg. DST).
+    Cached per process.
+
+    :param timezone: Timezone name (Eg. `Asia/Kolkata`).
+    :param year: Year of the offset. Defaults to current year.
+    """
+    year = year or getdate().year
+    key = (timezone, year)
+
+    if key in _TIMEZONE_OFFSETS:
+        return _TIMEZONE_OFFSETS[key]
+
+    zone = ZoneInfo(timezone)
+    offsets = {
+        datetime(year, month, 1, tzinfo=zone).utcoffset() for month in range(1, 13)
+    }
+    offsets.add(datetime(year, 12, 31, 23, 59, 59, tzinfo=zone).utcoffset())
+
+    offset = int(offsets.pop().total_seconds()) if len(offsets) == 1 else None
+    _TIMEZONE_OFFSETS[key] = offset
+
+    return offset
+
+
 def get_str_datetime_from_epoch(epoch_time: int) -> str:
     """
     Get Local datetime from Epoch Time.\n
@@ -92,7 +249,8 @@ def rupees_to_paisa(amount: float | int) -> int:
 
     ```
     """
-    return int(flt(amount, 2) * 100)
+    # exact decimal arithmetic as `int(flt(0.29, 2) * 100)` is `28`
+    return _rupees_to_paisa_exact(amount, get_rounding_method())
 
 
 def paisa_to_rupees(amount: int) -> int | float:
@@ -110,63 +268,110 @@ def paisa_to_rupees(amount: int) -> int | float:
     return flt(amount / 100, 2)
 
 
+def rupees_to_paisa_many(amounts: Iterable) -> list[int]:
+    """
+    Convert the given amounts in Rupees to Paisa.
+
+    Same rounding as `rupees_to_paisa` (as per System Settings' rounding method),
+    computed with exact decimal arithmetic, or vectorized with NumPy (if installed)
+    for NumPy arrays and large lists.
+
+    Note:
+        - Float noise below `1e-6` Paisa is ignored to detect the halves,
+          so `615577.455` is always `61557746` (not `61557745` as `615577.455 * 100` is `61557745.49999999`).
+        - `None` (or empty) amounts are `0` in both exact and vectorized conversion.
+
+    :param amounts: List or array-like of amounts in Rupees.
+    :return: List of Paisa (NumPy `int64` array if `amounts` is a NumPy array).
+
+    Example:
+    ```
+    rupees_to_paisa_many([100, 79.899, 0.29]) ==> [10000, 7990, 29]
+    ```
+    """
+    rounding_method = get_rounding_method()
+
+    if numpy is not None and (
+        isinstance(amounts, numpy.ndarray)
+        or (isinstance(amounts, list | tuple) and len(amounts) >= 1000)
+    ):
+        if isinstance(amounts, numpy.ndarray):
+            return _rupees_to_paisa_vectorized(amounts, rounding_method)
+
+        # same as exact (`None` is `NaN` for NumPy)
+        amounts = [amount or 0 for amount in amounts]
+        return _rupees_to_paisa_vectorized(amounts, rounding_method).tolist()
+
+    return [_rupees_to_paisa_exact(amount, rounding_method) for amount in amounts]
+
+
+def paisa_to_rupees_many(amounts: Iterable) -> list[int | float]:
+    """
+    Convert the given amounts in Paisa to Rupees.
+
+    :param amounts: List or array-like of amounts in Paisa.
+    :return: List of Rupees (NumPy array if `amounts` is a NumPy array).
+
+    Example:
+    ```
+    paisa_to_rupees_many([10000, 7990]) ==> [100, 79.9]
+    ```
+    """
+    if numpy is not None and isinstance(amounts, numpy.ndarray):
+        return amounts / 100
+
+    # division of integer by 100 is already correctly rounded
+    return [
+        amount / 100 if isinstance(amount, int) else paisa_to_rupees(amount)
+        for amount in amounts
+    ]
+
+
+PAISA_PRECISION = Decimal("1e-6")
+
+
+def get_rounding_method() -> str:
+    return frappe.get_system_settings("rounding_method") or "Banker's Rounding (legacy)"
+
+
+def _rupees_to_paisa_exact(amount, rounding_method: str) -> int:
+    if isinstance(amount, float):
+        # shortest repr is the value user has entered (Eg. `79.9` not `79.900000000000005684`)
+        amount = repr(amount)
+
+    paisa = (Decimal(amount or 0) * 100).quantize(PAISA_PRECISION, ROUND_HALF_EVEN)
+
+    if rounding_method == "Banker's Rounding":
+        rounding = ROUND_HALF_EVEN
+    elif rounding_method == "Commercial Rounding":
+        rounding = ROUND_HALF_UP  # away from zero
+    else:
+        # legacy: half towards +infinity
+        rounding = ROUND_HALF_UP if paisa >= 0 else ROUND_HALF_DOWN
+
+    return int(paisa.quantize(Decimal(1), rounding))
+
+
+def _rupees_to_paisa_vectorized(amounts, rounding_method: str):
+    paisa = numpy.round(numpy.asarray(amounts, dtype=float) * 100, 6)
+    floor = numpy.floor(paisa)
+    is_half = (paisa - floor) == 0.5
+
+    if rounding_method == "Banker's Rounding":
+        half = numpy.where(floor % 2 == 0, floor, floor + 1)
+    elif rounding_method == "Commercial Rounding":
+        half = numpy.where(paisa > 0, floor + 1, floor)
+    else:
+        half = floor + 1
+
+    return numpy.where(is_half, half, numpy.rint(paisa)).astype(numpy.int64)
+
+
 ################# HTML RELATED #################
 def get_unordered_list(items: list[str]) -> str:
     return "<ul>" + "".join([f"<li>{item}</li>" for item in items]) + "</ul>"
 
 
-################# WRAPPERS #################
-def enqueue_integration_request(**kwargs):
-    frappe.enqueue(log_integration_request, **kwargs)
-
-
-def log_integration_request(
-    url=None,
-    integration_request_service=None,
-    request_id=None,
-    request_headers=None,
-    data=None,
-    status=None,
-    output=None,
-    error=None,
-    reference_doctype=None,
-    reference_name=None,
-    is_remote_request=False,
-):
-    def get_status():
-        if status:
-            return status
-
-        return "Failed" if error else "Completed"
-
-    return frappe.get_doc(
-        {
-            "doctype": "Integration Request",
-            "integration_request_service": integration_request_service,
-            "request_id": request_id,
-            "url": url,
-            "request_headers": pretty_json(request_headers),
-            "data": pretty_json(data),
-            "output": pretty_json(output),
-            "error": pretty_json(error),
-            "status": get_status(),
-            "reference_doctype": reference_doctype,
-            "reference_docname": reference_name,
-            "is_remote_request": is_remote_request,
-        }
-    ).insert(ignore_permissions=True)
-
-
-def pretty_json(obj):
-    if not obj:
-        return ""
-
-    if isinstance(obj, str):
-        return obj
-
-    return frappe.as_json(obj, indent=4)
-
-
 ### String Manipulation ###
 def to_hyphenated(text):
     """
@@ -16,6 +16,7 @@ Reference: https://github.com/frappe/frappe/blob/13fbdbb0c478099dfac6c70b7e05eef
 import os
 import pickle
 from base64 import b32encode, b64decode, b64encode
+from dataclasses import dataclass
 
 import frappe
 import frappe.defaults
@@ -31,18 +32,40 @@ from frappe.twofactor import (
     send_token_via_sms,
     set_default,
 )
-from frappe.utils import fmt_money
-from frappe.utils.password import decrypt, encrypt
+from frappe.utils import cint, fmt_money
 
 from payment_integration_utils.payment_integration_utils.constants.enums import BaseEnum
+from payment_integration_utils.payment_integration_utils.constants.notifications import (
+    NOTIFICATION_TEMPLATE,
+)
 from payment_integration_utils.payment_integration_utils.constants.roles import (
     ROLE_PROFILE,
 )
+from payment_integration_utils.payment_integration_utils.utils.cache import (
+    get_snapshot,
+    invalidate_snapshot,
+)
+from payment_integration_utils.payment_integration_utils.utils.notification import (
+    render_notification_template,
+)
+from payment_integration_utils.payment_integration_utils.utils.otp_secret import (
+    decrypt_secret,
+    encrypt_secret,
+    make_hotp_verifier,
+    make_totp_verifier,
+    verify_hotp,
+    verify_totp,
+)
+from payment_integration_utils.payment_integration_utils.utils.payout_selection import (
+    SELECTION_CHUNK_SIZE,
+    resolve_payment_entries,
+)
 
 # ! Important: Do not use `cache.get_value` or `cache.set_value` as it not working as expected. Use `cache.get` and `cache.set` instead.
 
 ##### Constants #####
 OTP_ISSUER = "Online Bank Payments"
+PAYMENT_AUTH_SETTINGS = "payment_auth_settings"
 
 
 class AUTH_METHOD(BaseEnum):
@@ -58,13 +81,18 @@ class AUTH_METHOD(BaseEnum):
 
 ##### APIs #####
 @frappe.whitelist()
-def generate_otp(payment_entries: list[str] | str) -> dict | None:
+def generate_otp(
+    payment_entries: list[str] | str | None = None,
+    selection: dict | str | None = None,
+) -> dict | None:
     """
     Generate and send OTP for Payment Entries.
 
     Generates `auth_id` for the user and stores the data in cache.
+    Selected Payment Entries are resolved and frozen with the auth session.
 
     :param payment_entries: List of payment entry names.
+    :param selection: List filters and exclusions (see `utils.payout_selection`), if `payment_entries` not given.
 
     ---
     Example response:
@@ -74,11 +102,11 @@ def generate_otp(payment_entries: list[str] | str) -> dict | None:
         "auth_id": "12345678",
         "setup": True,
         "prompt": "Enter verification code from your OTP app",
+        "count": 2,
     }
     ```
     """
-    if isinstance(payment_entries, str):
-        payment_entries = frappe.parse_json(payment_entries)
+    payment_entries = resolve_payment_entries(payment_entries, selection)
 
     # checks permission and other tasks before sending OTP
     run_before_payment_authentication(payment_entries, throw=True)
@@ -116,7 +144,9 @@ def reset_otp_secret(user: str):
     if ROLE_PROFILE.PAYMENT_AUTHORIZER.value not in frappe.get_roles():
         frappe.throw(_("You do not have permission to reset OTP Secret."))
 
-    if Utils2FA.get_authentication_method() != AUTH_METHOD.OTP_APP.value:
+    settings = get_payment_auth_settings()
+
+    if settings.authentication_method != AUTH_METHOD.OTP_APP.value:
         frappe.throw(
             msg=_(
                 "OTP App is not enabled for Payment Authentication. Contact System Administrator."
@@ -124,7 +154,7 @@ def reset_otp_secret(user: str):
             title=_("OTP App Not Enabled"),
         )
 
-    otp_issuer = Utils2FA.get_otp_issuer()
+    otp_issuer = settings.otp_issuer
     user_email = frappe.get_cached_value("User", user, "email")
 
     clear_default(Utils2FA.get_otp_login_key(user))
@@ -134,9 +164,9 @@ def reset_otp_secret(user: str):
         "recipients": user_email,
         "sender": None,
         "subject": _("Payment OTP Secret Reset for {0}").format(otp_issuer),
-        "message": _(
-            "<p>Your payment OTP secret on <strong>{0}</strong> used for authorizing <strong>Bank Payments</strong> has been reset! <br><br> If you did not perform this reset and did not request it, please contact your <strong>System Administrator</strong> immediately!!</p>"
-        ).format(otp_issuer),
+        "message": render_notification_template(
+            NOTIFICATION_TEMPLATE.OTP_SECRET_RESET.value, {"otp_issuer": otp_issuer}
+        ),
         "delayed": False,
         "retry": 3,
     }
@@ -161,6 +191,56 @@ def reset_otp_secret(user: str):
     )
 
 
+##### Settings #####
+@dataclass(frozen=True, slots=True)
+class PaymentAuthSettings:
+    """
+    Immutable snapshot of the payment authentication settings.
+
+    Use `get_payment_auth_settings()` to get the snapshot of the current site.
+    """
+
+    authentication_method: str
+    otp_issuer: str
+    otp_expiry: int  # seconds
+    session_expiry: int  # seconds
+    max_login_attempts: int
+    login_lockout_interval: int  # seconds
+
+
+def get_payment_auth_settings() -> PaymentAuthSettings:
+    """
+    Get the payment authentication settings of the current site.
+
+    Settings are built once per process and rebuilt only after `System Settings` is updated.
+    """
+    return get_snapshot(PAYMENT_AUTH_SETTINGS, _build_payment_auth_settings)
+
+
+def clear_payment_auth_settings(doc=None, method=None):
+    """
+    Invalidate the payment authentication settings snapshot for all processes.
+
+    Note: Called on `System Settings` update.
+    """
+    invalidate_snapshot(PAYMENT_AUTH_SETTINGS)
+
+
+def _build_payment_auth_settings() -> PaymentAuthSettings:
+    otp_issuer_name = get_system_settings("payment_otp_issuer_name")
+
+    return PaymentAuthSettings(
+        authentication_method=get_system_settings("payment_authentication_method"),
+        otp_issuer=f"{otp_issuer_name or 'Frappe Framework'} - {OTP_ISSUER}",
+        otp_expiry=Utils2FA.OTP_EXPIRY_TIME,
+        session_expiry=Utils2FA.EXPIRY_TIME,
+        max_login_attempts=cint(
+            get_system_settings("allow_consecutive_login_attempts")
+        ),
+        login_lockout_interval=cint(get_system_settings("allow_login_after_fail")),
+    )
+
+
 ##### Utilities #####
 def run_before_payment_authentication(
     payment_entries: str | list[str], throw: bool = False
@@ -182,18 +262,21 @@ class Utils2FA:
     _USER = "_user"
     _TOKEN = "_token"
     _OTP_SECRET = "_otp_secret"
+    _OTP_VERIFIER = "_otp_verifier"
     _OTP_LOGIN = "_otp_login"
     _AUTHENTICATED = "_authenticated"
     _PAYMENT_ENTRIES = "_payment_entries"
+    _PAYMENT_ENTRIES_SET = "_payment_entries_set"
 
     #### Constants ####
     # TODO: temporary hardcoding! Need from length of PEs
     EXPIRY_TIME = 1500  # 1500 sec -> 25 minutes
+    OTP_EXPIRY_TIME = 180  # 180 sec -> 3 minutes
 
     #### Getters and Setters ####
     @staticmethod
     def get_otp_issuer() -> str:
-        return f"{get_system_settings('payment_otp_issuer_name') or 'Frappe Framework'} - {OTP_ISSUER}"
+        return get_payment_auth_settings().otp_issuer
 
     @staticmethod
     def get_otp_login_key(user: str) -> str:
@@ -205,7 +288,7 @@ class Utils2FA:
 
     @staticmethod
     def get_authentication_method() -> str:
-        return get_system_settings("payment_authentication_method")
+        return get_payment_auth_settings().authentication_method
 
     @staticmethod
     def get_otp_secret(user) -> str:
@@ -217,10 +300,10 @@ class Utils2FA:
         key = Utils2FA.get_otp_secret_key(user)
 
         if otp_secret := get_default(key):
-            return decrypt(otp_secret, key=key)
+            return decrypt_secret(otp_secret)
 
         otp_secret = b32encode(os.urandom(10)).decode("utf-8")
-        set_default(key, encrypt(otp_secret))
+        set_default(key, encrypt_secret(otp_secret))
 
         return otp_secret
 
@@ -250,19 +333,8 @@ class Utils2FA:
     def get_email_body_for_2fa(
         otp: str, paid_amount: int | float, payment_entries: str, expires_in: int = 5
     ):
-        body = """
-        <p>Enter the verification code below to authenticate the payment of <strong>{{ paid_amount }}</strong></p>
-        <br>
-        <p style="text-align: center;">
-        <strong style="font-size: 20px;">{{ otp }}</strong></p>
-        <br>
-        <p><strong>Payment Entries to Authenticate: </strong>{{ payment_entries }}</p>
-        <br>
-        <p><strong>Note:</strong> This code expires in {{ expires_in }} minutes.</p>
-        """
-
-        return frappe.render_template(
-            body,
+        return render_notification_template(
+            NOTIFICATION_TEMPLATE.OTP_CODE.value,
             {
                 "otp": otp,
                 "paid_amount": fmt_money(paid_amount, currency="INR"),
@@ -293,33 +365,42 @@ class Trigger2FA:
         Generates `auth_id` for the user and stores the data in cache.
         """
         self.auth_id = frappe.generate_hash(length=8)
-        self.otp_issuer = Utils2FA.get_otp_issuer()
-        self.auth_method = Utils2FA.get_authentication_method()
+        self.settings = get_payment_auth_settings()
+        self.otp_issuer = self.settings.otp_issuer
+        self.auth_method = self.settings.authentication_method
 
-        self.cache_2fa_data(user=self.user, payment_entries=self.payment_entries)
+        self.cache_2fa_data(user=self.user)
+        self.cache_payment_entries()
 
         self.otp_secret = Utils2FA.get_otp_secret(self.user)
         self.token = pyotp.TOTP(self.otp_secret).now()
 
-        self.cache_2fa_data(otp_secret=self.otp_secret)
-
         if self.auth_method == AUTH_METHOD.OTP_APP.value:
+            # plaintext secret is never cached, only the verifier
+            self.cache_2fa_data(
+                otp_verifier=make_totp_verifier(
+                    self.otp_secret, self.auth_id, self.settings.otp_expiry
+                )
+            )
             self.pipeline.execute()
 
             if Utils2FA.get_otp_login(self.user):
-                return self.process_2fa_for_otp_app()
+                response = self.process_2fa_for_otp_app()
+            else:
+                response = self.email_2fa_for_otp_app()
 
-            return self.email_2fa_for_otp_app()
+            response["count"] = len(self.payment_entries)
+            return response
 
         # TODO: @Implement SMS and Email
         # if self.auth_method == AUTH_METHOD.SMS.value:
-        #     self.cache_2fa_data(token=self.token)
+        #     self.cache_2fa_data(token=self.token, otp_verifier=make_hotp_verifier(self.otp_secret, self.auth_id, int(self.token)))
         #     self.pipeline.execute()
 
         #     return self.process_2fa_for_sms()
 
         # if self.auth_method == AUTH_METHOD.EMAIL.value:
-        #     self.cache_2fa_data(token=self.token)
+        #     self.cache_2fa_data(token=self.token, otp_verifier=make_hotp_verifier(self.otp_secret, self.auth_id, int(self.token)))
         #     self.pipeline.execute()
 
         #     return self.process_2fa_for_email()
@@ -333,18 +414,36 @@ class Trigger2FA:
         # else:
         #     expiry_time = 180
 
-        expiry_time = 180
+        expiry_time = self.settings.otp_expiry
 
         for k, v in kwargs.items():
             if not isinstance(v, str | int | float):
                 v = b64encode(pickle.dumps(v)).decode("utf-8")
 
-            # for payment_entries, set expiry time to 100 seconds more
-            if k == "payment_entries":
-                expiry_time = Utils2FA.EXPIRY_TIME
-
             self.pipeline.set(f"{self.auth_id}_{k}", v, expiry_time)
 
+    def cache_payment_entries(self):
+        """
+        Freeze the selected Payment Entries with the auth session.
+
+        - List (in order): to stream to workers in chunks.
+        - Set: to check if a Payment Entry is authenticated in O(1).
+
+        Note: Keys are site specific (read with `frappe.cache` list and set methods).
+        """
+        list_key = frappe.cache.make_key(f"{self.auth_id}{Utils2FA._PAYMENT_ENTRIES}")
+        set_key = frappe.cache.make_key(
+            f"{self.auth_id}{Utils2FA._PAYMENT_ENTRIES_SET}"
+        )
+
+        for idx in range(0, len(self.payment_entries), SELECTION_CHUNK_SIZE):
+            chunk = self.payment_entries[idx : idx + SELECTION_CHUNK_SIZE]
+            self.pipeline.rpush(list_key, *chunk)
+            self.pipeline.sadd(set_key, *chunk)
+
+        self.pipeline.expire(list_key, self.settings.session_expiry)
+        self.pipeline.expire(set_key, self.settings.session_expiry)
+
     #### 2FA Methods ####
     def process_2fa_for_otp_app(self):
         setup_complete = True if Utils2FA.get_otp_login(self.user) else False
@@ -366,10 +465,10 @@ class Trigger2FA:
         status = Utils2FA.send_authentication_email(
             user=self.user,
             subject=_("OTP registration code from {0}").format(self.otp_issuer),
-            message=_(
-                "Please click on the link below and follow the instructions on"
-                " the page.<br><br><a href='{0}'>{0}</a>"
-            ).format(qrcode_link),
+            message=render_notification_template(
+                NOTIFICATION_TEMPLATE.OTP_REGISTRATION.value,
+                {"qrcode_link": qrcode_link},
+            ),
         )
 
         return {
@@ -466,13 +565,12 @@ class Authenticate2FA:
         """
         OTP App Verification.
         """
-        otp_secret = self.get_auth_opt_secret()
+        otp_verifier = self.get_otp_verifier()
 
-        if not otp_secret:
+        if not otp_verifier:
             return self.on_failure(_("Session expired. Please try again."))
 
-        totp = pyotp.TOTP(otp_secret)
-        if not totp.verify(self.otp):
+        if not verify_totp(self.otp, self.auth_id, otp_verifier):
             return self.on_failure(_("Invalid verification code"))
 
         if not Utils2FA.get_otp_login(self.user):
@@ -485,14 +583,12 @@ class Authenticate2FA:
         """
         SMS and Email OTP Verification.
         """
-        token = frappe.cache.get(f"{self.auth_id}{Utils2FA._TOKEN}")
-        otp_secret = self.get_auth_opt_secret()
+        otp_verifier = self.get_otp_verifier()
 
-        if not token or not otp_secret:
+        if not otp_verifier:
             return self.on_failure(_("Session expired. Please try again."))
 
-        hotp = pyotp.HOTP(otp_secret)
-        if not hotp.verify(self.otp, int(token)):
+        if not verify_hotp(self.otp, self.auth_id, otp_verifier):
             return self.on_failure(_("Invalid verification code"))
 
         return self.on_success()
@@ -506,21 +602,91 @@ class Authenticate2FA:
         return False
 
     @staticmethod
-    def get_payment_entries(auth_id: str) -> list[str]:
-        payment_entries = frappe.cache.get(f"{auth_id}{Utils2FA._PAYMENT_ENTRIES}")
+    def get_payment_entries(auth_id: str, start: int = 0, end: int = -1) -> list[str]:
+        """
+        Get the Payment Entries frozen with the auth session.
+
+        :param start: Index of the first Payment Entry (to read in chunks).
+        :param end: Index of the last Payment Entry (inclusive).
+        """
+        return [
+            name.decode("utf-8")
+            for name in frappe.cache.lrange(
+                f"{auth_id}{Utils2FA._PAYMENT_ENTRIES}", start, end
+            )
+        ]
+
+    @staticmethod
+    def get_payment_entries_count(auth_id: str) -> int:
+        return frappe.cache.llen(f"{auth_id}{Utils2FA._PAYMENT_ENTRIES}")
+
+    @staticmethod
+    def has_payment_entry(auth_id: str, payment_entry: str) -> bool:
+        return bool(
+            frappe.cache.sismember(
+                f"{auth_id}{Utils2FA._PAYMENT_ENTRIES_SET}", payment_entry
+            )
+        )
+
+    @staticmethod
+    def extend_session(auth_id: str, expiry: int):
+        """
+        Extend the auth session (authentication and frozen Payment Entries) for long running payouts.
+
+        :param expiry: Seconds from now. Never shortens the default session expiry.
+        """
+        expiry = max(expiry, get_payment_auth_settings().session_expiry)
+
+        pipeline = frappe.cache.pipeline()
+        pipeline.expire(f"{auth_id}{Utils2FA._AUTHENTICATED}", expiry)
+
+        for suffix in (Utils2FA._PAYMENT_ENTRIES, Utils2FA._PAYMENT_ENTRIES_SET):
+            pipeline.expire(frappe.cache.make_key(f"{auth_id}{suffix}"), expiry)
+
+        pipeline.execute()
+
+    @staticmethod
+    def has_payment_entries(auth_id: str, payment_entries: list[str]) -> bool:
+        """
+        Check if all the Payment Entries are frozen with the auth session (in one call).
+        """
+        pipeline = frappe.cache.pipeline()
+        key = frappe.cache.make_key(f"{auth_id}{Utils2FA._PAYMENT_ENTRIES_SET}")
+
+        for payment_entry in payment_entries:
+            pipeline.sismember(key, payment_entry)
+
+        return all(pipeline.execute())
+
+    @staticmethod
+    def validate_session(auth_id: str, payment_entries: list[str]):
+        """
+        Validate the auth session is authenticated by the current user for the Payment Entries.
+        """
+        user = frappe.cache.get(f"{auth_id}{Utils2FA._USER}")
+
+        if not user or user.decode("utf-8") != frappe.session.user:
+            raise frappe.AuthenticationError(_("Invalid Authentication ID"))
 
-        if not payment_entries:
-            return []
+        if not Authenticate2FA.is_authenticated(auth_id):
+            raise frappe.AuthenticationError(
+                _("Authentication session expired. Please authenticate again.")
+            )
 
-        return pickle.loads(b64decode(payment_entries))
+        if not Authenticate2FA.has_payment_entries(auth_id, payment_entries):
+            raise frappe.AuthenticationError(
+                _("Payment Entries are not authenticated with the session.")
+            )
 
-    def get_auth_opt_secret(self) -> str:
-        return frappe.cache.get(f"{self.auth_id}{Utils2FA._OTP_SECRET}")
+    def get_otp_verifier(self) -> bytes | None:
+        return frappe.cache.get(f"{self.auth_id}{Utils2FA._OTP_VERIFIER}")
 
     def on_success(self) -> dict:
         self.tracker.add_success_attempt()
         frappe.cache.set(
-            f"{self.auth_id}{Utils2FA._AUTHENTICATED}", "True", Utils2FA.EXPIRY_TIME
+            f"{self.auth_id}{Utils2FA._AUTHENTICATED}",
+            "True",
+            get_payment_auth_settings().session_expiry,
         )
         return {"verified": True}
 
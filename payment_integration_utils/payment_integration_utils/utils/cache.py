@@ -0,0 +1,89 @@
+"""
+Per-process snapshots with site-wide invalidation.
+
+Snapshots are built once per process and per site, and rebuilt only when
+the site's version key (in Redis) is bumped. The version is checked once per
+request/job, so repeated reads in the same request do not hit Redis or DB.
+"""
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+import frappe
+
+# {(site, key): (version, snapshot)}
+_PROCESS_SNAPSHOTS: dict[tuple[str, str], tuple[int, Any]] = {}
+
+
+def get_cache_version(key: str) -> int:
+    """
+    Get the site-wide version of the given `key`.
+
+    If version is not set (new site or cache flushed), it is seeded with current time
+    so that stale process snapshots are never matched after a flush.
+
+    :param key: Version key name.
+    """
+    cache_key = frappe.cache.make_key(f"{key}_version")
+
+    if version := frappe.cache.get(cache_key):
+        return int(version)
+
+    frappe.cache.set(cache_key, time.time_ns(), nx=True)
+    return int(frappe.cache.get(cache_key))
+
+
+def bump_cache_version(key: str) -> int:
+    """
+    Bump the site-wide version of the given `key`.
+
+    All processes will rebuild their snapshots of the `key` on next request.
+
+    :param key: Version key name.
+    """
+    get_cache_version(key)
+    return frappe.cache.incr(frappe.cache.make_key(f"{key}_version"))
+
+
+def get_snapshot(key: str, builder: Callable[[], Any]) -> Any:
+    """
+    Get the per-process snapshot for the given `key` of the current site.
+
+    :param key: Snapshot key name.
+    :param builder: Function to build the snapshot when not available or outdated.
+    """
+    request_snapshots = _get_request_snapshots()
+
+    if key in request_snapshots:
+        return request_snapshots[key]
+
+    version = get_cache_version(key)
+    process_key = (frappe.local.site, key)
+    cached = _PROCESS_SNAPSHOTS.get(process_key)
+
+    if not cached or cached[0] != version:
+        cached = (version, builder())
+        _PROCESS_SNAPSHOTS[process_key] = cached
+
+    request_snapshots[key] = cached[1]
+    return cached[1]
+
+
+def invalidate_snapshot(key: str):
+    """
+    Invalidate the snapshot of the given `key` for all processes of the current site.
+
+    :param key: Snapshot key name.
+    """
+    bump_cache_version(key)
+
+    _PROCESS_SNAPSHOTS.pop((frappe.local.site, key), None)
+    _get_request_snapshots().pop(key, None)
+
+
+def _get_request_snapshots() -> dict:
+    if not hasattr(frappe.local, "payment_integration_snapshots"):
+        frappe.local.payment_integration_snapshots = {}
+
+    return frappe.local.payment_integration_snapshots
@@ -0,0 +1,201 @@
+"""
+Cached contact details (mobile and email) of the parties for Link payouts.
+
+- Employee: `cell_number` and `prefered_email`
+- Others: `mobile_no` and `email_id` of the Contact
+
+Details are cached in a site's Redis key per party (`Employee:{party}` or `Contact:{contact_person}`),
+memoized per request, invalidated on Employee and Contact updates and each key expires after
+`CONTACT_DETAILS_CACHE_TTL`. Values are cached as stored (use `normalize_mobile_no` to compare).
+
+Note: Updates without doc hooks (`db_set`, `frappe.db.set_value`, etc.) are not invalidated,
+so read with `cached=False` where the details are persisted.
+"""
+
+import json
+import re
+
+import frappe
+
+CONTACT_DETAILS_CACHE = "party_contact_details"
+CONTACT_DETAILS_CACHE_TTL = 60 * 60  # seconds
+
+
+def get_party_contact_details(
+    party_type: str,
+    party: str | None,
+    contact_person: str | None,
+    cached: bool = True,
+) -> dict | None:
+    """
+    Get Party's contact details as Payment Entry's contact fields.
+
+    - Mobile Number
+    - Email ID
+
+    :param party_type: Party Type of the Payment Entry.
+    :param party: Party of the Payment Entry.
+    :param contact_person: Contact Person of the Payment Entry.
+    :param cached: If `False`, details are read from the database (and the cache is refreshed).
+    """
+    key = get_contact_key(party_type, party, contact_person)
+
+    if not key:
+        return None
+
+    if not cached:
+        details = _get_contact_details([key])
+        _update_cache(details)
+        _get_request_memo().pop(key, None)
+        _get_request_memo().update(details)
+
+        return details.get(key)
+
+    prefetch_party_contact_details(
+        [{"party_type": party_type, "party": party, "contact_person": contact_person}]
+    )
+
+    return _get_request_memo().get(key)
+
+
+def prefetch_party_contact_details(parties: list[dict]):
+    """
+    Load contact details of the parties into the cache.
+
+    At most one Redis call, one Employee query and one Contact query.
+
+    :param parties: List of dicts (or docs) with `party_type`, `party` and `contact_person`.
+    """
+    memo = _get_request_memo()
+    keys = {
+        key
+        for party in parties
+        if (
+            key := get_contact_key(
+                party.get("party_type"), party.get("party"), party.get("contact_person")
+            )
+        )
+        and key not in memo
+    }
+
+    if not keys:
+        return
+
+    keys = list(keys)
+    pipeline = frappe.cache.pipeline()
+
+    for key in keys:
+        pipeline.get(get_cache_key(key))
+
+    for key, details in zip(keys, pipeline.execute(), strict=True):
+        if details:
+            memo[key] = json.loads(details)
+
+    if not (missing := [key for key in keys if key not in memo]):
+        return
+
+    if details := _get_contact_details(missing):
+        memo.update(details)
+        _update_cache(details)
+
+
+def _get_contact_details(keys: list[str]) -> dict[str, dict]:
+    """
+    Get contact details of the keys from the database (one query per doctype).
+    """
+    details = {}
+    queries = {
+        "Employee": [
+            "cell_number as contact_mobile",
+            "prefered_email as contact_email",
+        ],
+        "Contact": ["mobile_no as contact_mobile", "email_id as contact_email"],
+    }
+
+    for doctype, fields in queries.items():
+        names = [key.split(":", 1)[1] for key in keys if key.startswith(f"{doctype}:")]
+
+        if not names:
+            continue
+
+        for contact in frappe.get_all(
+            doctype, filters={"name": ("in", names)}, fields=["name", *fields]
+        ):
+            details[f"{doctype}:{contact.pop('name')}"] = {
+                "contact_mobile": contact.contact_mobile,
+                "contact_email": contact.contact_email,
+            }
+
+    return details
+
+
+def _update_cache(details: dict[str, dict]):
+    if not details:
+        return
+
+    # each party expires on its own
+    pipeline = frappe.cache.pipeline()
+
+    for key, value in details.items():
+        pipeline.set(
+            get_cache_key(key), json.dumps(value), ex=CONTACT_DETAILS_CACHE_TTL
+        )
+
+    pipeline.execute()
+
+
+def clear_party_contact_details(doc, method=None):
+    """
+    Clear cached contact details of the Contact or Employee.
+
+    Note: Called on `Contact` and `Employee` update and delete.
+    """
+    key = f"{doc.doctype}:{doc.name}"
+
+    frappe.cache.delete(get_cache_key(key))
+    _get_request_memo().pop(key, None)
+
+
+def get_cache_key(key: str) -> str:
+    return frappe.cache.make_key(f"{CONTACT_DETAILS_CACHE}:{key}")
+
+
+def get_contact_key(
+    party_type: str | None, party: str | None, contact_person: str | None
+) -> str | None:
+    if party_type == "Employee":
+        return party and f"Employee:{party}"
+
+    return contact_person and f"Contact:{contact_person}"
+
+
+def normalize_mobile_no(mobile_no: str | None) -> str:
+    """
+    Normalize the mobile number to compare.
+
+    Example:
+    ```
+    normalize_mobile_no("+91 98765-43210") ==> "9876543210"
+    normalize_mobile_no("098765 43210") ==> "9876543210"
+    ```
+    """
+    if not mobile_no:
+        return ""
+
+    digits = re.sub(r"\D", "", mobile_no)
+
+    # Indian numbers with country code or trunk prefix
+    if len(digits) == 12 and digits.startswith("91"):
+        return digits[2:]
+
+    if len(digits) == 11 and digits.startswith("0"):
+        return digits[1:]
+
+    return digits
+
+
+def _get_request_memo() -> dict:
+    if not hasattr(frappe.local, "party_contact_details"):
+        frappe.local.party_contact_details = {}
+
+    return frappe.local.party_contact_details
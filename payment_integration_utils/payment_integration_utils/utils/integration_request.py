@@ -0,0 +1,610 @@
+"""
+Logging of Integration Requests.
+
+Logs enqueued with `enqueue_integration_request` are buffered in Redis and inserted in bulk
+by a single flush job, either when `FLUSH_SIZE` logs are buffered or the oldest buffered log
+is `FLUSH_INTERVAL` seconds old. Scheduler also flushes the buffer as a safety net.
+Logs are removed from the buffer only after they are committed. Logs which can't be inserted
+are moved to a dead-letter list (capped to `DEAD_LETTER_SIZE`) and logged in Error Log.
+
+Payloads (headers, data, output, error) are stored as compact JSON, capped to `MAX_PAYLOAD_SIZE`
+(keeping head and tail) and zlib compressed above the compression threshold.
+Credentials (auth headers, secrets) are redacted before storing (see `redact_payload`).
+They are pretty formatted only when the Integration Request is viewed.
+Use `get_integration_request_payload` to read a stored payload.
+
+Old Integration Requests are archived to compressed, append-only files in the site's
+private files and deleted in small chunks (see `archive_integration_requests`).
+"""
+
+import gzip
+import json
+import os
+import time
+import zlib
+from base64 import b64decode, b64encode
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, getdate, now, today
+
+BUFFER_KEY = "integration_request_buffer"
+BUFFER_SINCE_KEY = "integration_request_buffer_since"
+DEAD_LETTER_KEY = "integration_request_dead_letter"
+FLUSH_LOCK_KEY = "integration_request_flush_lock"
+
+FLUSH_SIZE = 100  # logs
+FLUSH_INTERVAL = 30  # seconds
+FLUSH_BATCH_SIZE = 1000  # logs per bulk insert
+FLUSH_LOCK_TIMEOUT = 10 * 60  # seconds
+DEAD_LETTER_SIZE = 1000  # logs
+
+MAX_PAYLOAD_SIZE = 512 * 1024  # characters
+COMPRESSION_THRESHOLD = 16 * 1024  # characters; override with site config
+COMPRESSED_PREFIX = "zlib:"
+
+RETENTION_DAYS = 90  # completed and unreferenced
+EXTENDED_RETENTION_DAYS = 365  # failed, referenced, etc.
+ARCHIVE_CHUNK_SIZE = 500  # records per delete and commit
+ARCHIVE_FOLDER = "integration_request_archive"
+
+PAYLOAD_FIELDS = ("request_headers", "data", "output", "error")
+
+# credential keys (lower case, `-` as `_`) whose values are redacted; add more with site config
+SENSITIVE_KEYS = frozenset(
+    (
+        "authorization",
+        "proxy_authorization",
+        "x_api_key",
+        "api_key",
+        "api_secret",
+        "key_secret",
+        "secret",
+        "password",
+        "access_token",
+        "refresh_token",
+        "cookie",
+    )
+)
+REDACTED = "*****"
+
+INTEGRATION_REQUEST_FIELDS = (
+    "integration_request_service",
+    "request_id",
+    "url",
+    "request_headers",
+    "data",
+    "output",
+    "error",
+    "status",
+    "reference_doctype",
+    "reference_docname",
+    "is_remote_request",
+)
+
+
+################# LOGGING #################
+def enqueue_integration_request(**kwargs):
+    """
+    Buffer the Integration Request log to be inserted in bulk.
+
+    :param kwargs: Same as `log_integration_request`.
+    """
+    kwargs.update({"creation": now(), "owner": frappe.session.user})
+    buffer_since_key = frappe.cache.make_key(BUFFER_SINCE_KEY)
+
+    pipeline = frappe.cache.pipeline()
+    pipeline.rpush(
+        frappe.cache.make_key(BUFFER_KEY), frappe.as_json(kwargs, indent=None)
+    )
+    pipeline.set(buffer_since_key, time.time(), nx=True)
+    pipeline.get(buffer_since_key)
+    buffer_length, _, buffer_since = pipeline.execute()
+
+    if (
+        buffer_length >= FLUSH_SIZE
+        or time.time() - float(buffer_since or 0) >= FLUSH_INTERVAL
+    ):
+        enqueue_flush_integration_requests()
+
+
+def log_integration_request(
+    url=None,
+    integration_request_service=None,
+    request_id=None,
+    request_headers=None,
+    data=None,
+    status=None,
+    output=None,
+    error=None,
+    reference_doctype=None,
+    reference_name=None,
+    is_remote_request=False,
+):
+    return frappe.get_doc(
+        {
+            "doctype": "Integration Request",
+            **get_integration_request_values(
+                url=url,
+                integration_request_service=integration_request_service,
+                request_id=request_id,
+                request_headers=request_headers,
+                data=data,
+                status=status,
+                output=output,
+                error=error,
+                reference_doctype=reference_doctype,
+                reference_name=reference_name,
+                is_remote_request=is_remote_request,
+            ),
+        }
+    ).insert(ignore_permissions=True)
+
+
+def get_integration_request_values(
+    url=None,
+    integration_request_service=None,
+    request_id=None,
+    request_headers=None,
+    data=None,
+    status=None,
+    output=None,
+    error=None,
+    reference_doctype=None,
+    reference_name=None,
+    is_remote_request=False,
+) -> dict:
+    """
+    Get Integration Request field values from the log.
+    """
+
+    def get_status():
+        if status:
+            return status
+
+        return "Failed" if error else "Completed"
+
+    return {
+        "integration_request_service": integration_request_service,
+        "request_id": request_id,
+        "url": url,
+        "request_headers": pack_payload(redact_payload(request_headers)),
+        "data": pack_payload(redact_payload(data)),
+        "output": pack_payload(redact_payload(output)),
+        "error": pack_payload(redact_payload(error)),
+        "status": get_status(),
+        "reference_doctype": reference_doctype,
+        "reference_docname": reference_name,
+        "is_remote_request": is_remote_request,
+    }
+
+
+def pretty_json(obj):
+    if not obj:
+        return ""
+
+    if isinstance(obj, str):
+        return obj
+
+    return frappe.as_json(obj, indent=4)
+
+
+################# PAYLOADS #################
+def pack_payload(obj) -> str:
+    """
+    Serialize the payload compactly to store in Integration Request.
+
+    - Objects are serialized as compact JSON.
+    - Payloads longer than `MAX_PAYLOAD_SIZE` are truncated, keeping head and tail.
+    - Payloads longer than the compression threshold are zlib compressed (base64 encoded).
+
+    Site config `integration_request_compression_threshold`: characters above which
+    payload is compressed (`0` to disable compression).
+    """
+    if not obj:
+        return ""
+
+    if isinstance(obj, str):
+        payload = obj
+    else:
+        payload = frappe.as_json(obj, indent=None, separators=(",", ":"))
+
+    if len(payload) > MAX_PAYLOAD_SIZE:
+        half = MAX_PAYLOAD_SIZE // 2
+        payload = (
+            f"{payload[:half]}\n"
+            f"...<{len(payload) - 2 * half} characters truncated>...\n"
+            f"{payload[-half:]}"
+        )
+
+    threshold = cint(
+        frappe.conf.get(
+            "integration_request_compression_threshold", COMPRESSION_THRESHOLD
+        )
+    )
+
+    if threshold and len(payload) > threshold:
+        compressed = b64encode(zlib.compress(payload.encode())).decode()
+        payload = f"{COMPRESSED_PREFIX}{compressed}"
+
+    return payload
+
+
+def redact_payload(obj, sensitive_keys: frozenset | None = None):
+    """
+    Get a copy of the payload with values of sensitive keys (at any depth) redacted.
+
+    Only credentials are redacted by default, so payout details stay available for reconciliation.
+    JSON text is kept as is unless a value is redacted.
+
+    Site config `integration_request_sensitive_keys`: additional keys to redact (Eg. `["vpa"]`).
+
+    Example:
+    ```py
+    redact_payload({"amount": 100, "headers": {"Authorization": "Basic abc"}}) ==> {"amount": 100, "headers": {"Authorization": "*****"}}
+    ```
+    """
+    if sensitive_keys is None:
+        sensitive_keys = get_sensitive_keys()
+
+    if isinstance(obj, str):
+        if (parsed := _parse_json(obj)) is obj:
+            return obj
+
+        redacted = redact_payload(parsed, sensitive_keys)
+        return obj if redacted == parsed else redacted
+
+    if isinstance(obj, dict):
+        return {
+            key: (
+                REDACTED
+                if _normalize_key(key) in sensitive_keys and value not in (None, "")
+                else redact_payload(value, sensitive_keys)
+            )
+            for key, value in obj.items()
+        }
+
+    if isinstance(obj, list | tuple):
+        return [redact_payload(value, sensitive_keys) for value in obj]
+
+    return obj
+
+
+def get_sensitive_keys() -> frozenset:
+    if extra_keys := frappe.conf.get("integration_request_sensitive_keys"):
+        return SENSITIVE_KEYS | {_normalize_key(key) for key in extra_keys}
+
+    return SENSITIVE_KEYS
+
+
+def _normalize_key(key) -> str:
+    return str(key).lower().replace("-", "_")
+
+
+def _parse_json(payload: str):
+    """
+    Parse the JSON object or list to redact, other strings are kept as is.
+    """
+    if not payload.lstrip().startswith(("{", "[")):
+        return payload
+
+    try:
+        return json.loads(payload)
+    except ValueError:
+        return payload
+
+
+def unpack_payload(payload: str | None, pretty: bool = True) -> str:
+    """
+    Get the stored payload of Integration Request as text.
+
+    :param payload: Stored payload (maybe compressed).
+    :param pretty: Pretty format the payload if it is a valid JSON.
+    """
+    if not payload:
+        return ""
+
+    if payload.startswith(COMPRESSED_PREFIX):
+        compressed = b64decode(payload[len(COMPRESSED_PREFIX) :])
+        payload = zlib.decompress(compressed).decode()
+
+    if not pretty:
+        return payload
+
+    try:
+        return frappe.as_json(json.loads(payload), indent=4)
+    except ValueError:
+        # truncated or non JSON payload
+        return payload
+
+
+def get_integration_request_payload(
+    integration_request, field: str = "data", as_dict: bool = True
+):
+    """
+    Get the stored payload of Integration Request (decompressed).
+
+    :param integration_request: Integration Request name or document.
+    :param field: One of `PAYLOAD_FIELDS`.
+    :param as_dict: Parse the JSON payload (text is returned if it is not a valid JSON).
+    """
+    if field not in PAYLOAD_FIELDS:
+        frappe.throw(_("Invalid payload field {0}").format(field))
+
+    if isinstance(integration_request, str):
+        payload = frappe.db.get_value("Integration Request", integration_request, field)
+    else:
+        payload = integration_request.get(field)
+
+    payload = unpack_payload(payload, pretty=False)
+
+    if not as_dict or not payload:
+        return payload
+
+    return _parse_json(payload)
+
+
+def expand_payloads(doc, method=None):
+    """
+    Decompress and pretty format the payloads of Integration Request to view.
+
+    Set in onload (`payloads`), so the stored fields are never changed by the form.
+
+    Note: Called on `Integration Request` onload.
+    """
+    doc.set_onload(
+        "payloads",
+        {
+            field: unpack_payload(value)
+            for field in PAYLOAD_FIELDS
+            if (value := doc.get(field))
+        },
+    )
+
+
+################# FLUSHING #################
+def enqueue_flush_integration_requests():
+    frappe.enqueue(
+        flush_integration_requests,
+        queue="short",
+        job_id=f"flush_integration_requests::{frappe.local.site}",
+        deduplicate=True,
+    )
+
+
+def flush_integration_requests():
+    """
+    Insert the buffered Integration Request logs in bulk, in the order they were logged.
+
+    - Logs are read from the buffer and removed only after the insert is committed.
+    - If the bulk insert fails, logs are inserted one by one (see `insert_integration_requests_one_by_one`).
+    - Only one flush runs at a time (enqueued and scheduled flushes read the same buffer).
+
+    Note: Also runs on scheduler (all) to flush the leftover logs.
+    """
+    lock_key = frappe.cache.make_key(FLUSH_LOCK_KEY)
+
+    if not frappe.cache.set(lock_key, 1, nx=True, ex=FLUSH_LOCK_TIMEOUT):
+        return
+
+    try:
+        _flush_integration_requests()
+
+    finally:
+        frappe.cache.delete(lock_key)
+
+
+def _flush_integration_requests():
+    buffer_key = frappe.cache.make_key(BUFFER_KEY)
+    frappe.cache.delete(frappe.cache.make_key(BUFFER_SINCE_KEY))
+
+    while True:
+        # raw `lrange` (wrapper prefixes the key again)
+        pipeline = frappe.cache.pipeline()
+        pipeline.lrange(buffer_key, 0, FLUSH_BATCH_SIZE - 1)
+        entries = pipeline.execute()[0]
+
+        if not entries:
+            break
+
+        try:
+            insert_integration_requests([json.loads(entry) for entry in entries])
+            frappe.db.commit()
+
+        except Exception:
+            frappe.db.rollback()
+            insert_integration_requests_one_by_one(entries)
+            continue
+
+        remove_from_buffer(len(entries))
+
+
+def insert_integration_requests_one_by_one(entries: list[bytes]):
+    """
+    Insert the logs one by one, so one bad log does not block the others.
+
+    Logs which fail are moved to the dead-letter list and logged in Error Log.
+    If the database is unavailable, the error is raised and the remaining logs are kept
+    in the buffer to retry in the next flush.
+    """
+    for entry in entries:
+        try:
+            insert_integration_requests([json.loads(entry)])
+            frappe.db.commit()
+
+        except Exception:
+            frappe.db.rollback()
+
+            # raises if the failure is not of the log
+            frappe.db.sql("SELECT 1")
+
+            frappe.log_error(
+                title=_("Integration Request Log Failed"),
+                reference_doctype="Integration Request",
+            )
+            frappe.db.commit()
+
+            remove_from_buffer(1, dead_letter=entry)
+            continue
+
+        remove_from_buffer(1)
+
+
+def remove_from_buffer(count: int, dead_letter: bytes | None = None):
+    """
+    Remove the flushed logs from the head of the buffer.
+
+    :param count: Number of logs to remove.
+    :param dead_letter: Log to move to the dead-letter list.
+    """
+    pipeline = frappe.cache.pipeline()
+    pipeline.ltrim(frappe.cache.make_key(BUFFER_KEY), count, -1)
+
+    if dead_letter:
+        dead_letter_key = frappe.cache.make_key(DEAD_LETTER_KEY)
+        pipeline.rpush(dead_letter_key, dead_letter)
+        pipeline.ltrim(dead_letter_key, -DEAD_LETTER_SIZE, -1)
+
+    pipeline.execute()
+
+
+def insert_integration_requests(logs: list[dict]):
+    """
+    Bulk insert the Integration Request logs.
+
+    :param logs: List of logs with `creation` and `owner` and kwargs of `log_integration_request`.
+    """
+    fields = [
+        "name",
+        "creation",
+        "modified",
+        "owner",
+        "modified_by",
+        "docstatus",
+        *INTEGRATION_REQUEST_FIELDS,
+    ]
+
+    values = []
+
+    for log in logs:
+        creation = log.pop("creation")
+        owner = log.pop("owner")
+        doc_values = get_integration_request_values(**log)
+
+        values.append(
+            [
+                frappe.generate_hash(length=10),
+                creation,
+                creation,
+                owner,
+                owner,
+                0,
+                *(doc_values[field] for field in INTEGRATION_REQUEST_FIELDS),
+            ]
+        )
+
+    frappe.db.bulk_insert("Integration Request", fields, values)
+
+
+################# RETENTION #################
+def archive_integration_requests():
+    """
+    Archive and delete old Integration Requests as per retention policy.
+
+    - Completed and unreferenced: after `RETENTION_DAYS`.
+    - Others (failed, referenced, etc.): after `EXTENDED_RETENTION_DAYS`.
+
+    Site config (`0` to keep forever):
+    - `integration_request_retention_days`
+    - `integration_request_extended_retention_days`
+
+    Note: Runs daily (long).
+    """
+    retention_days = cint(
+        frappe.conf.get("integration_request_retention_days", RETENTION_DAYS)
+    )
+    extended_retention_days = cint(
+        frappe.conf.get(
+            "integration_request_extended_retention_days", EXTENDED_RETENTION_DAYS
+        )
+    )
+
+    if retention_days:
+        archive_and_delete_integration_requests(
+            {
+                "status": "Completed",
+                "reference_docname": ("is", "not set"),
+                "creation": ("<", add_days(today(), -retention_days)),
+            }
+        )
+
+    if extended_retention_days:
+        archive_and_delete_integration_requests(
+            {"creation": ("<", add_days(today(), -extended_retention_days))}
+        )
+
+
+def archive_and_delete_integration_requests(filters: dict) -> int:
+    """
+    Stream the Integration Requests in primary key order, append them to the archive file
+    and delete them in chunks of `ARCHIVE_CHUNK_SIZE` with commit after each chunk.
+
+    Records are deleted only after they are written to the archive file on disk (fsync),
+    so re-run after a failure never loses a record.
+
+    :param filters: Filters for Integration Requests to archive.
+    :return: Number of archived records.
+    """
+    archive_path = get_archive_path()
+    last_name = ""
+    archived = 0
+
+    while True:
+        records = frappe.get_all(
+            "Integration Request",
+            filters={**filters, "name": (">", last_name)},
+            fields="*",
+            order_by="name asc",
+            limit=ARCHIVE_CHUNK_SIZE,
+        )
+
+        if not records:
+            break
+
+        names = [record.name for record in records]
+
+        append_to_archive(archive_path, records)
+        frappe.db.delete("Integration Request", {"name": ("in", names)})
+        frappe.db.commit()
+
+        last_name = names[-1]
+        archived += len(records)
+
+    return archived
+
+
+def get_archive_path() -> str:
+    """
+    Get path of the current month's archive file.
+
+    Eg. `{site}/private/integration_request_archive/2025-01.jsonl.gz`
+    """
+    folder = frappe.get_site_path("private", ARCHIVE_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+
+    return os.path.join(folder, f"{getdate().strftime('%Y-%m')}.jsonl.gz")
+
+
+def append_to_archive(archive_path: str, records: list[dict]):
+    """
+    Append records as JSON lines to the archive (new gzip member per append).
+
+    Returns after the appended lines are flushed to disk.
+    """
+    with open(archive_path, "ab") as file:
+        with gzip.GzipFile(fileobj=file, mode="ab") as archive:
+            for record in records:
+                archive.write(frappe.as_json(record, indent=None).encode() + b"\n")
+
+        file.flush()
+        os.fsync(file.fileno())
@@ -0,0 +1,137 @@
+"""
+Registry of precompiled notification templates.
+
+Templates are compiled once per site in a process (with the site's Jinja environment)
+and rendered with the given context. Site's templates are cleared on `clear_cache`.
+
+Hook: `payment_notification_templates`
+
+```py
+# hooks.py of integration app
+payment_notification_templates = "my_app.constants.notifications.NOTIFICATION_TEMPLATES"
+```
+"""
+
+import frappe
+from frappe import _
+from jinja2 import Template
+
+from payment_integration_utils.payment_integration_utils.constants.notifications import (
+    DEFAULT_LOCALE,
+    NOTIFICATION_TEMPLATES,
+)
+
+# {name: {locale: source}}
+_TEMPLATES: dict[str, dict[str, str]] = {}
+
+# {site: {name: {locale: source}}}
+_SITE_TEMPLATES: dict[str, dict[str, dict[str, str]]] = {}
+
+# {(site, name, locale): Template}
+_COMPILED: dict[tuple[str, str, str], Template] = {}
+
+
+def register_notification_template(
+    name: str, source: str | dict[str, str], lang: str | None = None
+):
+    """
+    Register a notification template for all the sites.
+
+    :param name: Template name.
+    :param source: Jinja source or per-locale sources `{"default": source, "hi": source}`.
+    :param lang: Locale of the `source` (if `source` is a string).
+    """
+    _add_template(_TEMPLATES, name, source, lang)
+
+    # recompile on next render
+    for key in [key for key in _COMPILED if key[1] == name]:
+        del _COMPILED[key]
+
+
+def render_notification_template(
+    name: str, context: dict | None = None, lang: str | None = None
+) -> str:
+    """
+    Render the notification template with the given context.
+
+    :param name: Template name.
+    :param context: Context for the template.
+    :param lang: Locale of the template. Defaults to current language.
+    """
+    return get_notification_template(name, lang).render(context or {})
+
+
+def get_notification_template(name: str, lang: str | None = None) -> Template:
+    """
+    Get the compiled notification template.
+
+    Template registered via hooks gets priority over the default one.
+
+    :param name: Template name.
+    :param lang: Locale of the template. Defaults to current language.
+    """
+    site = frappe.local.site
+    site_templates = _get_site_templates(site)
+
+    variants = site_templates.get(name) or _TEMPLATES.get(name)
+
+    if not variants:
+        frappe.throw(_("Notification template {0} not found").format(name))
+
+    locale = _get_locale(variants, lang or frappe.local.lang)
+    key = (site, name, locale)
+
+    if not (template := _COMPILED.get(key)):
+        template = _COMPILED[key] = frappe.get_jenv().from_string(variants[locale])
+
+    return template
+
+
+def clear_notification_templates():
+    """
+    Clear compiled and hook templates of the current site (`clear_cache` hook).
+    """
+    site = frappe.local.site
+    _SITE_TEMPLATES.pop(site, None)
+
+    for key in [key for key in _COMPILED if key[0] == site]:
+        del _COMPILED[key]
+
+
+def _get_site_templates(site: str) -> dict[str, dict[str, str]]:
+    if site in _SITE_TEMPLATES:
+        return _SITE_TEMPLATES[site]
+
+    templates = {}
+
+    for path in frappe.get_hooks("payment_notification_templates"):
+        for name, source in frappe.get_attr(path).items():
+            _add_template(templates, name, source)
+
+    _SITE_TEMPLATES[site] = templates
+    return templates
+
+
+def _add_template(
+    templates: dict, name: str, source: str | dict[str, str], lang: str | None = None
+):
+    if isinstance(source, str):
+        source = {lang or DEFAULT_LOCALE: source}
+
+    templates.setdefault(name, {}).update(source)
+
+
+def _get_locale(variants: dict[str, str], lang: str | None) -> str:
+    if lang:
+        if lang in variants:
+            return lang
+
+        # eg. `en-US` -> `en`
+        if (base_lang := lang.split("-")[0]) in variants:
+            return base_lang
+
+    return DEFAULT_LOCALE if DEFAULT_LOCALE in variants else next(iter(variants))
+
+
+for _name, _source in NOTIFICATION_TEMPLATES.items():
+    register_notification_template(_name, _source)
@@ -0,0 +1,133 @@
+"""
+Secure handling of payment OTP secrets.
+
+- OTP secrets are stored encrypted in `__default` and decrypted only while generating OTP.
+- The plaintext secret is never shared via cache. Instead, a per-auth-session
+  verifier (keyed HMAC digests of the valid OTPs) is cached, which is enough to verify
+  the OTP entered by the user.
+"""
+
+import hashlib
+import hmac
+import json
+import time
+
+import frappe
+import pyotp
+from cryptography.fernet import Fernet, InvalidToken
+from frappe import _
+from frappe.utils import cstr, encode
+from frappe.utils.password import get_encryption_key
+
+TOTP_INTERVAL = 30  # seconds (pyotp's default)
+
+# {encryption_key: Fernet}
+_FERNETS: dict[str, Fernet] = {}
+
+
+##### Encryption #####
+def get_fernet() -> Fernet:
+    """
+    Get the Fernet object of the current site's encryption key.
+
+    Cached per process to avoid repeated key setup.
+    """
+    encryption_key = get_encryption_key()
+
+    if not (fernet := _FERNETS.get(encryption_key)):
+        fernet = _FERNETS[encryption_key] = Fernet(encode(encryption_key))
+
+    return fernet
+
+
+def encrypt_secret(secret: str) -> str:
+    return cstr(get_fernet().encrypt(encode(secret)))
+
+
+def decrypt_secret(encrypted_secret: str) -> str:
+    try:
+        return cstr(get_fernet().decrypt(encode(encrypted_secret)))
+
+    except InvalidToken:
+        frappe.throw(
+            msg=_(
+                "Failed to decrypt the payment OTP secret. Encryption key might have been changed. Please reset the OTP secret."
+            ),
+            title=_("Invalid OTP Secret"),
+        )
+
+
+##### Verifiers #####
+def make_totp_verifier(otp_secret: str, auth_id: str, valid_for: int) -> str:
+    """
+    Make verifier of the TOTPs valid from now till `valid_for` seconds.
+
+    :param otp_secret: Plaintext OTP secret.
+    :param auth_id: Authentication ID of the session.
+    :param valid_for: Seconds for which verifier is valid.
+
+    ---
+    Structure of the verifier (JSON):
+    ```py
+    {"<time_counter>": "<digest of the OTP>", ...}
+    ```
+    """
+    totp = pyotp.TOTP(otp_secret, interval=TOTP_INTERVAL)
+    start = _get_time_counter()
+    end = _get_time_counter(time.time() + valid_for)
+
+    return json.dumps(
+        {
+            str(counter): _get_otp_digest(auth_id, totp.generate_otp(counter))
+            for counter in range(start, end + 1)
+        }
+    )
+
+
+def verify_totp(otp: str, auth_id: str, verifier: str | bytes) -> bool:
+    """
+    Verify the TOTP for the current time with the session verifier.
+
+    :param otp: OTP entered by the user.
+    :param auth_id: Authentication ID of the session.
+    :param verifier: Verifier made by `make_totp_verifier`.
+    """
+    digests = json.loads(verifier)
+    digest = digests.get(str(_get_time_counter()))
+
+    if not digest:
+        return False
+
+    return hmac.compare_digest(digest, _get_otp_digest(auth_id, otp))
+
+
+def make_hotp_verifier(otp_secret: str, auth_id: str, counter: int) -> str:
+    """
+    Make verifier of the HOTP for the given `counter`.
+
+    :param otp_secret: Plaintext OTP secret.
+    :param auth_id: Authentication ID of the session.
+    :param counter: HOTP counter (token).
+    """
+    return _get_otp_digest(auth_id, pyotp.HOTP(otp_secret).at(counter))
+
+
+def verify_hotp(otp: str, auth_id: str, verifier: str | bytes) -> bool:
+    """
+    Verify the HOTP with the session verifier.
+
+    :param otp: OTP entered by the user.
+    :param auth_id: Authentication ID of the session.
+    :param verifier: Verifier made by `make_hotp_verifier`.
+    """
+    return hmac.compare_digest(cstr(verifier), _get_otp_digest(auth_id, otp))
+
+
+def _get_time_counter(for_time: float | None = None) -> int:
+    return int((for_time or time.time()) // TOTP_INTERVAL)
+
+
+def _get_otp_digest(auth_id: str, otp: str) -> str:
+    # key is derived from site's encryption key, so cached digests are useless without it
+    key = encode(f"{get_encryption_key()}{auth_id}")
+    return hmac.new(key, encode(cstr(otp).strip()), hashlib.sha256).hexdigest()
@@ -0,0 +1,168 @@
+"""
+Distributed locks on Payment Entries while they are paid (submitted).
+
+- Locks for a chunk of Payment Entries are acquired with one pipelined Redis call.
+- Each acquisition gets a fencing token (increasing per Payment Entry), so integrations can
+  reject a stale payout attempt (see `is_valid_fencing_token`).
+- Locks are released on commit or rollback of the transaction (and expire after `LOCK_TTL`).
+- Long running payouts renew the locks of the pending entries every `LOCK_RENEW_INTERVAL`
+  (see `renew_payout_locks`), so locks never expire midway.
+"""
+
+from functools import partial
+
+import frappe
+from frappe import _
+
+LOCK_TTL = 300_000  # milliseconds
+LOCK_RENEW_INTERVAL = 60  # seconds; renew well before the locks expire
+LOCK_KEY = "payout_lock"
+FENCING_TOKEN_KEY = "payout_fencing_token"
+
+# set the lock and increment the fencing token only if not held by others
+ACQUIRE_SCRIPT = """
+if redis.call("set", KEYS[1], ARGV[1], "NX", "PX", ARGV[2]) then
+    return redis.call("incr", KEYS[2])
+end
+return 0
+"""
+
+# reset the expiry only if held by the owner
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# delete the lock only if held by the owner
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class PayoutLockError(frappe.ValidationError):
+    pass
+
+
+def acquire_payout_locks(names: list[str], owner: str) -> dict[str, int]:
+    """
+    Acquire locks on the Payment Entries in one pipelined call.
+
+    :param names: Payment Entry names.
+    :param owner: Unique ID of the lock holder (eg. job or request).
+    :return: Fencing tokens of the acquired locks `{name: token}`. Locked by others are not included.
+    """
+    if not names:
+        return {}
+
+    acquire = frappe.cache.register_script(ACQUIRE_SCRIPT)
+    pipeline = frappe.cache.pipeline()
+
+    for name in names:
+        acquire(
+            keys=[get_lock_key(name), get_fencing_token_key(name)],
+            args=[owner, LOCK_TTL],
+            client=pipeline,
+        )
+
+    tokens = pipeline.execute()
+
+    return {name: token for name, token in zip(names, tokens, strict=True) if token}
+
+
+def renew_payout_locks(names: list[str], owner: str) -> list[str]:
+    """
+    Reset the expiry (`LOCK_TTL`) of the locks held by the owner, for long running payouts.
+
+    :return: Payment Entries of which the lock is not held anymore (expired or taken by others).
+    """
+    if not names:
+        return []
+
+    renew = frappe.cache.register_script(RENEW_SCRIPT)
+    pipeline = frappe.cache.pipeline()
+
+    for name in names:
+        renew(keys=[get_lock_key(name)], args=[owner, LOCK_TTL], client=pipeline)
+
+    return [
+        name
+        for name, renewed in zip(names, pipeline.execute(), strict=True)
+        if not renewed
+    ]
+
+
+def release_payout_locks(names: list[str], owner: str):
+    """
+    Release the locks held by the owner.
+    """
+    if not names:
+        return
+
+    release = frappe.cache.register_script(RELEASE_SCRIPT)
+    pipeline = frappe.cache.pipeline()
+
+    for name in names:
+        release(keys=[get_lock_key(name)], args=[owner], client=pipeline)
+
+    pipeline.execute()
+
+
+def release_payout_locks_on_completion(names: list[str], owner: str):
+    """
+    Release the locks after the current transaction is committed or rolled back.
+    """
+    callback = partial(release_payout_locks, names, owner)
+
+    frappe.db.after_commit.add(callback)
+    frappe.db.after_rollback.add(callback)
+
+
+def lock_payment_entry(doc) -> int:
+    """
+    Lock the Payment Entry till the end of the current transaction.
+
+    Skipped if the lock is already held (eg. by bulk payout).
+
+    :return: Fencing token of the lock.
+    """
+    if token := doc.flags.payout_fencing_token:
+        return token
+
+    owner = frappe.generate_hash(length=12)
+
+    if not (tokens := acquire_payout_locks([doc.name], owner)):
+        frappe.throw(
+            msg=_("Payment Entry {0} is being paid in another process.").format(
+                doc.name
+            ),
+            title=_("Payment In Progress"),
+            exc=PayoutLockError,
+        )
+
+    release_payout_locks_on_completion([doc.name], owner)
+    doc.flags.payout_fencing_token = tokens[doc.name]
+
+    return tokens[doc.name]
+
+
+def is_valid_fencing_token(name: str, token: int) -> bool:
+    """
+    Check if the token is of the latest lock on the Payment Entry.
+
+    Integrations should verify it before calling the bank to reject stale attempts.
+    """
+    current = frappe.cache.get(get_fencing_token_key(name))
+    return bool(current) and int(current) == int(token)
+
+
+def get_lock_key(name: str) -> str:
+    return frappe.cache.make_key(f"{LOCK_KEY}:{name}")
+
+
+def get_fencing_token_key(name: str) -> str:
+    return frappe.cache.make_key(f"{FENCING_TOKEN_KEY}:{name}")
@@ -0,0 +1,131 @@
+"""
+Compiled schema of the Payment Entry payout fields.
+
+Payout fields are the base `PAYOUT_FIELDS` and fields from `payment_integration_fields` hooks.
+Schema (fields, labels and normalization rules) is built once per process and per site,
+and rebuilt when Payment Entry's meta changes or apps are installed/migrated.
+"""
+
+import hashlib
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import frappe
+from frappe.model import numeric_fieldtypes
+from frappe.utils import cint, cstr, flt
+
+from payment_integration_utils.payment_integration_utils.constants.payments import (
+    PAYOUT_FIELDS,
+)
+from payment_integration_utils.payment_integration_utils.utils.cache import (
+    get_snapshot,
+    invalidate_snapshot,
+)
+
+PAYOUT_SCHEMA = "payout_schema"
+
+
+@dataclass(frozen=True, slots=True)
+class PayoutSchema:
+    """
+    Immutable schema of the payout fields.
+
+    Use `get_payout_schema()` to get the schema of the current site.
+    """
+
+    fields: tuple[str, ...]
+    hooked_fields: tuple[str, ...]
+    labels: dict[str, str]
+    normalizers: dict[str, Callable]
+
+    def normalize(self, field: str, value) -> str:
+        return self.normalizers.get(field, _normalize_text)(value)
+
+    def fingerprint(self, doc) -> str:
+        """
+        Get a stable hash of the normalized payout fields.
+
+        :param doc: Payment Entry or dict of the payout fields.
+        """
+        payout_details = [
+            [field, self.normalize(field, doc.get(field))] for field in self.fields
+        ]
+
+        return hashlib.sha256(
+            json.dumps(payout_details, separators=(",", ":")).encode()
+        ).hexdigest()
+
+    def get_changed_fields(self, doc, original_doc) -> list[str]:
+        """
+        Get the payout fields whose normalized values differ.
+
+        :param doc: Payment Entry or dict of the payout fields.
+        :param original_doc: Payment Entry or dict of the payout fields to compare with.
+        """
+        return [
+            field
+            for field in self.fields
+            if self.normalize(field, doc.get(field))
+            != self.normalize(field, original_doc.get(field))
+        ]
+
+
+def get_payout_schema() -> PayoutSchema:
+    """
+    Get the compiled payout schema of the current site.
+    """
+    return get_snapshot(PAYOUT_SCHEMA, _build_payout_schema)
+
+
+def clear_payout_schema(doc=None, method=None):
+    """
+    Invalidate the payout schema for all processes.
+
+    Note: Called on Payment Entry's meta changes and `clear_cache`.
+    """
+    if doc and "Payment Entry" not in (doc.get("dt"), doc.get("doc_type"), doc.name):
+        return
+
+    invalidate_snapshot(PAYOUT_SCHEMA)
+
+
+def _build_payout_schema() -> PayoutSchema:
+    meta = frappe.get_meta("Payment Entry")
+    hooked_fields = tuple(frappe.get_hooks("payment_integration_fields"))
+
+    # unique fields in order
+    fields = tuple(dict.fromkeys((*PAYOUT_FIELDS, *hooked_fields)))
+
+    labels = {}
+    normalizers = {}
+
+    for field in fields:
+        labels[field] = meta.get_label(field)
+
+        if not (df := meta.get_field(field)):
+            continue
+
+        if df.fieldtype in ("Int", "Check"):
+            normalizers[field] = _normalize_int
+        elif df.fieldtype in numeric_fieldtypes:
+            normalizers[field] = _normalize_float
+
+    return PayoutSchema(
+        fields=fields,
+        hooked_fields=hooked_fields,
+        labels=labels,
+        normalizers=normalizers,
+    )
+
+
+def _normalize_text(value) -> str:
+    return cstr(value)
+
+
+def _normalize_int(value) -> str:
+    return str(cint(value))
+
+
+def _normalize_float(value) -> str:
+    return str(flt(value, 6))
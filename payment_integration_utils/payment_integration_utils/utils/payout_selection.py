@@ -0,0 +1,110 @@
+"""
+Selection of Payment Entries for bulk authentication and payout.
+
+A selection is either a list of Payment Entry names or list filters with exclusions:
+
+```py
+{
+    "filters": [["Payment Entry", "party_type", "=", "Employee"], ...],
+    "exclude": ["PE-0001", ...],
+}
+```
+
+Selection is resolved server-side (with user permissions) when OTP is generated and frozen
+with the auth session, so large selections are never sent back and forth from the browser.
+"""
+
+import frappe
+from frappe import _
+
+MAX_SELECTION_SIZE = 10_000
+SELECTION_CHUNK_SIZE = 500
+
+# Payment Entries which can be paid and submitted
+ELIGIBILITY_FILTERS = [
+    ["docstatus", "=", 0],
+    ["payment_type", "=", "Pay"],
+    ["integration_doctype", "is", "set"],
+    ["integration_docname", "is", "set"],
+]
+
+
+def resolve_payment_entries(
+    payment_entries: list[str] | str | None = None,
+    selection: dict | str | None = None,
+) -> list[str]:
+    """
+    Get the Payment Entry names of the selection.
+
+    :param payment_entries: List of Payment Entry names.
+    :param selection: Filters and exclusions (used if `payment_entries` not given).
+    """
+    if isinstance(payment_entries, str):
+        payment_entries = frappe.parse_json(payment_entries)
+
+    if payment_entries:
+        return list(dict.fromkeys(payment_entries))
+
+    if isinstance(selection, str):
+        selection = frappe.parse_json(selection)
+
+    if not selection:
+        frappe.throw(_("Please select Payment Entries to make payment."))
+
+    exclude = set(selection.get("exclude") or [])
+
+    names = frappe.get_list(
+        "Payment Entry",
+        filters=[*get_filters_list(selection.get("filters")), *ELIGIBILITY_FILTERS],
+        pluck="name",
+        order_by="name asc",
+        limit=MAX_SELECTION_SIZE + len(exclude) + 1,
+    )
+
+    names = [name for name in names if name not in exclude]
+
+    if not names:
+        frappe.throw(
+            msg=_("No eligible Payment Entries found for the selected filters."),
+            title=_("Invalid Selection"),
+        )
+
+    if len(names) > MAX_SELECTION_SIZE:
+        frappe.throw(
+            msg=_("Bulk payout supports up to {0} Payment Entries.").format(
+                MAX_SELECTION_SIZE
+            ),
+            title=_("Too Many Documents"),
+        )
+
+    return names
+
+
+def get_filters_list(filters: dict | list | None) -> list:
+    """
+    Get filters as list to combine with other filters.
+
+    Eg. `{"party_type": "Employee", "paid_amount": [">", 100]}` ==> `[["party_type", "=", "Employee"], ["paid_amount", ">", 100]]`
+    """
+    if not filters:
+        return []
+
+    if isinstance(filters, list):
+        return filters
+
+    return [
+        [field, *(value if isinstance(value, list | tuple) else ("=", value))]
+        for field, value in filters.items()
+    ]
+
+
+def get_chunks(total: int, chunk_size: int = SELECTION_CHUNK_SIZE) -> list[tuple]:
+    """
+    Get `(start, end)` ranges (inclusive) to stream the selection in chunks.
+
+    Eg. `get_chunks(1200)` ==> `[(0, 499), (500, 999), (1000, 1199)]`
+    """
+    return [
+        (start, min(start + chunk_size, total) - 1)
+        for start in range(0, total, chunk_size)
+    ]
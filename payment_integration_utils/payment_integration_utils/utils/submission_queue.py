@@ -0,0 +1,142 @@
+"""
+Batched Submission Queue for doctypes with `queue_in_background`.
+
+`queue_submission` of Frappe inserts a Submission Queue record and enqueues a job per document.
+For bulk actions, records are inserted with one bulk insert and jobs are enqueued with
+one pipelined Redis call in one after commit callback.
+
+Jobs run the same as `Document.queue_action`: the Submission Queue record is locked before
+enqueueing and unlocked by `execute_action` when the job runs.
+
+Jobs of a batch are tracked under a run ID, which is part of their job IDs
+(`{site}::{run_id}:{submission_queue}`), so no other state is stored.
+"""
+
+import frappe
+from frappe.model.document import Document, execute_action
+from frappe.utils import now as get_timestamp
+from frappe.utils.background_jobs import create_job_id, execute_job, get_queue
+from rq import Queue
+
+SUBMISSION_TIMEOUT = 600  # seconds (same as Frappe's Submission Queue)
+SUBMISSION_QUEUE_FIELDS = (
+    "name",
+    "creation",
+    "modified",
+    "owner",
+    "modified_by",
+    "status",
+    "ref_doctype",
+    "ref_docname",
+    "job_id",
+)
+
+
+def queue_submissions(
+    docs: list[Document],
+    action: str = "submit",
+    run_id: str | None = None,
+    is_async: bool = True,
+    now: bool = False,
+) -> str | None:
+    """
+    Queue the documents for submission in background in a batch.
+
+    Documents are queued as is (with unsaved changes and onload), like `queue_submission`.
+
+    :param docs: Documents to queue.
+    :param action: `submit` or `cancel`.
+    :param run_id: ID to track the batch. Generated if not given.
+    :param is_async: If False, jobs run in the same process (as `frappe.enqueue`).
+    :param now: Run the actions immediately, without enqueueing (also during migrate).
+    :return: Run ID of the batch.
+    """
+    if not docs:
+        return
+
+    run_id = run_id or frappe.generate_hash(length=10)
+    timestamp = get_timestamp()
+    user = frappe.session.user
+
+    values = []
+    queued = []
+
+    for doc in docs:
+        name = frappe.generate_hash(length=10)
+
+        values.append(
+            (
+                name,
+                timestamp,
+                timestamp,
+                user,
+                user,
+                "Queued",
+                doc.doctype,
+                doc.name,
+                create_job_id(f"{run_id}:{name}"),
+            )
+        )
+        queued.append((name, doc))
+
+    frappe.db.bulk_insert("Submission Queue", SUBMISSION_QUEUE_FIELDS, values)
+
+    jobs = []
+
+    for name, doc in queued:
+        # same as `SubmissionQueue.after_insert` (`queue_action`), without loading the record
+        frappe.get_doc({"doctype": "Submission Queue", "name": name}).lock()
+
+        kwargs = {
+            "__doctype": "Submission Queue",
+            "__name": name,
+            "__action": "background_submission",
+            "to_be_queued_doc": doc,
+            "action_for_queuing": action,
+        }
+
+        if now or frappe.flags.in_migrate:
+            execute_action(**kwargs)
+            continue
+
+        jobs.append(
+            Queue.prepare_data(
+                execute_job,
+                kwargs={
+                    "site": frappe.local.site,
+                    "user": user,
+                    "method": execute_action,
+                    "event": None,
+                    "job_name": f"{action} {doc.doctype} {doc.name}",
+                    "is_async": is_async,
+                    "kwargs": kwargs,
+                },
+                timeout=SUBMISSION_TIMEOUT,
+                job_id=create_job_id(f"{run_id}:{name}"),
+            )
+        )
+
+    if jobs:
+        # `enqueue_many` sends all the jobs in one pipeline
+        frappe.db.after_commit.add(
+            lambda: get_queue("default", is_async=is_async).enqueue_many(jobs)
+        )
+
+    return run_id
+
+
+@frappe.whitelist()
+def get_submission_run_status(run_id: str) -> dict[str, int]:
+    """
+    Get count of Submission Queue records of the run by status.
+
+    Eg. `{"Queued": 10, "Finished": 480, "Failed": 10}`
+    """
+    rows = frappe.get_list(
+        "Submission Queue",
+        filters={"job_id": ("like", f"%::{run_id}:%")},
+        fields=["status", "count(name) as count"],
+        group_by="status",
+    )
+
+    return {row.status: row.count for row in rows}
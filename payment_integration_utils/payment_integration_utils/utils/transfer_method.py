@@ -0,0 +1,358 @@
+"""
+Amount limits and availability of the transfer methods as a compiled rule table.
+
+Rules are compiled once per process and per site into `(min_amount, max_amount)` per method,
+so a Payment Entry is checked with a single lookup and batches are checked in vectorized form.
+Compiled rules are rebuilt on `clear_cache` and when the site config rules change
+(hash of the site config rules is a part of the snapshot key).
+
+Rules (later overrides earlier, per method):
+    1. `TRANSFER_METHOD_RULES` (defaults)
+    2. Site config `payment_transfer_method_rules` (list of rules)
+    3. Hook `payment_transfer_method_rules` per integration doctype (some banks have different limits)
+
+```py
+# hooks.py of integration app
+payment_transfer_method_rules = {
+    "RazorpayX Integration Setting": "my_app.constants.TRANSFER_METHOD_RULES"
+}
+
+# my_app/constants.py
+TRANSFER_METHOD_RULES = [{"method": "IMPS", "max_amount": 2_00_000, "hours": [0, 24]}]
+```
+
+`assign_transfer_methods` uses the rules to pick the best method for the Payment Entries in bulk.
+"""
+
+import hashlib
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt, fmt_money, now_datetime
+
+from payment_integration_utils.payment_integration_utils.constants.payments import (
+    BANK_METHODS,
+    PREFERRED_BANK_METHODS,
+    TRANSFER_METHOD,
+    TRANSFER_METHOD_RULES,
+)
+from payment_integration_utils.payment_integration_utils.utils import numpy
+from payment_integration_utils.payment_integration_utils.utils.cache import (
+    get_snapshot,
+    invalidate_snapshot,
+)
+
+TRANSFER_METHOD_LIMITS = "transfer_method_limits"
+
+NO_LIMIT = (0.0, math.inf)
+
+
+@dataclass(frozen=True, slots=True)
+class TransferMethodLimits:
+    """
+    Immutable compiled limits of the transfer methods.
+
+    Use `get_transfer_method_limits()` to get the limits of the current site.
+    """
+
+    # {(integration_doctype | None, method): (min_amount, max_amount)}
+    limits: dict[tuple[str | None, str], tuple[float, float]]
+
+    # {(integration_doctype | None, method): (from_hour, to_hour)}
+    hours: dict[tuple[str | None, str], tuple[int, int]]
+
+    def get(self, method: str, integration_doctype: str | None = None):
+        """
+        Get `(min_amount, max_amount)` of the transfer method.
+
+        :param method: Transfer method.
+        :param integration_doctype: Integration doctype of the Payment Entry.
+        """
+        return (
+            self.limits.get((integration_doctype, method))
+            or self.limits.get((None, method))
+            or NO_LIMIT
+        )
+
+    def is_valid(
+        self, method: str, amount: float, integration_doctype: str | None = None
+    ) -> bool:
+        min_amount, max_amount = self.get(method, integration_doctype)
+        return min_amount <= amount <= max_amount
+
+    def is_available(
+        self, method: str, at: datetime, integration_doctype: str | None = None
+    ) -> bool:
+        """
+        Check if the transfer method is available at the given time (system timezone).
+        """
+        hours = self.hours.get((integration_doctype, method)) or self.hours.get(
+            (None, method)
+        )
+
+        if not hours:
+            return True
+
+        from_hour, to_hour = hours
+
+        if from_hour <= to_hour:
+            return from_hour <= at.hour < to_hour
+
+        # overnight window, eg. [22, 6]
+        return at.hour >= from_hour or at.hour < to_hour
+
+    def get_valid_methods(
+        self,
+        amount: float,
+        integration_doctype: str | None = None,
+        methods: Sequence[str] = BANK_METHODS,
+    ) -> list[str]:
+        """
+        Get the transfer methods (out of `methods`) allowed for the amount.
+        """
+        return [
+            method
+            for method in methods
+            if self.is_valid(method, amount, integration_doctype)
+        ]
+
+
+def get_transfer_method_limits() -> TransferMethodLimits:
+    """
+    Get the compiled transfer method limits of the current site.
+    """
+    return get_snapshot(_get_snapshot_key(), _build_transfer_method_limits)
+
+
+def clear_transfer_method_limits(doc=None, method=None):
+    """
+    Invalidate the transfer method limits for all processes.
+
+    Note: Called on `clear_cache`.
+    """
+    invalidate_snapshot(_get_snapshot_key())
+
+
+def _get_snapshot_key() -> str:
+    """
+    Snapshot key with hash of the site config rules, so config changes are picked up
+    without `clear_cache`.
+    """
+    if not (rules := frappe.conf.get("payment_transfer_method_rules")):
+        return TRANSFER_METHOD_LIMITS
+
+    rules_hash = hashlib.sha256(frappe.as_json(rules, indent=None).encode()).hexdigest()
+    return f"{TRANSFER_METHOD_LIMITS}:{rules_hash[:12]}"
+
+
+def validate_transfer_method_limit(
+    method: str, amount: float, integration_doctype: str | None = None
+):
+    """
+    Validate the amount against the limits of the transfer method.
+
+    :param method: Transfer method.
+    :param amount: Amount to be paid (in INR).
+    :param integration_doctype: Integration doctype of the Payment Entry.
+    """
+    limits = get_transfer_method_limits()
+    min_amount, max_amount = limits.get(method, integration_doctype)
+
+    if min_amount <= amount <= max_amount:
+        return
+
+    alternatives = "/".join(
+        limits.get_valid_methods(
+            amount,
+            integration_doctype,
+            [m for m in BANK_METHODS if m != method],
+        )
+    )
+
+    if amount > max_amount:
+        if alternatives:
+            msg = _(
+                "<strong>{0}</strong> transfer limit is {1}. Please use <strong>{2}</strong> for higher amount."
+            ).format(method, fmt_money(max_amount, currency="INR"), alternatives)
+        else:
+            msg = _(
+                "<strong>{0}</strong> transfer limit is {1}. No other transfer method allows this amount."
+            ).format(method, fmt_money(max_amount, currency="INR"))
+
+        frappe.throw(
+            msg=msg,
+            title=_("Payment Limit Exceeded"),
+            exc=frappe.ValidationError,
+        )
+
+    if alternatives:
+        msg = _(
+            "<strong>{0}</strong> transfer minimum amount is {1}. Please use <strong>{2}</strong> for lower amount."
+        ).format(method, fmt_money(min_amount, currency="INR"), alternatives)
+    else:
+        msg = _(
+            "<strong>{0}</strong> transfer minimum amount is {1}. No other transfer method allows this amount."
+        ).format(method, fmt_money(min_amount, currency="INR"))
+
+    frappe.throw(
+        msg=msg,
+        title=_("Insufficient Payment Amount"),
+        exc=frappe.ValidationError,
+    )
+
+
+def check_transfer_method_limits(
+    methods: Sequence[str],
+    amounts: Sequence[float],
+    integration_doctypes: Sequence[str | None] | str | None = None,
+):
+    """
+    Check the amounts against the limits of the transfer methods in batch.
+
+    :param methods: Transfer method of each amount.
+    :param amounts: Amounts to be paid (in INR).
+    :param integration_doctypes: Integration doctype of each amount or one for all.
+    :return: `numpy.ndarray` of bools if `amounts` is an array, else list of bools.
+
+    ---
+    Example:
+    ```
+    check_transfer_method_limits(["IMPS", "RTGS"], [6_00_000, 3_00_000]) ==> [False, True]
+    ```
+    """
+    limits = get_transfer_method_limits()
+
+    if integration_doctypes is None or isinstance(integration_doctypes, str):
+        integration_doctypes = [integration_doctypes] * len(methods)
+
+    bounds = [
+        limits.get(method, integration_doctype)
+        for method, integration_doctype in zip(
+            methods, integration_doctypes, strict=True
+        )
+    ]
+
+    if numpy is not None and (
+        isinstance(amounts, numpy.ndarray)
+        or (isinstance(amounts, list | tuple) and len(amounts) >= 1000)
+    ):
+        values = numpy.asarray(amounts, dtype=float)
+        bounds = numpy.asarray(bounds, dtype=float).reshape(-1, 2)
+        valid = (values >= bounds[:, 0]) & (values <= bounds[:, 1])
+
+        return valid if isinstance(amounts, numpy.ndarray) else valid.tolist()
+
+    return [
+        min_amount <= amount <= max_amount
+        for amount, (min_amount, max_amount) in zip(amounts, bounds, strict=True)
+    ]
+
+
+def assign_transfer_methods(
+    payment_entries: list[dict],
+    only_invalid: bool = True,
+    at: datetime | None = None,
+) -> dict[str, str]:
+    """
+    Pick the best transfer method for the Payment Entries in one pass.
+
+    Same eligibility as the validations of Payment Entry (Party Bank Account is mandatory):
+
+    - With party's bank details: first of `PREFERRED_BANK_METHODS` allowed for the amount
+      and available at the time.
+    - Without bank details but with UPI ID: UPI.
+    - Link payouts are never changed (party is paid as per contact details).
+
+    :param payment_entries: List of dicts (or docs) with `name`, `paid_amount`, `payment_transfer_method`,
+        `party_bank_account`, `party_bank_account_no`, `party_bank_ifsc`, `party_upi_id` and `integration_doctype`.
+    :param only_invalid: Change only the methods which will fail in validation (missing or not allowed).
+    :param at: Time of payout. Defaults to now (system timezone).
+    :return: Changed transfer methods `{name: method}`.
+    """
+    if not payment_entries:
+        return {}
+
+    limits = get_transfer_method_limits()
+    at = at or now_datetime()
+
+    amounts = [flt(pe.get("paid_amount")) for pe in payment_entries]
+    integration_doctypes = [pe.get("integration_doctype") for pe in payment_entries]
+
+    # {method: [allowed for each Payment Entry]}
+    allowed = {
+        method: check_transfer_method_limits(
+            [method] * len(amounts), amounts, integration_doctypes
+        )
+        for method in PREFERRED_BANK_METHODS
+    }
+
+    changes = {}
+
+    for idx, pe in enumerate(payment_entries):
+        current_method = pe.get("payment_transfer_method")
+
+        if current_method == TRANSFER_METHOD.LINK.value or not pe.get(
+            "party_bank_account"
+        ):
+            continue
+
+        has_bank_details = pe.get("party_bank_account_no") and pe.get("party_bank_ifsc")
+        bank_methods = (
+            [
+                method
+                for method in PREFERRED_BANK_METHODS
+                if allowed[method][idx]
+                and limits.is_available(method, at, integration_doctypes[idx])
+            ]
+            if has_bank_details
+            else []
+        )
+
+        if only_invalid and (
+            current_method in bank_methods
+            or (current_method == TRANSFER_METHOD.UPI.value and pe.get("party_upi_id"))
+        ):
+            continue
+
+        if bank_methods:
+            method = bank_methods[0]
+        elif not has_bank_details and pe.get("party_upi_id"):
+            method = TRANSFER_METHOD.UPI.value
+        else:
+            continue
+
+        if method != current_method:
+            changes[pe.get("name")] = method
+
+    return changes
+
+
+def _build_transfer_method_limits() -> TransferMethodLimits:
+    limits = {}
+    hours = {}
+
+    def add_rules(integration_doctype: str | None, rules: list[dict]):
+        for rule in rules:
+            key = (integration_doctype, rule["method"])
+            limits[key] = (
+                flt(rule.get("min_amount")),
+                flt(rule["max_amount"]) if rule.get("max_amount") else math.inf,
+            )
+
+            if rule.get("hours"):
+                hours[key] = tuple(cint(hour) for hour in rule["hours"])
+
+    add_rules(None, TRANSFER_METHOD_RULES)
+    add_rules(None, frappe.conf.get("payment_transfer_method_rules") or [])
+
+    for integration_doctype, paths in frappe.get_hooks(
+        "payment_transfer_method_rules"
+    ).items():
+        for path in paths:
+            add_rules(integration_doctype, frappe.get_attr(path))
+
+    return TransferMethodLimits(limits=limits, hours=hours)
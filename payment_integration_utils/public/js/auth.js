@@ -19,7 +19,10 @@ Object.assign(payment_integration_utils, {
 	 *
 	 * Note: Only single OTP is generated for all the payment entries.
 	 *
-	 * @param {string | string[]} payment_entries - Payment Entry name or list of names
+	 * Selection by filters is resolved on the server and frozen with the auth session,
+	 * so the names are never sent from the browser.
+	 *
+	 * @param {string | string[] | {filters: Array, exclude: string[]}} payment_entries - Payment Entry name, list of names or selection
 	 * @param {Function} callback - Callback function to be executed after successful authentication
 	 */
 	async authenticate_payment_entries(payment_entries, callback) {
@@ -32,10 +35,6 @@ Object.assign(payment_integration_utils, {
 					</bold>`;
 		};
 
-		if (typeof payment_entries === "string") {
-			payment_entries = [payment_entries];
-		}
-
 		const generation_details = await this.generate_otp(payment_entries);
 		if (!generation_details) return;
 
@@ -47,7 +46,8 @@ Object.assign(payment_integration_utils, {
 					fieldtype: "HTML",
 					options: `<div class="alert alert-warning" role="alert">
             					${__("Do not close this dialog until you authenticate.")}
-        					</div> <br>`,
+        					</div>
+							<p>${__("Authenticating {0} Payment Entries", [generation_details.count])}</p>`,
 				},
 				{
 					fieldname: "otp",
@@ -96,7 +96,7 @@ Object.assign(payment_integration_utils, {
 	 *
 	 * Note: Only single OTP is generated for all the payment entries.
 	 *
-	 * @param {string[]} payment_entries List of Payment Entry names
+	 * @param {string | string[] | {filters: Array, exclude: string[]}} payment_entries Payment Entry name, list of names or selection
 	 *
 	 * ---
 	 * One Example Response:
@@ -106,15 +106,28 @@ Object.assign(payment_integration_utils, {
 	 *  auth_id: "12345678",
 	 * 	setup: true,
 	 * 	prompt: "Enter verification code from your OTP app",
+	 * 	count: 2,
 	 * }
 	 * ```
 	 */
 	async generate_otp(payment_entries) {
+		if (typeof payment_entries === "string") {
+			payment_entries = [payment_entries];
+		}
+
+		let args;
+
+		if (Array.isArray(payment_entries)) {
+			args = { payment_entries };
+		} else if ($.isPlainObject(payment_entries)) {
+			args = { selection: payment_entries };
+		} else {
+			frappe.throw(__("Select Payment Entries to authenticate."));
+		}
+
 		const response = await frappe.call({
 			method: `${AUTH_MODULE}.generate_otp`,
-			args: {
-				payment_entries,
-			},
+			args,
 			freeze: true,
 			freeze_message: __("Please wait..."),
 		});
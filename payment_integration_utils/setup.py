@@ -1,12 +1,15 @@
+import hashlib
+import json
+
 import click
-import frappe
-from frappe.custom.doctype.custom_field.custom_field import (
-    create_custom_fields as make_custom_fields,
-)
 
+from payment_integration_utils import __version__
 from payment_integration_utils.payment_integration_utils.constants.custom_fields import (
     CUSTOM_FIELDS,
 )
+from payment_integration_utils.payment_integration_utils.constants.indexes import (
+    INDEXES,
+)
 from payment_integration_utils.payment_integration_utils.constants.property_setters import (
     PROPERTY_SETTERS,
 )
@@ -22,40 +25,66 @@ from payment_integration_utils.payment_integration_utils.setup import (
     delete_custom_fields,
     delete_property_setters,
     delete_roles_and_permissions,
+    make_custom_fields,
+    make_indexes,
+    make_property_setters,
     make_roles_and_permissions,
     make_workflow_actions,
     make_workflow_states,
     make_workflows,
 )
+from payment_integration_utils.payment_integration_utils.setup.profiler import (
+    SetupProfiler,
+    report_setup_profile,
+)
 
 
 ################### After Install ###################
-def setup_customizations():
+def setup_customizations(profiler: SetupProfiler | None = None) -> SetupProfiler:
+    profiler = profiler or SetupProfiler()
+
     click.secho("Creating Roles and Permissions...", fg="blue")
-    create_roles_and_permissions()
+    with profiler.phase("create_roles_and_permissions"):
+        changes = create_roles_and_permissions()
+
+    click.secho(
+        f"Permissions: {len(changes['created'])} created, {len(changes['updated'])} updated"
+    )
 
     click.secho("Creating Custom Fields...", fg="blue")
-    create_custom_fields()
+    with profiler.phase("create_custom_fields"):
+        create_custom_fields()
+
+    click.secho("Creating Indexes...", fg="blue")
+    with profiler.phase("create_indexes"):
+        create_indexes()
 
     click.secho("Creating Property Setters...", fg="blue")
-    create_property_setters()
+    with profiler.phase("create_property_setters"):
+        create_property_setters()
 
     click.secho("Creating Workflows...", fg="blue")
-    create_workflows()
+    with profiler.phase("create_workflows"):
+        create_workflows()
+
+    return profiler
 
 
 # Note: separate functions are required to use in patches
 def create_roles_and_permissions():
-    make_roles_and_permissions(ROLES)
+    return make_roles_and_permissions(ROLES)
 
 
 def create_custom_fields():
     make_custom_fields(CUSTOM_FIELDS)
 
 
+def create_indexes():
+    return make_indexes(INDEXES)
+
+
 def create_property_setters():
-    for property_setter in PROPERTY_SETTERS:
-        frappe.make_property_setter(property_setter)
+    make_property_setters(PROPERTY_SETTERS)
 
 
 def create_workflows():
@@ -69,13 +98,62 @@ def create_workflows():
     make_workflows(WORKFLOWS)
 
 
+def get_customizations_version() -> str:
+    """
+    Get app version with hash of the declared customizations.
+
+    Changes when the app is upgraded or any customization is changed.
+    Eg. `15.0.0:3f2a9c1b7d4e`
+    """
+    customizations = {
+        "roles": ROLES,
+        "custom_fields": CUSTOM_FIELDS,
+        "indexes": INDEXES,
+        "property_setters": PROPERTY_SETTERS,
+        "workflow_states": WORKFLOW_STATES,
+        "workflow_actions": list(WORKFLOW_ACTION.values()),
+        "workflows": WORKFLOWS,
+    }
+    digest = hashlib.sha256(
+        json.dumps(customizations, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+    return f"{__version__}:{digest[:12]}"
+
+
+################### After Migrate ###################
+def after_migrate():
+    profiler = SetupProfiler()
+
+    # declared custom fields (no writes if unchanged)
+    with profiler.phase("create_custom_fields"):
+        create_custom_fields()
+
+    # new indexes (no-op if exist)
+    with profiler.phase("create_indexes"):
+        create_indexes()
+
+    # converge workflows to the declared state (no writes if unchanged)
+    with profiler.phase("create_workflows"):
+        create_workflows()
+
+    report_setup_profile(profiler, "Migrate Profile")
+
+
 ################### Before Uninstall ###################
-def delete_customizations():
+def delete_customizations(profiler: SetupProfiler | None = None) -> SetupProfiler:
+    profiler = profiler or SetupProfiler()
+
     click.secho("Deleting Custom Fields...", fg="blue")
-    delete_custom_fields(CUSTOM_FIELDS)
+    with profiler.phase("delete_custom_fields"):
+        delete_custom_fields(CUSTOM_FIELDS)
 
     click.secho("Deleting Property Setters...", fg="blue")
-    delete_property_setters(PROPERTY_SETTERS)
+    with profiler.phase("delete_property_setters"):
+        delete_property_setters(PROPERTY_SETTERS)
 
     click.secho("Deleting Roles and Permissions...", fg="blue")
-    delete_roles_and_permissions(ROLES)
+    with profiler.phase("delete_roles_and_permissions"):
+        delete_roles_and_permissions(ROLES)
+
+    return profiler